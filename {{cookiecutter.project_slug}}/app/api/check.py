@@ -1,7 +1,11 @@
 """Описывает пути к концевым точкам проверки здоровья контейнера."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-router = APIRouter(prefix="/check", tags=["health check"])
+from app.api.rate_limit import rate_limit
+
+router = APIRouter(
+    prefix="/check", tags=["health check"], dependencies=[Depends(rate_limit)]
+)
 
 
 @router.get("/health", status_code=200)
@@ -1,12 +1,13 @@
 """Описывает пути к концевым точкам для фронта"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.api.frontend.endpoints import (
     module_name
 )
+from app.api.rate_limit import rate_limit
 
-router = APIRouter(prefix="/frontend-api")
+router = APIRouter(prefix="/frontend-api", dependencies=[Depends(rate_limit)])
 router.include_router(
     module_name.router, tags=["frontend-api, module_name"]
 )
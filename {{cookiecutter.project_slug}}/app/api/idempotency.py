@@ -0,0 +1,292 @@
+"""
+Идемпотентность POST запросов по заголовку Idempotency-Key.
+
+Ответ на запрос с ключом сохраняется в Redis. Повтор с тем же ключом,
+пришедший во время обработки оригинала, дожидается его ответа,
+а пришедший после - сразу получает сохранённый ответ.
+Повтор с тем же ключом, но другим телом запроса, отклоняется с 422.
+Если оригинал завершился ошибкой, повтор выполняется заново.
+"""
+import asyncio
+import base64
+import hashlib
+import math
+import time
+from typing import Any
+
+from redis.asyncio import RedisError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import settings
+from app.repository.redis.connections import redis_manager
+from app.utils.logger.logs_adapter import logger
+from app.utils.serialization import dumps, loads
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+IDEMPOTENCY_KEY_PREFIX = "idempotency"
+IDEMPOTENT_METHODS = frozenset({"POST"})
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+
+# Ответы, после которых запрос можно повторить с тем же ключом
+TRANSIENT_STATUSES = frozenset({408, 409, 429})
+
+PROCESSING = "processing"
+DONE = "done"
+RELEASED = "released"
+
+
+def _header(scope: Scope, name: bytes) -> bytes | None:
+    for header, value in scope["headers"]:
+        if header == name:
+            return value
+    return None
+
+
+def _redis_key(scope: Scope, idempotency_key: bytes) -> str:
+    """
+    Ключ записи в Redis.
+
+    Ключи клиентов не пересекаются: запись привязана к авторизации
+    (или адресу клиента) и пути запроса.
+    """
+    client = _header(scope, b"authorization")
+    if client is None and scope.get("client"):
+        client = scope["client"][0].encode()
+    owner = hashlib.sha256(client or b"").hexdigest()[:16]
+    return (
+        f"{IDEMPOTENCY_KEY_PREFIX}:{owner}:{scope['path']}:"
+        f"{idempotency_key.decode('latin-1')}"
+    )
+
+
+class _StoredResponse:
+    """Ответ, сохраняемый в Redis для повторов запроса"""
+
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]]):
+        self.status = status
+        self.headers = headers
+        self.body = bytearray()
+
+    def to_record(self, fingerprint: str) -> bytes:
+        return dumps(
+            {
+                "state": DONE,
+                "fingerprint": fingerprint,
+                "status": self.status,
+                "headers": [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in self.headers
+                ],
+                "body": base64.b64encode(self.body).decode(),
+            }
+        )
+
+    @staticmethod
+    async def replay(record: dict[str, Any], send: Send) -> None:
+        headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in record["headers"]
+        ]
+        headers.append((REPLAYED_HEADER, b"true"))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": record["status"],
+                "headers": headers,
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": base64.b64decode(record["body"]),
+            }
+        )
+
+
+async def _send_error(send: Send, status: int, detail: str) -> None:
+    body = dumps({"detail": detail})
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware, сохраняющий ответы на запросы с Idempotency-Key.
+
+    Пока оригинал обрабатывается, ключ занят записью "processing"
+    со сроком idempotency_lock_timeout: если процесс упал,
+    повтор сможет выполнить запрос заново. Ответы 5xx и временные
+    ошибки (TRANSIENT_STATUSES) не сохраняются.
+    Если Redis недоступен, запросы обрабатываются как обычно.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or not settings.idempotency_enabled
+            or not redis_manager.started
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = _header(scope, IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            await _send_error(send, 400, "Invalid Idempotency-Key header")
+            return
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = _redis_key(scope, idempotency_key)
+        receive = self._replay_body(body, receive)
+
+        while True:
+            try:
+                acquired = await redis_manager.client.set(
+                    key,
+                    dumps({"state": PROCESSING, "fingerprint": fingerprint}),
+                    nx=True,
+                    px=math.ceil(settings.idempotency_lock_timeout * 1000),
+                )
+            except RedisError as exc:
+                logger.warning("Idempotency key check failed: %s", exc)
+                await self.app(scope, receive, send)
+                return
+
+            if acquired:
+                await self._process(key, fingerprint, scope, receive, send)
+                return
+
+            record = await self._wait_for_record(key)
+            # оригинал завершился ошибкой и освободил ключ
+            if record is None or record["state"] != RELEASED:
+                break
+
+        if record is None:
+            await _send_error(
+                send, 409, "Request with this Idempotency-Key is in progress"
+            )
+        elif record["fingerprint"] != fingerprint:
+            await _send_error(
+                send,
+                422,
+                "Idempotency-Key was used with another request payload",
+            )
+        else:
+            await _StoredResponse.replay(record, send)
+
+    async def _process(
+        self,
+        key: str,
+        fingerprint: str,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Обрабатывает оригинал и сохраняет его ответ"""
+        response: _StoredResponse | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response
+            if message["type"] == "http.response.start":
+                response = _StoredResponse(
+                    message["status"], list(message.get("headers", []))
+                )
+            elif message["type"] == "http.response.body" and response:
+                response.body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            await self._forget(key)
+            raise
+
+        if (
+            response is None
+            or response.status >= 500
+            or response.status in TRANSIENT_STATUSES
+        ):
+            await self._forget(key)
+            return
+        try:
+            await redis_manager.client.set(
+                key,
+                response.to_record(fingerprint),
+                ex=settings.idempotency_ttl,
+            )
+        except RedisError as exc:
+            logger.warning("Idempotent response is not saved: %s", exc)
+
+    @staticmethod
+    async def _forget(key: str) -> None:
+        try:
+            await redis_manager.client.delete(key)
+        except RedisError as exc:
+            logger.warning("Idempotency key release failed: %s", exc)
+
+    @staticmethod
+    async def _wait_for_record(key: str) -> dict[str, Any] | None:
+        """
+        Ждёт, пока оригинал запроса сохранит ответ.
+
+        Возвращает запись с состоянием RELEASED, если оригинал
+        освободил ключ, и None, если ответа не дождались.
+        """
+        deadline = time.monotonic() + settings.idempotency_lock_timeout
+        while time.monotonic() < deadline:
+            try:
+                raw = await redis_manager.client.get(key)
+            except RedisError as exc:
+                logger.warning("Idempotency key check failed: %s", exc)
+                return None
+            if raw is None:
+                return {"state": RELEASED}
+            record = loads(raw)
+            if record["state"] == DONE:
+                return record
+            await asyncio.sleep(POLL_INTERVAL)
+        return None
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        body = bytearray()
+        while True:
+            message = await receive()
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                return bytes(body)
+
+    @staticmethod
+    def _replay_body(body: bytes, receive: Receive) -> Receive:
+        """
+        Отдаёт приложению уже прочитанное тело запроса,
+        дальше - сообщения сервера (например, http.disconnect)
+        """
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return replay
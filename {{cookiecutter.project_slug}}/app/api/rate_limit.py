@@ -0,0 +1,133 @@
+"""
+Ограничение частоты запросов к апи.
+
+Лимиты считаются по алгоритму token bucket отдельно для пользователя
+(по токену из заголовка Authorization), IP адреса и для клиента
+на каждом маршруте. Все корзины запроса проверяются и списываются
+одним Lua скриптом, поэтому ограничение атомарно для всех реплик сервиса.
+"""
+import hashlib
+import math
+
+from redis.asyncio import RedisError
+from fastapi import HTTPException, Request, status
+
+from app.config.settings import settings
+from app.repository.redis.connections import redis_manager
+from app.utils.logger.logs_adapter import logger
+
+RATE_LIMIT_KEY_PREFIX = "rate-limit"
+
+# KEYS - корзины, ARGV - пары (ёмкость, пополнение в токенах за мс).
+# Возвращает 0, если запрос разрешён, иначе - через сколько мс повторить.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local retry_after = 0
+local tokens = {}
+
+for index, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[index * 2 - 1])
+    local rate = tonumber(ARGV[index * 2])
+    local bucket = redis.call("HMGET", key, "tokens", "ts")
+    local available = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + (now - updated_at) * rate)
+    if available < 1 then
+        retry_after = math.max(retry_after, math.ceil((1 - available) / rate))
+    end
+    tokens[index] = available
+end
+
+if retry_after > 0 then
+    return retry_after
+end
+
+for index, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[index * 2 - 1])
+    local rate = tonumber(ARGV[index * 2])
+    redis.call("HSET", key, "tokens", tokens[index] - 1, "ts", now)
+    redis.call("PEXPIRE", key, math.ceil(capacity / rate))
+end
+return 0
+"""
+
+
+def _user(request: Request) -> str | None:
+    """
+    Пользователь запроса - хэш токена из заголовка Authorization.
+
+    Подпись токена проверяет авторизация, а не лимит: клиент,
+    подставляющий разные токены, получает новые корзины пользователя,
+    но упирается в лимит своего IP адреса.
+    """
+    if not (authorization := request.headers.get("authorization")):
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()[:16]
+
+
+def _route(request: Request) -> str:
+    """Шаблон маршрута запроса, а не конкретный путь"""
+    route = request.scope.get("route")
+    return f"{request.method} {getattr(route, 'path', request.url.path)}"
+
+
+def request_buckets(request: Request) -> list[tuple[str, int]]:
+    """
+    Корзины, из которых списывается запрос, и их ёмкость.
+
+    Корзина маршрута своя у каждого клиента (пользователя или,
+    для неавторизованных запросов, IP адреса): один клиент
+    не может исчерпать маршрут для остальных.
+    """
+    user = _user(request)
+    client_host = request.client.host if request.client else None
+    client = user or client_host
+    candidates = (
+        (user, "user", settings.rate_limit_per_user),
+        (client_host, "ip", settings.rate_limit_per_ip),
+        (
+            client and f"{client}:{_route(request)}",
+            "route",
+            settings.rate_limit_per_route,
+        ),
+    )
+    return [
+        (f"{scope}:{value}", capacity)
+        for value, scope, capacity in candidates
+        if value and capacity
+    ]
+
+
+async def rate_limit(request: Request) -> None:
+    """
+    FastAPI зависимость: отвечает 429 с Retry-After,
+    если исчерпан хотя бы один из лимитов запроса.
+
+    Если Redis недоступен, запрос пропускается.
+    """
+    if not settings.rate_limit_enabled or not redis_manager.started:
+        return
+    if not (buckets := request_buckets(request)):
+        return
+
+    period_ms = settings.rate_limit_period * 1000
+    keys = [f"{RATE_LIMIT_KEY_PREFIX}:{key}" for key, _ in buckets]
+    arguments = []
+    for _, capacity in buckets:
+        arguments.extend((capacity, capacity / period_ms))
+
+    try:
+        retry_after_ms = await redis_manager.client.eval(
+            TOKEN_BUCKET_SCRIPT, len(keys), *keys, *arguments
+        )
+    except RedisError as exc:
+        logger.warning("Rate limit check failed: %s", exc)
+        return
+
+    if retry_after_ms:
+        raise HTTPException(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            "Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after_ms / 1000))},
+        )
@@ -0,0 +1,16 @@
+"""Классы ответов апи"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.utils.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON ответ, сериализуемый через app.utils.serialization
+    (orjson, если он установлен)
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,47 @@
+"""
+Span'ы входящих http-запросов.
+
+Каждый запрос становится корнем трассы или, если клиент передал
+заголовок traceparent, продолжает его трассу. Span'ы запросов к БД,
+Redis и внешним API, сделанных при обработке, становятся дочерними.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.tracing import TRACEPARENT_HEADER, SpanKind, tracer
+
+_TRACEPARENT = TRACEPARENT_HEADER.encode()
+
+
+class TracingMiddleware:
+    """ASGI middleware, открывающий серверный span на время запроса"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = next(
+            (
+                value.decode("latin-1")
+                for header, value in scope["headers"]
+                if header == _TRACEPARENT
+            ),
+            None,
+        )
+        with tracer.span(
+            f"{scope['method']} {scope['path']}",
+            SpanKind.SERVER,
+            traceparent=traceparent,
+        ) as span:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            span.set_attribute("http.method", scope["method"])
+            span.set_attribute("http.target", scope["path"])
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,189 @@
+"""
+Перечитывание настроек без перезапуска процесса.
+
+По SIGHUP или при изменении файла с переменными окружения
+настройки загружаются и валидируются заново. Код, читающий settings
+при каждом обращении, сразу видит новые значения, а в объекты,
+скопировавшие настройки при создании (Throttler, пул БД, кэши),
+изменения передают подписчики. Соединения и содержимое кэшей
+при этом сохраняются; только движок БД при изменении размера пула
+создаётся заново, и открытые сессии дорабатывают на старом.
+
+Невалидный файл не применяется: остаются прежние настройки.
+"""
+import asyncio
+import logging
+import os
+import signal
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.config.settings import (
+    CommonSettings,
+    EnvironmentSettings,
+    get_settings,
+    load_settings,
+    settings,
+)
+from app.repository.database.database import AsyncDBEngine, async_session
+from app.repository.http_session.base import ApiSession
+from app.utils.lazy import is_initialised, replace
+from app.utils.logger.logs_adapter import LOGGER_NAME, logger
+
+SettingsCallback = Callable[[CommonSettings], None]
+
+THROTTLING_FIELDS = (
+    "throttler_rate_limit",
+    "throttler_period",
+    "proxy_rotation",
+    "proxy_max_failures",
+    "proxy_quarantine_seconds",
+)
+HTTP_CACHE_FIELDS = ("http_cache_max_entries",)
+DB_POOL_FIELDS = ("db_pool_size", "db_max_overflow")
+LOGGING_FIELDS = ("log_level",)
+
+
+class SettingsReloader:
+    """
+    Перечитывает настройки и оповещает подписчиков об изменённых полях.
+
+    Пример использования:
+    settings_reloader.subscribe(("log_level",), apply_log_level)
+    await settings_reloader.start()
+    """
+
+    def __init__(self, env_file: str | Path | None = None):
+        self._env_file = Path(env_file or EnvironmentSettings.Config.env_file)
+        self._subscribers: list[tuple[frozenset[str], SettingsCallback]] = []
+        self._mtime = self._read_mtime()
+        self._watcher: asyncio.Task | None = None
+        self._signal_installed = False
+
+    def subscribe(
+        self, fields: Iterable[str], callback: SettingsCallback
+    ) -> None:
+        """Вызывает callback с новыми настройками при изменении fields"""
+        self._subscribers.append((frozenset(fields), callback))
+
+    def reload(self) -> set[str]:
+        """
+        Загружает настройки заново и применяет изменения.
+
+        Возвращает имена изменённых полей.
+        """
+        get_settings.cache_clear()
+        try:
+            new_settings = load_settings()
+        except ValidationError as exc:
+            logger.error("Settings are not reloaded: %s", exc)
+            return set()
+
+        previous = replace(settings, new_settings)
+        if previous is None:
+            return set()
+        changed = {
+            name
+            for name in new_settings.__fields__
+            if getattr(previous, name) != getattr(new_settings, name)
+        }
+        if not changed:
+            return changed
+
+        logger.info("Settings reloaded, changed: %s", sorted(changed))
+        for fields, callback in self._subscribers:
+            if fields & changed:
+                try:
+                    callback(new_settings)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.error("Settings are not applied: %s", exc)
+        return changed
+
+    async def start(self, interval: float | None = None) -> None:
+        """
+        Перечитывает настройки по SIGHUP и при изменении файла,
+        который проверяется раз в interval секунд (0 - не проверять)
+        """
+        if interval is None:
+            interval = settings.settings_reload_interval
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGHUP, self.reload)
+            self._signal_installed = True
+        except (NotImplementedError, RuntimeError, ValueError):
+            # нет сигналов (Windows) или цикл не в главном потоке
+            self._signal_installed = False
+        if interval > 0 and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch(interval))
+
+    async def stop(self) -> None:
+        """Прекращает следить за изменениями и отписывает подписчиков"""
+        if self._signal_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._signal_installed = False
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        self._subscribers.clear()
+
+    def _read_mtime(self) -> float | None:
+        try:
+            return os.stat(self._env_file).st_mtime
+        except OSError:
+            return None
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            if (mtime := self._read_mtime()) != self._mtime:
+                self._mtime = mtime
+                self.reload()
+
+
+def apply_throttling(
+    session: ApiSession, new_settings: CommonSettings
+) -> None:
+    """Передаёт ограничения и ротацию в пул прокси ApiSession"""
+    session.proxy_pool.reconfigure(
+        new_settings.throttler_rate_limit,
+        new_settings.throttler_period,
+        new_settings.proxy_rotation,
+        new_settings.proxy_max_failures,
+        new_settings.proxy_quarantine_seconds,
+    )
+
+
+def apply_http_cache(
+    session: ApiSession, new_settings: CommonSettings
+) -> None:
+    """Меняет ёмкость кэша ответов ApiSession"""
+    if session.cache is not None:
+        session.cache.resize(new_settings.http_cache_max_entries)
+
+
+def apply_db_pool(
+    engine: AsyncDBEngine, new_settings: CommonSettings
+) -> None:
+    """
+    Пересоздаёт уже созданный движок БД с новым размером пула
+    и переключает на него фабрику сессий
+    """
+    if not is_initialised(engine):
+        return
+    engine.recreate(new_settings.engine_config)
+    if is_initialised(async_session):
+        async_session.configure(bind=engine.engine)
+
+
+def apply_log_level(new_settings: CommonSettings) -> None:
+    """Меняет уровень логгера приложения"""
+    logging.getLogger(LOGGER_NAME).setLevel(new_settings.log_level)
+
+
+settings_reloader = SettingsReloader()
@@ -5,7 +5,7 @@
 from enum import Enum
 from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import (
     BaseSettings,
@@ -16,6 +16,8 @@ from pydantic import (
     validator,
 )
 
+from app.utils.lazy import LazyProxy
+
 # pylint: disable=no-self-argument, consider-using-f-string
 
 APP_DIR = Path(__file__).resolve(strict=True).parent.parent
@@ -62,11 +64,35 @@ class CommonSettings(EnvironmentSettings):
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/96.0.4664.45 Safari/537.36"
     )
+    throttler_rate_limit: int = 3
+    throttler_period: float = 1.0
+    http_coalesce_requests: bool = False
+    # отдельный Throttler на каждый прокси пула; пустой пул - используем proxy
+    proxy_pool: list[str] = []
+    proxy_rotation: Literal["round_robin", "least_loaded"] = "round_robin"
+    proxy_max_failures: int = 3
+    proxy_quarantine_seconds: float = 30.0
+    # дублирование GET запросов, не уложившихся в перцентиль задержки хоста
+    http_hedge_requests: bool = False
+    http_hedge_percentile: float = 0.95
+    http_hedge_min_delay: float = 0.05
+    http_hedge_default_delay: float = 1.0
+
+    # HTTP cache
+    http_cache_enabled: bool = False
+    http_cache_max_entries: int = 1024
+    http_cache_dir: Path | None = None
+    http_cache_vary_headers: list[str] = ["Accept", "Accept-Language"]
 
     # Server
     server_host: str = "0.0.0.0"
     server_port: int = 8000
     server_reload: bool = False
+    # 0 - по числу доступных процессоров
+    server_workers: int = 0
+    server_graceful_timeout: int = 30
+    # как часто проверять изменение .env, 0 - только по SIGHUP
+    settings_reload_interval: float = 5.0
     title: str = "name"
     openapi_url: str = "/api/openapi.json"
     version: str = "1"
@@ -81,11 +107,18 @@ class CommonSettings(EnvironmentSettings):
     DB_NAME: str = "test"
     db_future: bool = True
     db_pool_recycle: int = 30 * 60
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
     db_echo: bool = True
+    # отложенная пакетная запись: размер пачки, ожидание, сек,
+    # и предел строк в буфере, после которого запись тормозит вызывающих
+    db_write_batch_size: int = 500
+    db_write_flush_interval: float = 0.05
+    db_write_max_pending: int = 10_000
 
-   session_settings: dict[str, Any] = {}
+    session_settings: dict[str, Any] = {}
 
-    @validator("session_settings", pre=True)
+    @validator("session_settings", pre=True, always=True)
     def pass_session_settings(  # pylint: disable = no-self-argument
         cls, value: str | None, values: dict[str, Any]
     ) -> dict[str, Any]:
@@ -98,6 +131,36 @@ class CommonSettings(EnvironmentSettings):
             "user_agent": values["user_agent"],
             "throttler_rate_limit": values["throttler_rate_limit"],
             "throttler_period": values["throttler_period"],
+            "coalesce_requests": values["http_coalesce_requests"],
+            "proxy_pool": values["proxy_pool"],
+            "proxy_rotation": values["proxy_rotation"],
+            "proxy_max_failures": values["proxy_max_failures"],
+            "proxy_quarantine_seconds": values["proxy_quarantine_seconds"],
+            "hedge_requests": values["http_hedge_requests"],
+            "hedge_percentile": values["http_hedge_percentile"],
+            "hedge_min_delay": values["http_hedge_min_delay"],
+            "hedge_default_delay": values["http_hedge_default_delay"],
+        }
+
+    http_cache_settings: dict[str, Any] = {}
+
+    @validator("http_cache_settings", pre=True, always=True)
+    def pass_http_cache_settings(
+        cls, value: str | None, values: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Прокидывает настройки кэша ответов http-сессии.
+
+        Пустой словарь означает, что кэш выключен.
+        """
+        if value and isinstance(value, dict):
+            return value
+        if not values["http_cache_enabled"]:
+            return {}
+
+        return {
+            "max_entries": values["http_cache_max_entries"],
+            "cache_dir": values["http_cache_dir"],
+            "vary_headers": values["http_cache_vary_headers"],
         }
 
     engine_config: dict[str, Any] = {}
@@ -125,6 +188,8 @@ class CommonSettings(EnvironmentSettings):
             ),
             "future": values["db_future"],
             "pool_recycle": values["db_pool_recycle"],
+            "pool_size": values["db_pool_size"],
+            "max_overflow": values["db_max_overflow"],
             "echo": values["db_echo"],
         }
 
@@ -144,14 +209,159 @@ class CommonSettings(EnvironmentSettings):
             raise ValueError("DB URL should be in engine parameters.")
         return value
 
+    # Redis
+    REDIS_HOST: str = "127.0.0.1"
+    REDIS_PORT: str = "6379"
+    REDIS_DB: int = 0
+    REDIS_PASSWORD: str | None = None
+    redis_max_connections: int = 50
+    redis_socket_timeout: float = 5.0
+    redis_socket_connect_timeout: float = 5.0
+    redis_health_check_interval: int = 30
+    redis_retry_on_timeout: bool = True
+    redis_startup_attempts: int = 5
+    # пакетная отправка команд: размер пачки и максимальное ожидание, сек
+    redis_batch_size: int = 500
+    redis_batch_interval: float = 0.005
+
+    # Redis Streams
+    # block_ms должен быть меньше redis_socket_timeout
+    stream_concurrency: int = 32
+    stream_batch_size: int = 64
+    stream_block_ms: int = 2_000
+    stream_claim_idle_ms: int = 60_000
+    stream_max_deliveries: int = 5
+    stream_ack_batch_size: int = 64
+    stream_ack_interval: float = 0.5
+    stream_maxlen: int = 1_000_000
+    results_stream: str = "results"
+    results_group: str = "results-receivers"
+
+    redis_settings: dict[str, Any] = {}
+
+    @validator("redis_settings", always=True)
+    def generate_redis_arguments(
+        cls, value: dict[str, Any], values: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Проверяет наличие переменной "redis_settings" с параметрами пула
+        соединений Redis.
+
+        При отсутствии, генерирует с использованием имеющихся переменных.
+        """
+        if value:
+            return value
+        return {
+            "url": RedisDsn.build(
+                scheme="redis",
+                password=values["REDIS_PASSWORD"],
+                host=values["REDIS_HOST"],
+                port=values["REDIS_PORT"],
+                path=f"/{values['REDIS_DB']}",
+            ),
+            "max_connections": values["redis_max_connections"],
+            "socket_timeout": values["redis_socket_timeout"],
+            "socket_connect_timeout": values["redis_socket_connect_timeout"],
+            "health_check_interval": values["redis_health_check_interval"],
+            "retry_on_timeout": values["redis_retry_on_timeout"],
+            "startup_attempts": values["redis_startup_attempts"],
+        }
+
     # авторизация
     allow_unauthorized: bool = False
 
+    # Rate limiting: число запросов за rate_limit_period секунд, 0 - без лимита
+    # rate_limit_per_route - для одного клиента на одном маршруте
+    rate_limit_enabled: bool = True
+    rate_limit_period: float = 60.0
+    rate_limit_per_user: int = 600
+    rate_limit_per_ip: int = 1_200
+    rate_limit_per_route: int = 300
+
+    # Idempotency-Key: срок хранения ответов и ожидания оригинала запроса
+    idempotency_enabled: bool = True
+    idempotency_ttl: int = 86_400
+    idempotency_lock_timeout: float = 60.0
+
+    # Executor: где выполнять синхронные задачи и вычисления
+    # thread, process или inline; 0 воркеров - размер по умолчанию
+    # (для процессов - доля ядер на один воркер uvicorn)
+    executor_kind: Literal["thread", "process", "inline"] = "thread"
+    executor_max_workers: int = 0
+    # функция прогрева воркеров пула, "package.module:function"
+    executor_initializer: str = ""
+
+    executor_settings: dict[str, Any] = {}
+
+    @validator("executor_settings", pre=True, always=True)
+    def pass_executor_settings(
+        cls, value: str | None, values: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Прокидывает настройки пула для синхронных задач"""
+        if value and isinstance(value, dict):
+            return value
+
+        return {
+            "kind": values["executor_kind"],
+            "max_workers": values["executor_max_workers"],
+            "initializer": values["executor_initializer"],
+        }
+
+    # Tracing: доля записываемых трасс и куда выгружать span'ы
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 0.01
+    tracing_exporter: Literal["file", "otlp"] = "file"
+    tracing_file: str = "traces.jsonl"
+    tracing_otlp_endpoint: str = "http://localhost:4318"
+    # по умолчанию - title
+    tracing_service_name: str = ""
+    tracing_queue_size: int = 2048
+    tracing_batch_size: int = 512
+    tracing_export_interval: float = 5.0
+
+    tracing_settings: dict[str, Any] = {}
+
+    @validator("tracing_settings", pre=True, always=True)
+    def pass_tracing_settings(
+        cls, value: str | None, values: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Прокидывает настройки трассировки.
+
+        Пустой словарь означает, что трассировка выключена.
+        """
+        if value and isinstance(value, dict):
+            return value
+        if not values["tracing_enabled"]:
+            return {}
+
+        return {
+            "sample_rate": values["tracing_sample_rate"],
+            "exporter": values["tracing_exporter"],
+            "file": values["tracing_file"],
+            "otlp_endpoint": values["tracing_otlp_endpoint"],
+            "service_name": (
+                values["tracing_service_name"] or values["title"]
+            ),
+            "queue_size": values["tracing_queue_size"],
+            "batch_size": values["tracing_batch_size"],
+            "export_interval": values["tracing_export_interval"],
+        }
+
     # Logging
     log_level: str = "INFO"
+    # записи пишутся в stdout фоновым потоком через очередь;
+    # при переполнении новые (drop_new) или старые (drop_oldest) отбрасываются
+    log_queue_size: int = 10_000
+    log_queue_overflow: Literal["drop_new", "drop_oldest"] = "drop_new"
+    # json - одна строка JSON на запись, с полями CONTEXT
+    log_format: Literal["console", "json"] = "console"
+    # доля пропускаемых записей по имени логгера или шаблону сообщения
+    log_sample_rates: dict[str, float] = {}
+    # одинаковых сообщений за log_rate_limit_period секунд, 0 - без лимита
+    log_rate_limit: int = 100
+    log_rate_limit_period: float = 60.0
     logging: dict[str, Any] = {}
 
-    @validator("logging", pre=True)
+    @validator("logging", pre=True, always=True)
     def pass_logging_settings(
         cls, value: str | None, values: dict[str, Any]
     ) -> dict[str, Any]:
@@ -170,19 +380,40 @@ class CommonSettings(EnvironmentSettings):
                     ),
                     "datefmt": "%d.%m.%y %H:%M:%S",
                 },
+                "json": {
+                    "()": "app.utils.logger.formatters.JsonFormatter",
+                },
+            },
+            "filters": {
+                "sampling": {
+                    "()": "app.utils.logger.filters.SamplingFilter",
+                    "rates": values["log_sample_rates"],
+                    "rate_limit": values["log_rate_limit"],
+                    "period": values["log_rate_limit_period"],
+                },
+                "context": {
+                    "()": "app.utils.logger.formatters.ContextFilter",
+                },
             },
             "handlers": {
                 "console": {
-                    "class": "logging.StreamHandler",
+                    "()": "app.utils.logger.handlers.QueuedHandler",
+                    "target": {
+                        "class": "logging.StreamHandler",
+                        "stream": "ext://sys.stdout",
+                    },
+                    "queue_size": values["log_queue_size"],
+                    "overflow": values["log_queue_overflow"],
                     "level": "DEBUG",
-                    "formatter": "console",
-                    "stream": "ext://sys.stdout",
+                    "formatter": values["log_format"],
+                    "filters": ["sampling", "context"],
                 },
             },
             "loggers": {
                 "root": {"level": "DEBUG", "handlers": ["console"]},
+                # уровень совпадает с применяемым при перезагрузке
                 "register-manager": {
-                    "level": "DEBUG",
+                    "level": values["log_level"],
                     "handlers": ["console"],
                 },
             },
@@ -212,9 +443,10 @@ class LocalSettings(CommonSettings):
     root_path: str = ""
 
     # Logging
+    log_level: str = "DEBUG"
     logging: dict[str, Any] = {}
 
-    @validator("logging", pre=True)
+    @validator("logging", pre=True, always=True)
     def pass_logging_settings(
         cls, value: str | None, values: dict[str, Any]
     ) -> dict[str, Any]:
@@ -233,19 +465,40 @@ class LocalSettings(CommonSettings):
                     ),
                     "datefmt": "%d.%m.%y %H:%M:%S",
                 },
+                "json": {
+                    "()": "app.utils.logger.formatters.JsonFormatter",
+                },
+            },
+            "filters": {
+                "sampling": {
+                    "()": "app.utils.logger.filters.SamplingFilter",
+                    "rates": values["log_sample_rates"],
+                    "rate_limit": values["log_rate_limit"],
+                    "period": values["log_rate_limit_period"],
+                },
+                "context": {
+                    "()": "app.utils.logger.formatters.ContextFilter",
+                },
             },
             "handlers": {
                 "console": {
-                    "class": "logging.StreamHandler",
+                    "()": "app.utils.logger.handlers.QueuedHandler",
+                    "target": {
+                        "class": "logging.StreamHandler",
+                        "stream": "ext://sys.stdout",
+                    },
+                    "queue_size": values["log_queue_size"],
+                    "overflow": values["log_queue_overflow"],
                     "level": "DEBUG",
-                    "formatter": "console",
-                    "stream": "ext://sys.stdout",
+                    "formatter": values["log_format"],
+                    "filters": ["sampling", "context"],
                 },
             },
             "loggers": {
                 "root": {"level": "DEBUG", "handlers": ["console"]},
+                # уровень совпадает с применяемым при перезагрузке
                 "register-manager": {
-                    "level": "DEBUG",
+                    "level": values["log_level"],
                     "handlers": ["console"],
                 },
             },
@@ -276,4 +529,10 @@ def get_settings(environment: str) -> CommonSettings:
     return settings_index.get(environment, ProdSettings)()
 
 
-settings = get_settings(EnvironmentSettings().environment.value)
+def load_settings() -> CommonSettings:
+    """Загружает настройки для окружения из переменной ENVIRONMENT"""
+    return get_settings(EnvironmentSettings().environment.value)
+
+
+# .env читается и валидируется при первом обращении к настройкам
+settings: CommonSettings = LazyProxy(load_settings)  # type: ignore
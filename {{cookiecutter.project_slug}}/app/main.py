@@ -1,22 +1,185 @@
 """Основной модуль приложения."""
+import asyncio
+import importlib.util
+import logging.config
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+from typing import Any
+
 import click
+from fastapi import FastAPI
+
+from app.api import check, frontend
+from app.api.idempotency import IdempotencyMiddleware
+from app.api.responses import FastJSONResponse
+from app.api.tracing import TracingMiddleware
+from app.config.reload import (
+    DB_POOL_FIELDS,
+    HTTP_CACHE_FIELDS,
+    LOGGING_FIELDS,
+    THROTTLING_FIELDS,
+    apply_db_pool,
+    apply_http_cache,
+    apply_log_level,
+    apply_throttling,
+    settings_reloader,
+)
+from app.config.settings import CommonSettings, settings
+from app.repository.database.database import async_engine
+from app.repository.database.write_buffer import write_buffer
+from app.repository.http_session.manager import create_api_session
+from app.repository.redis.connections import redis_manager
+from app.repository.redis.invalidation import invalidation_bus
+from app.services.results_receiver import receive_results
+from app.utils.executors import available_cpus, executor
+from app.utils.lazy import is_initialised
+from app.utils.scheduler import scheduler
+from app.utils.tracing import configure_tracing, tracer
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI) -> AsyncIterator[None]:
+    """Открывает общие ресурсы при старте приложения и закрывает при
+    остановке.
+
+    Выполняется в каждом воркере, поэтому пулы соединений
+    не разделяются между процессами.
+    """
+    configure_tracing(settings.tracing_settings)
+    await redis_manager.startup()
+    await invalidation_bus.start()
+    api_session = application.state.api_session = create_api_session()
+    settings_reloader.subscribe(
+        THROTTLING_FIELDS, partial(apply_throttling, api_session)
+    )
+    settings_reloader.subscribe(
+        HTTP_CACHE_FIELDS, partial(apply_http_cache, api_session)
+    )
+    settings_reloader.subscribe(
+        DB_POOL_FIELDS, partial(apply_db_pool, async_engine)
+    )
+    settings_reloader.subscribe(LOGGING_FIELDS, apply_log_level)
+    await settings_reloader.start()
+    await executor.start()
+    try:
+        yield
+    finally:
+        await scheduler.shutdown()
+        await executor.shutdown()
+        if is_initialised(write_buffer):
+            await write_buffer.close()
+        await settings_reloader.stop()
+        await api_session.close()
+        await invalidation_bus.stop()
+        await redis_manager.shutdown()
+        if is_initialised(async_engine):
+            await async_engine.close_connections()
+        # выгрузка span'ов ждёт экспортёра и не должна блокировать цикл
+        await asyncio.get_running_loop().run_in_executor(
+            None, tracer.shutdown
+        )
+
+
+def configure_logging() -> None:
+    """Применяет настройки логирования процесса"""
+    logging.config.dictConfig(settings.logging)
+
+
+def create_app() -> FastAPI:
+    """Создаёт приложение FastAPI"""
+    configure_logging()
+    application = FastAPI(
+        title=settings.title,
+        openapi_url=settings.openapi_url,
+        version=settings.version,
+        debug=settings.debug,
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+    )
+    application.add_middleware(IdempotencyMiddleware)
+    application.add_middleware(TracingMiddleware)
+    application.include_router(check.router)
+    application.include_router(frontend.router)
+    return application
+
+
+@lru_cache
+def get_app() -> FastAPI:
+    """Приложение процесса, создаётся при первом обращении"""
+    return create_app()
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Отдаёт app лениво (uvicorn app.main:app), чтобы команды CLI
+    не читали настройки и не собирали приложение при импорте
+    """
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
 
 
 @click.group()
 @click.pass_context
 def cli(ctx: click.core.Context):
-    """Инициализирует настройки для процессов приложения"""
+    """
+    Передаёт настройки командам процессов приложения.
+
+    Настройки ленивые: их читает и настраивает логирование
+    только команда, которой они нужны.
+    """
     ctx.ensure_object(dict)
     ctx.obj["settings"] = settings
-    click.echo("Configuration loaded")
 
 
-@cli.command(help="Explanation.")
+@cli.command(help="Serve the API with several worker processes.")
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of worker processes, defaults to the available CPUs.",
+)
+@click.pass_context
+def serve(ctx: click.core.Context, workers: int | None):
+    """
+    Запускает uvicorn с несколькими воркерами.
+
+    Каждый воркер импортирует приложение заново и в lifespan
+    создаёт свои движок БД, пул Redis и http-сессию.
+    """
+    import uvicorn  # pylint: disable=import-outside-toplevel
+
+    configure_logging()
+    ctx_settings: CommonSettings = ctx.obj["settings"]
+    uvicorn.run(
+        "app.main:app",
+        host=ctx_settings.server_host,
+        port=ctx_settings.server_port,
+        workers=workers or ctx_settings.server_workers or available_cpus(),
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        timeout_graceful_shutdown=ctx_settings.server_graceful_timeout,
+        proxy_headers=True,
+    )
+
+
+@cli.command(help="Consume worker results from the Redis stream.")
 @click.pass_context
 def run_worker_results_receiver(ctx: click.core.Context):
     """
+    Запускает потребителя потока результатов воркеров.
+
+    Процессы объединены в группу потребителей Redis Streams,
+    поэтому обработка масштабируется запуском новых контейнеров.
     """
+    configure_logging()
     ctx_settings: CommonSettings = ctx.obj["settings"]
+    asyncio.run(receive_results(ctx_settings))
 
 
 if __name__ == "__main__":
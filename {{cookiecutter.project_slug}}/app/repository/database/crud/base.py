@@ -1,5 +1,7 @@
 """Модуль, реализует базовые SQL операции над объектами приложения"""
-from typing import Generic, TypeVar
+import functools
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
 
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -9,7 +11,10 @@ from sqlalchemy.future import select
 from sqlalchemy.sql.elements import BinaryExpression
 
 from app.repository.database.models.models import Base
+from app.repository.database.write_buffer import write_buffer
+from app.repository.redis.invalidation import invalidation_bus
 from app.utils.call_counter import CALL_COUNTER_IN_REQUEST
+from app.utils.tracing import SpanKind, tracer
 
 ModelType = TypeVar("ModelType", bound=Base)  # pylint: disable = invalid-name
 CreateSchemaType = TypeVar(  # pylint: disable = invalid-name
@@ -18,6 +23,7 @@ CreateSchemaType = TypeVar(  # pylint: disable = invalid-name
 UpdateSchemaType = TypeVar(  # pylint: disable = invalid-name
     "UpdateSchemaType", bound=BaseModel
 )
+_R = TypeVar("_R")
 
 
 def is_pydantic(obj: object):
@@ -51,6 +57,21 @@ def create_nested_db_items(schema_instance: BaseModel) -> dict:
     return model_attributes
 
 
+def traced_query(
+    func: Callable[..., Awaitable[_R]]
+) -> Callable[..., Awaitable[_R]]:
+    """Оборачивает метод CRUD в span db.<имя метода> с таблицей модели"""
+    name = f"db.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(self: "CRUDBase", *args: Any, **kwargs: Any) -> _R:
+        with tracer.span(name, SpanKind.CLIENT) as span:
+            span.set_attribute("db.table", self.cache_namespace)
+            return await func(self, *args, **kwargs)
+
+    return wrapper
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Базовый класс по созданию/чтению/обновлению/удалению сущностей из БД
 
@@ -61,6 +82,18 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: type[ModelType]):
         self._model = model
 
+    @property
+    def cache_namespace(self) -> str:
+        """
+        Пространство имён локальных кэшей, построенных на данных модели.
+        Методы записи инвалидируют его во всех репликах.
+        """
+        return self._model.__tablename__
+
+    async def _invalidate_caches(self) -> None:
+        await invalidation_bus.publish(self.cache_namespace)
+
+    @traced_query
     async def get(
         self,
         db_session: AsyncSession,
@@ -83,6 +116,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             raise HTTPException(*exception_args)
         return db_obj
 
+    @traced_query
     async def get_multi(  # pylint: disable = too-many-arguments
         self,
         db_session: AsyncSession,
@@ -105,6 +139,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return res.scalars().unique().all()
 
     @CALL_COUNTER_IN_REQUEST
+    @traced_query
     async def create(
         self,
         db_session: AsyncSession,
@@ -115,10 +150,26 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj = self._model(**create_nested_db_items(obj_in))
         db_session.add(db_obj)
         await db_session.commit()
+        await self._invalidate_caches()
         await db_session.refresh(db_obj)
         return db_obj
 
+    async def create_buffered(
+        self,
+        obj_in: CreateSchemaType | dict,
+        wait: bool = False,
+    ) -> None:
+        """
+        Ставит запись объекта в буфер пакетной записи.
+
+        Подходит для частых вставок (события, история): строки
+        записываются одним INSERT. Объект не возвращается, вложенные
+        модели не поддерживаются. При wait=True дожидается записи.
+        """
+        await write_buffer.write(self._model, obj_in, wait=wait)
+
     @CALL_COUNTER_IN_REQUEST
+    @traced_query
     async def update(
         self,
         db_session: AsyncSession,
@@ -137,9 +188,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         )
         await db_session.execute(update_st)
         await db_session.commit()
+        await self._invalidate_caches()
         return await self.get(db_session, filter_expr)
 
     @CALL_COUNTER_IN_REQUEST
+    @traced_query
     async def update_got(
         self,
         db_session: AsyncSession,
@@ -151,9 +204,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         for field, value in values.items():
             setattr(db_entity, field, value)
         await db_session.commit()
+        await self._invalidate_caches()
         return db_entity
 
     @CALL_COUNTER_IN_REQUEST
+    @traced_query
     async def remove(
         self,
         db_session: AsyncSession,
@@ -166,8 +221,10 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         )
         await db_session.execute(delete(self._model).where(filter_expr))
         await db_session.commit()
+        await self._invalidate_caches()
         return
 
+    @traced_query
     async def count(
         self,
         db_session: AsyncSession,
@@ -1,4 +1,5 @@
 """Инициализация подключения к базе данных."""
+import asyncio
 from collections.abc import AsyncIterator
 from typing import Any
 
@@ -11,6 +12,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.config.settings import settings
 from app.repository.database.models.models import Base
+from app.utils.lazy import LazyProxy
 
 
 class AsyncDBEngine:
@@ -18,6 +20,7 @@ class AsyncDBEngine:
 
     def __init__(self, db_settings: dict[str, Any]):
         self.engine: AsyncEngine = create_async_engine(**db_settings)
+        self._disposals: set[asyncio.Task] = set()
 
     async def create_tables(self):
         """Проверяет наличие таблиц в БД и создаёт отсутствующие."""
@@ -25,20 +28,43 @@ class AsyncDBEngine:
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
+    def recreate(self, db_settings: dict[str, Any]) -> None:
+        """
+        Заменяет движок новым с параметрами db_settings
+        (например, с другим размером пула).
+
+        Новые сессии открываются на новом движке, уже открытые
+        дорабатывают на старом. Свободные соединения старого движка
+        закрываются в фоне, занятые - по возвращении в его пул.
+        """
+        previous, self.engine = self.engine, create_async_engine(
+            **db_settings
+        )
+        task = asyncio.ensure_future(previous.dispose())
+        self._disposals.add(task)
+        task.add_done_callback(self._disposals.discard)
+
     async def close_connections(self):
         """Закрывает активные соединения с БД."""
+        if self._disposals:
+            await asyncio.gather(*self._disposals, return_exceptions=True)
         await self.engine.dispose()
 
 
-async_engine = AsyncDBEngine(settings.engine_config)
+# Движок и фабрика сессий создаются при первом обращении
+async_engine: AsyncDBEngine = LazyProxy(  # type: ignore
+    lambda: AsyncDBEngine(settings.engine_config)
+)
 
 # expire_on_commit=False will prevent attributes from being expired
 # after commit.
-async_session = sessionmaker(
-    async_engine.engine,
-    expire_on_commit=False,
-    class_=AsyncSession,
-    future=True,
+async_session: sessionmaker = LazyProxy(  # type: ignore
+    lambda: sessionmaker(
+        async_engine.engine,
+        expire_on_commit=False,
+        class_=AsyncSession,
+        future=True,
+    )
 )
 
 
@@ -0,0 +1,166 @@
+"""
+Отложенная пакетная запись в БД.
+
+Запись событий или истории по одной строке на запрос стоит
+отдельной транзакции и сетевого круга до БД на каждую строку.
+WriteBuffer копит строки в памяти и записывает их одним
+INSERT на таблицу в одной транзакции, когда набирается
+max_batch_size строк или проходит flush_interval.
+Оставшиеся строки записываются при остановке приложения.
+
+Строки, не записанные из-за ошибки, теряются (ошибка пишется в лог),
+поэтому буфер подходит для данных, потеря части которых при сбое
+допустима. Вызывающий код, которому нужна гарантия записи,
+передаёт wait=True или дожидается flush().
+"""
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import settings
+from app.repository.database.database import async_session
+from app.repository.database.models.models import Base
+from app.repository.redis.invalidation import invalidation_bus
+from app.utils.lazy import LazyProxy
+from app.utils.logger.logs_adapter import logger
+from app.utils.tracing import SpanKind, tracer
+
+_Pending = tuple[type[Base], dict[str, Any], asyncio.Future | None]
+
+
+class WriteBuffer:
+    """
+    Копит строки для INSERT и записывает их пачками.
+
+    Если записи не успевают и в буфере набирается max_pending строк,
+    следующий write сам записывает накопленное, притормаживая
+    вызывающий код вместо роста памяти.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] | None = None,
+        max_batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_pending: int | None = None,
+    ):
+        self._session_factory = session_factory
+        self._max_batch_size = (
+            max_batch_size or settings.db_write_batch_size
+        )
+        self._flush_interval = (
+            settings.db_write_flush_interval
+            if flush_interval is None
+            else flush_interval
+        )
+        self._max_pending = max_pending or settings.db_write_max_pending
+        self._pending: list[_Pending] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def write(
+        self,
+        model: type[Base],
+        values: BaseModel | dict[str, Any],
+        wait: bool = False,
+    ) -> None:
+        """
+        Ставит строку таблицы model в буфер.
+
+        При wait=True дожидается записи пачки со строкой
+        и поднимает её ошибку.
+        """
+        if len(self._pending) >= self._max_pending:
+            await self._flush()
+
+        if isinstance(values, BaseModel):
+            values = values.dict()
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self._pending.append((model, values, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._schedule_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self._flush_interval, self._schedule_flush
+            )
+        if future is not None:
+            await future
+
+    async def flush(self) -> None:
+        """
+        Записывает накопленные строки, не дожидаясь таймера,
+        и дожидается уже идущих записей.
+
+        Поднимает ошибку, если строки не записаны.
+        """
+        errors = await asyncio.gather(*self._flushes, self._flush())
+        if (error := next(filter(None, errors), None)) is not None:
+            raise error
+
+    async def close(self) -> None:
+        """Записывает оставшиеся строки при остановке"""
+        await self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _schedule_flush(self) -> None:
+        task = asyncio.ensure_future(self._flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self) -> Exception | None:
+        """Записывает накопленные строки и возвращает ошибку записи"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return None
+
+        rows: dict[type[Base], list[dict[str, Any]]] = {}
+        for model, values, _ in batch:
+            rows.setdefault(model, []).append(values)
+        error: Exception | None = None
+        try:
+            await self._insert(rows)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error(
+                "%s buffered rows are not written: %s", len(batch), exc
+            )
+            error = exc
+        else:
+            for model in rows:
+                await invalidation_bus.publish(model.__tablename__)
+
+        for _, _, future in batch:
+            if future is None or future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+        return error
+
+    async def _insert(self, rows: dict[type[Base], list[dict[str, Any]]]):
+        """Один INSERT на таблицу, все таблицы в одной транзакции"""
+        session_factory = self._session_factory or async_session
+        async with session_factory() as session:
+            for model, model_rows in rows.items():
+                with tracer.span("db.bulk_insert", SpanKind.CLIENT) as span:
+                    span.set_attribute("db.table", model.__tablename__)
+                    span.set_attribute("db.rows", len(model_rows))
+                    await session.execute(insert(model), model_rows)
+            await session.commit()
+
+
+# Буфер создаётся при первой записи
+write_buffer: WriteBuffer = LazyProxy(WriteBuffer)  # type: ignore
@@ -9,11 +9,9 @@
 
 import asyncio
 import functools
-import json
 import time
 from asyncio import TimeoutError as AsyncTimeoutError
-from collections import deque
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
 from typing import Any
 
 from aiohttp import (
@@ -23,40 +21,34 @@ from aiohttp import (
     ClientSession,
     ContentTypeError,
 )
+from multidict import CIMultiDict
 from yarl import URL
 
+from app.repository.http_session.cache import ResponseCache
+from app.repository.http_session.const import (
+    DEFAULT_HEDGE_DELAY,
+    DEFAULT_HEDGE_MIN_DELAY,
+    DEFAULT_HEDGE_PERCENTILE,
+    DEFAULT_PROXY_MAX_FAILURES,
+    DEFAULT_PROXY_QUARANTINE_SECONDS,
+)
 from app.repository.http_session.exception import (
     ClientSessionError,
     UnknownSessionError,
 )
-
-
-class Throttler:
-    """
-    При обращении к соцсетям важно соблюдать ограничения апи
-    на число запросов в секунду.
-    Для этого реализуем класс-throttler,
-    ограничивающий число единовременных запросов в рамках одной сессии.
-
-    rate_limit/period = число запросов/n секунд
-    """
-
-    def __init__(self, rate_limit: int, period: int | float = 1.0):
-        self._period = float(period)
-        self._times = deque(0.0 for _ in range(rate_limit))
-
-    async def __aenter__(self):
-        while True:
-            curr_ts = time.monotonic()
-            if (diff := curr_ts - (self._times[0] + self._period)) > 0.0:
-                self._times.popleft()
-                break
-            await asyncio.sleep(-diff)
-
-        self._times.append(curr_ts)
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        pass
+from app.repository.http_session.latency import LatencyTracker
+from app.repository.http_session.proxy_pool import (
+    ProxyPool,
+    ProxyRotation,
+    ProxyState,
+)
+# Throttler переехал в throttler.py, импорт оставлен для совместимости
+# pylint: disable-next=unused-import
+from app.repository.http_session.throttler import Throttler  # noqa: F401
+from app.utils.logger.logs_adapter import logger
+from app.utils.serialization import dumps_str, loads
+from app.utils.single_flight import SingleFlight
+from app.utils.tracing import SpanKind, inject, tracer
 
 
 class ApiResponse:  # pylint: disable=too-few-public-methods
@@ -65,11 +57,16 @@ class ApiResponse:  # pylint: disable=too-few-public-methods
     """
 
     def __init__(
-        self, status_code: int, response_url: URL, response_body: str
+        self,
+        status_code: int,
+        response_url: URL,
+        response_body: str,
+        response_headers: Mapping[str, str] | None = None,
     ):
         self.status = status_code
         self.url = response_url
         self.body = response_body
+        self.headers = CIMultiDict(response_headers or {})
 
     def __repr__(self):
         return (
@@ -83,7 +80,7 @@ class ApiResponse:  # pylint: disable=too-few-public-methods
         """
         Функция десереализует JSON тела ответа и возвращает Python объект.
         """
-        return json.loads(self.body.strip())
+        return loads(self.body.strip())
 
     def text(self):
         """
@@ -122,6 +119,12 @@ def retry_api_request(
                     response = await session_func(*args, **kwargs)
                 except session_exceptions as error:
                     session_error = error
+                    logger.warning(
+                        "Request failed, attempt %s of %s: %r",
+                        attempt + 1,
+                        times,
+                        error,
+                    )
                     await asyncio.sleep(sleep_time)
                     continue
                 except Exception as error:
@@ -143,17 +146,34 @@ def retry_api_request(
 
 class ApiSession:
     """
-    Класс реализует интерфейс http запросов через aiohttp
+    Класс реализует интерфейс http запросов через aiohttp.
+
+    Если задан proxy_pool, запросы распределяются по нескольким прокси,
+    у каждого из которых свой Throttler; иначе используется proxy.
+
+    При hedge_requests GET запрос, не получивший ответа за время,
+    в которое укладывается hedge_percentile запросов к хосту
+    (считая с прохождения Throttler), дублируется через другой прокси;
+    побеждает первый ответ.
     """
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         proxy: str | None,
         user_agent: str,
         throttler_rate_limit: int,
         throttler_period: int | float,
+        cache: ResponseCache | None = None,
+        coalesce_requests: bool = False,
+        proxy_pool: list[str] | None = None,
+        proxy_rotation: ProxyRotation | str = ProxyRotation.ROUND_ROBIN,
+        proxy_max_failures: int = DEFAULT_PROXY_MAX_FAILURES,
+        proxy_quarantine_seconds: float = DEFAULT_PROXY_QUARANTINE_SECONDS,
+        hedge_requests: bool = False,
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        hedge_min_delay: float = DEFAULT_HEDGE_MIN_DELAY,
+        hedge_default_delay: float = DEFAULT_HEDGE_DELAY,
     ):
-        self._proxy = proxy
         self._headers = {
             "Accept": (
                 "text/html,application/xhtml+xml,"
@@ -164,10 +184,38 @@ class ApiSession:
             "Cache-Control": "no-cache",
             "User-Agent": user_agent,
         }
-        self._throttler = Throttler(throttler_rate_limit, throttler_period)
-        self._session = ClientSession(trust_env=True)
+        self._proxy_pool = ProxyPool(
+            proxy_pool or [proxy],
+            throttler_rate_limit,
+            throttler_period,
+            proxy_rotation,
+            proxy_max_failures,
+            proxy_quarantine_seconds,
+        )
+        self._session = ClientSession(
+            trust_env=True, json_serialize=dumps_str
+        )
+        self._cache = cache
+        self._single_flight = SingleFlight() if coalesce_requests else None
+        self._latency = (
+            LatencyTracker(
+                hedge_percentile, hedge_min_delay, hedge_default_delay
+            )
+            if hedge_requests
+            else None
+        )
         self._closed = False
 
+    @property
+    def proxy_pool(self) -> ProxyPool:
+        """Пул прокси сессии"""
+        return self._proxy_pool
+
+    @property
+    def cache(self) -> ResponseCache | None:
+        """Кэш ответов сессии, если он включён"""
+        return self._cache
+
     @property
     def closed(self) -> bool:
         """Показывает, закрыта ли http-сессия"""
@@ -179,7 +227,6 @@ class ApiSession:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
 
-    @retry_api_request()
     async def get(
         self,
         url: str,
@@ -187,17 +234,144 @@ class ApiSession:
         headers: dict[str, Any] | None = None,
     ) -> ApiResponse:
         """
-        Функция посылает GET запрос
+        Функция посылает GET запрос.
+
+        Если сессии передан кэш, свежий ответ отдаётся из него,
+        а устаревший перепроверяется условным запросом.
         """
-        headers = self._headers | (headers or {})
+        if self._cache is None:
+            return await self._fetch(url, params, headers)
+
+        key = self._cache.make_key(
+            url, params, self._headers | (headers or {})
+        )
+        if (entry := self._cache.get(key)) is not None and entry.is_fresh():
+            return entry.response
+
+        conditional_headers = entry.validators() if entry is not None else {}
+        response = await self._fetch(
+            url, params, (headers or {}) | conditional_headers
+        )
+        if response.status == 304 and entry is not None:
+            entry = self._cache.revalidate(key, entry, response.headers)
+            return entry.response
 
-        async with self._throttler:
-            async with self._session.get(
-                url, params=params, proxy=self._proxy, headers=headers
-            ) as response:
-                return ApiResponse(
-                    response.status, response.url, await response.text()
+        self._cache.store(key, response)
+        return response
+
+    async def _fetch(
+        self,
+        url: str,
+        params: None | str | list[tuple[str, str]] = None,
+        headers: dict[str, Any] | None = None,
+    ) -> ApiResponse:
+        """
+        Отправляет GET запрос в сеть.
+
+        При включённом coalesce_requests одинаковые одновременные запросы
+        (url, параметры и заголовки) объединяются в один:
+        через Throttler проходит только он, остальные получают его ответ.
+        """
+        if self._single_flight is None:
+            return await self._get(url, params, headers)
+
+        key = (
+            url,
+            params if isinstance(params, str) else tuple(params or ()),
+            tuple(sorted((headers or {}).items())),
+        )
+        return await self._single_flight.do(
+            key, functools.partial(self._get, url, params, headers)
+        )
+
+    @retry_api_request()
+    async def _get(
+        self,
+        url: str,
+        params: None | str | list[tuple[str, str]] = None,
+        headers: dict[str, Any] | None = None,
+    ) -> ApiResponse:
+        """
+        Отправляет GET запрос, при включённом хеджировании - с дублем.
+
+        Каждая повторная попытка заново выбирает прокси из пула.
+        """
+        if self._latency is None:
+            return await self._request(
+                "GET",
+                url,
+                params=params,
+                headers=self._headers | (headers or {}),
+            )
+        return await self._hedged_get(url, params, headers)
+
+    async def _hedged_get(
+        self,
+        url: str,
+        params: None | str | list[tuple[str, str]] = None,
+        headers: dict[str, Any] | None = None,
+    ) -> ApiResponse:
+        """
+        Отправляет GET запрос с хеджированием.
+
+        Задержка хеджирования отсчитывается с момента, когда основной
+        запрос прошёл Throttler своего прокси: время ожидания в очереди
+        не считается медленным ответом. Повторный запрос отправляется
+        через другой прокси (или через тот же, если другого доступного
+        нет) и проходит через его Throttler, поэтому учитывается
+        в лимитах наравне с остальными.
+        """
+        primary_state = self._proxy_pool.acquire()
+        admitted = asyncio.Event()
+        primary = asyncio.ensure_future(
+            self._request(
+                "GET",
+                url,
+                primary_state,
+                admitted,
+                params=params,
+                headers=self._headers | (headers or {}),
+            )
+        )
+        requests = {primary}
+        try:
+            admission = asyncio.ensure_future(admitted.wait())
+            try:
+                await asyncio.wait(
+                    {primary, admission}, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                admission.cancel()
+
+            delay = self._latency.hedge_delay(URL(url).host)
+            done, _ = await asyncio.wait(requests, timeout=delay)
+            if not done:
+                requests.add(
+                    asyncio.ensure_future(
+                        self._request(
+                            "GET",
+                            url,
+                            self._proxy_pool.acquire(exclude=primary_state),
+                            params=params,
+                            headers=self._headers | (headers or {}),
+                        )
+                    )
+                )
+
+            error: BaseException | None = None
+            pending = requests
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
+                for request in done:
+                    if (exception := request.exception()) is None:
+                        return request.result()
+                    error = error or exception
+            raise error  # type: ignore[misc]
+        finally:
+            for request in requests:
+                request.cancel()
 
     @retry_api_request()
     async def post(
@@ -213,7 +387,6 @@ class ApiSession:
         """
         headers = self._headers | (headers or {})
         post_params: dict[str, Any] = {
-            "proxy": self._proxy,
             "headers": headers,
             "ssl": ssl,
         }
@@ -222,11 +395,53 @@ class ApiSession:
         elif data is not None:
             post_params["data"] = data
 
-        async with self._throttler:
-            async with self._session.post(url, **post_params) as response:
-                return ApiResponse(
-                    response.status, response.url, await response.text()
-                )
+        return await self._request("POST", url, **post_params)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        proxy_state: ProxyState | None = None,
+        admitted: asyncio.Event | None = None,
+        **request_params: Any,
+    ) -> ApiResponse:
+        """
+        Отправляет запрос через прокси proxy_state (или выбранный из пула)
+        и учитывает результат в оценке его здоровья.
+        Событие admitted устанавливается, когда запрос прошёл Throttler.
+
+        Запрос записывается в span, а заголовок traceparent продолжает
+        трассу в вызываемом сервисе.
+        """
+        state = proxy_state or self._proxy_pool.acquire()
+        with tracer.span(f"http.{method}", SpanKind.CLIENT) as span:
+            span.set_attribute("http.url", url)
+            inject(request_params.setdefault("headers", {}))
+            async with state:
+                if admitted is not None:
+                    admitted.set()
+                started_at = time.monotonic()
+                try:
+                    async with self._session.request(
+                        method, url, proxy=state.proxy, **request_params
+                    ) as response:
+                        api_response = ApiResponse(
+                            response.status,
+                            response.url,
+                            await response.text(),
+                            response.headers,
+                        )
+                except Exception:
+                    self._proxy_pool.report_failure(state)
+                    raise
+            span.set_attribute("http.status_code", api_response.status)
+
+        if self._latency is not None:
+            self._latency.record(
+                URL(url).host, time.monotonic() - started_at
+            )
+        self._proxy_pool.report(state, api_response.status)
+        return api_response
 
     async def close(self):
         """
@@ -0,0 +1,257 @@
+"""
+Кэш ответов http-сессии.
+
+Часто опрашиваемые ресурсы выгоднее не скачивать заново:
+ответ хранится в LRU в памяти (и, опционально, на диске),
+пока действует Cache-Control max-age.
+Устаревшая запись перепроверяется условным запросом
+(If-None-Match / If-Modified-Since), и на ответ 304
+переиспользуется сохранённый ApiResponse.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+from multidict import CIMultiDict
+from yarl import URL
+
+from app.repository.http_session.const import (
+    DEFAULT_HTTP_CACHE_MAX_ENTRIES,
+    DEFAULT_HTTP_CACHE_VARY_HEADERS,
+)
+from app.utils.serialization import dumps, loads
+
+CacheKey = str
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    """
+    Разбирает заголовок Cache-Control в словарь директив.
+
+    Директивы без значения (no-store, no-cache) отображаются в None.
+    """
+    directives: dict[str, str | None] = {}
+    if not value:
+        return directives
+
+    for part in value.split(","):
+        if not (part := part.strip()):
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+class CacheEntry:
+    """
+    Запись кэша: сохранённый ответ и данные для его перепроверки
+    """
+
+    def __init__(
+        self,
+        response: Any,
+        expires_at: float,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ):
+        self.response = response
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self) -> bool:
+        """Можно ли отдать ответ без обращения к источнику"""
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict[str, str]:
+        """Заголовки условного запроса для перепроверки записи"""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_dict(self) -> dict[str, Any]:
+        """Представление записи для хранения на диске"""
+        return {
+            "status": self.response.status,
+            "url": str(self.response.url),
+            "body": self.response.body,
+            "headers": list(self.response.headers.items()),
+            "expires_at": self.expires_at,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CacheEntry":
+        """Восстанавливает запись, сохранённую на диске"""
+        # pylint: disable=import-outside-toplevel, cyclic-import
+        from app.repository.http_session.base import ApiResponse
+
+        response = ApiResponse(
+            data["status"],
+            URL(data["url"]),
+            data["body"],
+            CIMultiDict(data["headers"]),
+        )
+        return cls(
+            response,
+            data["expires_at"],
+            data["etag"],
+            data["last_modified"],
+        )
+
+
+class ResponseCache:
+    """
+    Кэш ответов на GET запросы.
+
+    Ключ строится по url, параметрам запроса и значениям заголовков
+    из vary_headers. Записи вытесняются по принципу LRU,
+    при заданном cache_dir дополнительно сохраняются на диск
+    и переживают перезапуск процесса.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_HTTP_CACHE_MAX_ENTRIES,
+        cache_dir: str | Path | None = None,
+        vary_headers: Iterable[str] = DEFAULT_HTTP_CACHE_VARY_HEADERS,
+    ):
+        self.max_entries = max_entries
+        self._vary_headers = tuple(header.lower() for header in vary_headers)
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._cache_dir = Path(cache_dir) if cache_dir else None
+        if self._cache_dir is not None:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def make_key(
+        self,
+        url: str,
+        params: None | str | list[tuple[str, str]] = None,
+        headers: Mapping[str, Any] | None = None,
+    ) -> CacheKey:
+        """Строит ключ кэша по url, параметрам и выбранным заголовкам"""
+        lowered = {
+            key.lower(): str(value) for key, value in (headers or {}).items()
+        }
+        key_parts = [
+            str(URL(url).with_fragment(None)),
+            params if isinstance(params, str) else sorted(params or ()),
+            [(name, lowered.get(name)) for name in self._vary_headers],
+        ]
+        return hashlib.sha256(dumps(key_parts)).hexdigest()
+
+    def get(self, key: CacheKey) -> CacheEntry | None:
+        """Возвращает запись (в т.ч. устаревшую) или None"""
+        if (entry := self._entries.get(key)) is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        if (entry := self._load(key)) is not None:
+            self._remember(key, entry)
+        return entry
+
+    def store(self, key: CacheKey, response: Any) -> CacheEntry | None:
+        """
+        Сохраняет ответ, если заголовки ответа это разрешают.
+
+        Ответ без max-age кэшируется только при наличии валидаторов
+        (ETag/Last-Modified): такая запись сразу считается устаревшей
+        и перепроверяется при каждом обращении.
+        """
+        if response.status != 200:
+            return None
+
+        directives = parse_cache_control(
+            response.headers.get("Cache-Control")
+        )
+        if "no-store" in directives:
+            return None
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        max_age = self._max_age(directives)
+        if max_age <= 0 and etag is None and last_modified is None:
+            return None
+
+        entry = CacheEntry(
+            response, time.time() + max_age, etag, last_modified
+        )
+        self._remember(key, entry)
+        self._dump(key, entry)
+        return entry
+
+    def revalidate(
+        self, key: CacheKey, entry: CacheEntry, headers: Mapping[str, str]
+    ) -> CacheEntry:
+        """Продлевает запись после ответа 304 Not Modified"""
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        entry.expires_at = time.time() + self._max_age(directives)
+        entry.etag = headers.get("ETag", entry.etag)
+        entry.last_modified = headers.get(
+            "Last-Modified", entry.last_modified
+        )
+        self._remember(key, entry)
+        self._dump(key, entry)
+        return entry
+
+    def clear(self) -> None:
+        """Очищает кэш в памяти и на диске"""
+        self._entries.clear()
+        if self._cache_dir is not None:
+            for path in self._cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _max_age(directives: dict[str, str | None]) -> int:
+        if "no-cache" in directives:
+            return 0
+        try:
+            return int(directives.get("max-age") or 0)
+        except ValueError:
+            return 0
+
+    def resize(self, max_entries: int) -> None:
+        """Меняет ёмкость кэша, вытесняя лишние записи"""
+        self.max_entries = max_entries
+        self._evict_overflow()
+
+    def _remember(self, key: CacheKey, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict_overflow()
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: CacheKey) -> Path | None:
+        if self._cache_dir is None:
+            return None
+        return self._cache_dir / f"{key}.json"
+
+    def _dump(self, key: CacheKey, entry: CacheEntry) -> None:
+        if (path := self._path(key)) is None:
+            return
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(dumps(entry.to_dict()))
+        tmp_path.replace(path)
+
+    def _load(self, key: CacheKey) -> CacheEntry | None:
+        if (path := self._path(key)) is None or not path.exists():
+            return None
+        try:
+            return CacheEntry.from_dict(loads(path.read_bytes()))
+        except (OSError, ValueError, KeyError):
+            path.unlink(missing_ok=True)
+            return None
@@ -11,3 +11,10 @@ DEFAULT_USER_AGENT = (
     "AppleWebKit/537.36 (KHTML, like Gecko)"
     "Chrome/96.0.4664.45 Safari/537.36"
 )
+DEFAULT_HTTP_CACHE_MAX_ENTRIES = 1024
+DEFAULT_HTTP_CACHE_VARY_HEADERS = ("Accept", "Accept-Language")
+DEFAULT_PROXY_MAX_FAILURES = 3
+DEFAULT_PROXY_QUARANTINE_SECONDS = 30.0
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_MIN_DELAY = 0.05
+DEFAULT_HEDGE_DELAY = 1.0
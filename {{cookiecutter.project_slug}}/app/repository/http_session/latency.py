@@ -0,0 +1,63 @@
+"""
+Учёт задержек ответов по хостам.
+
+Используется для хеджирования запросов: если ответ не пришёл
+за время, в которое обычно укладывается заданный перцентиль
+запросов к хосту, отправляется повторный запрос.
+"""
+
+import math
+from collections import defaultdict, deque
+
+from app.repository.http_session.const import (
+    DEFAULT_HEDGE_DELAY,
+    DEFAULT_HEDGE_MIN_DELAY,
+    DEFAULT_HEDGE_PERCENTILE,
+)
+
+# Размер окна последних замеров по одному хосту
+LATENCY_WINDOW = 256
+# Пока замеров меньше, используется задержка по умолчанию
+MIN_LATENCY_SAMPLES = 20
+
+
+class LatencyTracker:
+    """
+    Скользящее окно задержек ответов для каждого хоста
+    """
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        min_delay: float = DEFAULT_HEDGE_MIN_DELAY,
+        default_delay: float = DEFAULT_HEDGE_DELAY,
+    ):
+        if not 0.0 < percentile < 1.0:
+            raise ValueError("Percentile should be between 0 and 1.")
+
+        self._percentile = percentile
+        self._min_delay = min_delay
+        self._default_delay = default_delay
+        self._samples: defaultdict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=LATENCY_WINDOW)
+        )
+
+    def record(self, host: str | None, latency: float) -> None:
+        """Сохраняет задержку ответа хоста в секундах"""
+        self._samples[host or ""].append(latency)
+
+    def percentile(self, host: str | None) -> float | None:
+        """Возвращает перцентиль задержки хоста или None, если замеров мало"""
+        samples = self._samples.get(host or "")
+        if samples is None or len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+
+        ordered = sorted(samples)
+        index = math.ceil(self._percentile * len(ordered)) - 1
+        return ordered[max(index, 0)]
+
+    def hedge_delay(self, host: str | None) -> float:
+        """Через сколько секунд без ответа стоит отправить повторный запрос"""
+        if (delay := self.percentile(host)) is None:
+            return self._default_delay
+        return max(delay, self._min_delay)
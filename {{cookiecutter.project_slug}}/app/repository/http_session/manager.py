@@ -0,0 +1,26 @@
+"""Http-сессия воркера приложения"""
+from fastapi import Request
+
+from app.config.settings import settings
+from app.repository.http_session.base import ApiSession
+from app.repository.http_session.cache import ResponseCache
+
+
+def create_api_session() -> ApiSession:
+    """
+    Создаёт http-сессию по настройкам приложения.
+
+    Вызывается в lifespan, то есть уже в процессе воркера:
+    сессия aiohttp не должна переживать fork.
+    """
+    cache = (
+        ResponseCache(**settings.http_cache_settings)
+        if settings.http_cache_settings
+        else None
+    )
+    return ApiSession(**settings.session_settings, cache=cache)
+
+
+async def get_api_session(request: Request) -> ApiSession:
+    """FastAPI зависимость: http-сессия воркера"""
+    return request.app.state.api_session
@@ -0,0 +1,197 @@
+"""
+Пул прокси для http-сессии.
+
+Ограничения источников обычно считаются на один IP,
+поэтому у каждого прокси свой Throttler:
+суммарная пропускная способность растёт с числом прокси.
+Прокси, которые раз за разом отвечают ошибками,
+выводятся из ротации на время карантина.
+"""
+
+import time
+from collections.abc import Sequence
+from enum import Enum
+
+from app.repository.http_session.const import (
+    DEFAULT_PROXY_MAX_FAILURES,
+    DEFAULT_PROXY_QUARANTINE_SECONDS,
+    DEFAULT_THROTTLER_PERIOD,
+    DEFAULT_THROTTLER_RATE_LIMIT,
+)
+from app.repository.http_session.throttler import Throttler
+from app.utils.logger.logs_adapter import logger
+
+# Статусы ответа, которые говорят о проблеме с выходным IP
+FAILURE_STATUSES = frozenset({403, 407, 429, 502, 503, 504})
+# Вес последнего результата в скользящей оценке здоровья прокси
+HEALTH_SMOOTHING = 0.2
+MAX_QUARANTINE_MULTIPLIER = 16
+
+
+class ProxyRotation(Enum):
+    """Стратегия выбора прокси"""
+
+    ROUND_ROBIN = "round_robin"
+    LEAST_LOADED = "least_loaded"
+
+
+class ProxyState:
+    """
+    Прокси вместе с его Throttler и статистикой здоровья.
+
+    Используется как асинхронный контекстный менеджер:
+    ожидает своей очереди в Throttler и учитывает запрос как активный.
+    """
+
+    def __init__(self, proxy: str | None, throttler: Throttler):
+        self.proxy = proxy
+        self.throttler = throttler
+        self.in_flight = 0
+        self.failures = 0
+        self.quarantines = 0
+        self.quarantined_until = 0.0
+        self.health = 1.0
+
+    def __repr__(self):
+        return (
+            f"<Proxy {self.proxy}; "
+            f"health: {self.health:.2f}; "
+            f"in flight: {self.in_flight}>"
+        )
+
+    def is_available(self, now: float) -> bool:
+        """Прокси не находится на карантине"""
+        return now >= self.quarantined_until
+
+    async def __aenter__(self):
+        self.in_flight += 1
+        try:
+            await self.throttler.__aenter__()
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.in_flight -= 1
+        await self.throttler.__aexit__(exc_type, exc_val, exc_tb)
+
+
+class ProxyPool:
+    """
+    Ротация запросов по нескольким прокси.
+
+    Пул из одного элемента None соответствует работе без прокси.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        proxies: Sequence[str | None],
+        rate_limit: int = DEFAULT_THROTTLER_RATE_LIMIT,
+        period: int | float = DEFAULT_THROTTLER_PERIOD,
+        rotation: ProxyRotation | str = ProxyRotation.ROUND_ROBIN,
+        max_failures: int = DEFAULT_PROXY_MAX_FAILURES,
+        quarantine_seconds: float = DEFAULT_PROXY_QUARANTINE_SECONDS,
+    ):
+        if not proxies:
+            raise ValueError("Proxy pool should contain at least one proxy.")
+
+        self._states = [
+            ProxyState(proxy, Throttler(rate_limit, period))
+            for proxy in proxies
+        ]
+        self._rotation = ProxyRotation(rotation)
+        self._max_failures = max_failures
+        self._quarantine_seconds = quarantine_seconds
+        self._next_index = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @property
+    def states(self) -> list[ProxyState]:
+        """Состояния всех прокси пула"""
+        return list(self._states)
+
+    def reconfigure(  # pylint: disable=too-many-arguments
+        self,
+        rate_limit: int,
+        period: int | float,
+        rotation: ProxyRotation | str,
+        max_failures: int,
+        quarantine_seconds: float,
+    ) -> None:
+        """Меняет ограничения и ротацию, сохраняя статистику прокси"""
+        for state in self._states:
+            state.throttler.reconfigure(rate_limit, period)
+        self._rotation = ProxyRotation(rotation)
+        self._max_failures = max_failures
+        self._quarantine_seconds = quarantine_seconds
+
+    def acquire(self, exclude: ProxyState | None = None) -> ProxyState:
+        """
+        Выбирает прокси для следующего запроса.
+
+        Прокси exclude выбирается, только если других доступных нет.
+        Если на карантине все прокси, возвращается тот,
+        чей карантин закончится раньше.
+        """
+        now = time.monotonic()
+        candidates = [
+            state for state in self._states if state.is_available(now)
+        ]
+        if not candidates:
+            return min(self._states, key=lambda state: state.quarantined_until)
+        if len(candidates) > 1 and exclude in candidates:
+            candidates.remove(exclude)
+
+        if self._rotation is ProxyRotation.LEAST_LOADED:
+            return min(
+                candidates, key=lambda state: (state.in_flight, -state.health)
+            )
+
+        for _ in range(len(self._states)):
+            state = self._states[self._next_index]
+            self._next_index = (self._next_index + 1) % len(self._states)
+            if state in candidates:
+                return state
+        return candidates[0]
+
+    def report(self, state: ProxyState, status: int) -> None:
+        """Учитывает статус ответа, полученного через прокси"""
+        if status in FAILURE_STATUSES:
+            self.report_failure(state)
+        else:
+            self.report_success(state)
+
+    @staticmethod
+    def report_success(state: ProxyState) -> None:
+        """Учитывает успешный запрос через прокси"""
+        state.failures = 0
+        state.quarantines = 0
+        state.health += HEALTH_SMOOTHING * (1.0 - state.health)
+
+    def report_failure(self, state: ProxyState) -> None:
+        """
+        Учитывает неудачный запрос через прокси.
+
+        После max_failures неудач подряд прокси отправляется на карантин,
+        каждый следующий карантин вдвое длиннее предыдущего.
+        """
+        state.failures += 1
+        state.health -= HEALTH_SMOOTHING * state.health
+        if len(self._states) == 1 or state.failures < self._max_failures:
+            return
+
+        multiplier = min(2**state.quarantines, MAX_QUARANTINE_MULTIPLIER)
+        duration = self._quarantine_seconds * multiplier
+        state.quarantined_until = time.monotonic() + duration
+        state.quarantines += 1
+        # после карантина прокси снова отправится на него с первой неудачей
+        state.failures = self._max_failures - 1
+        logger.warning(
+            "Proxy %s quarantined for %.1f s, health %.2f",
+            state.proxy,
+            duration,
+            state.health,
+        )
@@ -0,0 +1,46 @@
+"""Ограничение частоты запросов http-сессии"""
+
+import asyncio
+import time
+from collections import deque
+
+
+class Throttler:
+    """
+    При обращении к соцсетям важно соблюдать ограничения апи
+    на число запросов в секунду.
+    Для этого реализуем класс-throttler,
+    ограничивающий число единовременных запросов в рамках одной сессии.
+
+    rate_limit/period = число запросов/n секунд
+    """
+
+    def __init__(self, rate_limit: int, period: int | float = 1.0):
+        self._period = float(period)
+        self._times = deque(0.0 for _ in range(rate_limit))
+
+    async def __aenter__(self):
+        while True:
+            curr_ts = time.monotonic()
+            if (diff := curr_ts - (self._times[0] + self._period)) > 0.0:
+                self._times.popleft()
+                break
+            await asyncio.sleep(-diff)
+
+        self._times.append(curr_ts)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def reconfigure(self, rate_limit: int, period: int | float) -> None:
+        """
+        Меняет ограничение на лету.
+
+        Новые слоты свободны сразу, при уменьшении лимита
+        сохраняются отметки самых поздних запросов.
+        """
+        self._period = float(period)
+        while len(self._times) < rate_limit:
+            self._times.appendleft(0.0)
+        while len(self._times) > rate_limit:
+            self._times.popleft()
@@ -0,0 +1,183 @@
+"""
+Пакетная отправка команд Redis.
+
+Каждая одиночная команда стоит сетевого круга до Redis.
+RedisBatcher копит команды и отправляет их одним pipeline,
+когда набирается max_batch_size команд или проходит flush_interval.
+Функции mget_typed/mset_typed читают и пишут типизированные
+значения пачками.
+"""
+
+import asyncio
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import Any, TypeVar
+
+from redis.asyncio import Redis
+from pydantic import BaseModel
+
+from app.config.settings import settings
+from app.utils import serialization
+
+_MT = TypeVar("_MT", bound=BaseModel)
+
+
+def dump_value(value: Any) -> bytes | str:
+    """Сериализует значение для записи в Redis"""
+    if isinstance(value, BaseModel):
+        return value.json()
+    return serialization.dumps(value)
+
+
+def load_value(raw: str | bytes | None, model: type[_MT] | None = None) -> Any:
+    """Десериализует значение из Redis, при заданной модели - в неё"""
+    if raw is None:
+        return None
+    if model is not None:
+        return model.parse_raw(raw)
+    return serialization.loads(raw)
+
+
+class RedisBatcher:
+    """
+    Копит команды и отправляет их пачками через pipeline.
+
+    Каждый вызов execute возвращает результат своей команды,
+    ошибка команды поднимается только у её вызывающего.
+    При transaction=True пачка выполняется атомарно (MULTI/EXEC).
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        max_batch_size: int | None = None,
+        flush_interval: float | None = None,
+        transaction: bool = False,
+    ):
+        self._redis = redis
+        self._max_batch_size = max_batch_size or settings.redis_batch_size
+        self._flush_interval = (
+            settings.redis_batch_interval
+            if flush_interval is None
+            else flush_interval
+        )
+        self._transaction = transaction
+        self._pending: list[tuple[tuple[Any, ...], asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def execute(self, *command: Any) -> Any:
+        """Ставит команду в очередь и дожидается её результата"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((command, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._schedule_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self._flush_interval, self._schedule_flush
+            )
+        return await future
+
+    async def get(self, key: str) -> Any:
+        """GET через пакетную отправку"""
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> Any:
+        """SET (с TTL в секундах) через пакетную отправку"""
+        if ttl is None:
+            return await self.execute("SET", key, value)
+        return await self.execute("SET", key, value, "EX", ttl)
+
+    async def flush(self) -> None:
+        """Отправляет накопленные команды, не дожидаясь таймера"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        pipe = self._redis.pipeline(transaction=self._transaction)
+        for command, _ in batch:
+            pipe.execute_command(*command)
+        try:
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as exc:  # pylint: disable=broad-except
+            results = [exc] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Отправляет оставшиеся команды и дожидается идущих отправок"""
+        await self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _schedule_flush(self) -> None:
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+
+def _chunks(items: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def mget_typed(
+    redis: Redis,
+    keys: Sequence[str],
+    model: type[_MT] | None = None,
+    chunk_size: int | None = None,
+) -> list[Any]:
+    """
+    Читает значения по ключам пачками MGET.
+
+    Отсутствующие ключи возвращаются как None.
+    """
+    values: list[Any] = []
+    for chunk in _chunks(keys, chunk_size or settings.redis_batch_size):
+        raw_values = await redis.mget(*chunk)
+        values.extend(load_value(raw, model) for raw in raw_values)
+    return values
+
+
+async def mset_typed(
+    redis: Redis,
+    mapping: Mapping[str, Any],
+    ttl: int | None = None,
+    transaction: bool = False,
+    chunk_size: int | None = None,
+    dumps: Callable[[Any], bytes | str] = dump_value,
+) -> None:
+    """
+    Записывает значения пачками через pipeline.
+
+    MSET не умеет TTL, поэтому при заданном ttl
+    каждая пачка отправляется набором SET ... EX в одном pipeline.
+    """
+    items = list(mapping.items())
+    for chunk in _chunks(items, chunk_size or settings.redis_batch_size):
+        pipe = redis.pipeline(transaction=transaction)
+        if ttl is None:
+            pipe.mset({key: dumps(value) for key, value in chunk})
+        else:
+            for key, value in chunk:
+                pipe.set(key, dumps(value), ex=ttl)
+        await pipe.execute()
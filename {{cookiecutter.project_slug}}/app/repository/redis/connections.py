@@ -1,8 +1,134 @@
 """Redis"""
 
 import asyncio
+from typing import Any
 
-import aioredis
-from aioredis import Redis, RedisError
+from redis.asyncio import ConnectionPool, Redis, RedisError
 
 from app.config.settings import settings
+from app.utils.lazy import LazyProxy
+from app.utils.logger.logs_adapter import logger
+from app.utils.tracing import SpanKind, tracer
+
+
+class TracedRedis(Redis):
+    """
+    Клиент Redis, записывающий каждую команду в span redis.<команда>.
+
+    Команды конвейеров (pipeline) выполняются другим классом
+    и в трассу не попадают.
+    """
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        with tracer.span(f"redis.{args[0]}", SpanKind.CLIENT):
+            return await super().execute_command(*args, **options)
+
+
+class RedisManager:
+    """
+    Единый на процесс пул соединений с Redis.
+
+    Пул создаётся при старте приложения и закрывается при остановке,
+    поэтому запросы не открывают собственных соединений.
+    Фоновая проверка здоровья пингует Redis и при сбое
+    сбрасывает соединения пула, чтобы они переоткрылись.
+    """
+
+    def __init__(self, redis_settings: dict[str, Any]):
+        self._settings = dict(redis_settings)
+        self._startup_attempts = self._settings.pop("startup_attempts", 5)
+        self._health_check_interval = self._settings.get(
+            "health_check_interval", 30
+        )
+        self._pool: ConnectionPool | None = None
+        self._client: Redis | None = None
+        self._health_task: asyncio.Task | None = None
+
+    @property
+    def client(self) -> Redis:
+        """Клиент Redis, работающий через общий пул"""
+        if self._client is None:
+            raise RuntimeError("Redis manager has not been started.")
+        return self._client
+
+    @property
+    def started(self) -> bool:
+        """Показывает, создан ли пул соединений"""
+        return self._client is not None
+
+    async def startup(self) -> None:
+        """
+        Создаёт пул и проверяет доступность Redis.
+
+        Попытки подключения повторяются с нарастающей задержкой.
+        """
+        if self.started:
+            return
+
+        settings_ = dict(self._settings)
+        self._pool = ConnectionPool.from_url(
+            settings_.pop("url"), **settings_
+        )
+        self._client = TracedRedis(connection_pool=self._pool)
+
+        for attempt in range(1, self._startup_attempts + 1):
+            try:
+                await self._client.ping()
+                break
+            except (RedisError, OSError) as exc:
+                if attempt == self._startup_attempts:
+                    await self.shutdown()
+                    raise
+                logger.warning(
+                    "Redis is unavailable (attempt %s): %s", attempt, exc
+                )
+                await asyncio.sleep(min(2**attempt * 0.1, 5.0))
+
+        if self._health_check_interval:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def shutdown(self) -> None:
+        """Останавливает проверку здоровья и закрывает соединения пула"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+        if self._client is not None:
+            await self._client.aclose()
+        if self._pool is not None:
+            await self._pool.disconnect()
+        self._client = None
+        self._pool = None
+
+    async def health_check(self) -> bool:
+        """Проверяет доступность Redis"""
+        try:
+            return bool(await self.client.ping())
+        except (RedisError, OSError, asyncio.TimeoutError):
+            return False
+
+    async def reconnect(self) -> None:
+        """Сбрасывает свободные соединения пула, они откроются заново"""
+        if self._pool is not None:
+            await self._pool.disconnect(inuse_connections=False)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            if not await self.health_check():
+                logger.warning("Redis health check failed, reconnecting")
+                await self.reconnect()
+
+
+redis_manager: RedisManager = LazyProxy(  # type: ignore
+    lambda: RedisManager(settings.redis_settings)
+)
+
+
+async def get_redis() -> Redis:
+    """FastAPI зависимость: клиент Redis из общего пула"""
+    return redis_manager.client
@@ -0,0 +1,241 @@
+"""
+Шина инвалидации кэшей в памяти процессов.
+
+Кэш в памяти одной реплики устаревает, когда запись
+делает другая. Шина рассылает события инвалидации через Redis pub/sub,
+и каждая реплика удаляет записи из своих зарегистрированных кэшей.
+Благодаря этому локальные кэши могут жить с долгими TTL.
+
+Записи уровня Redis общие для всех реплик, поэтому их не удаляют,
+а делают недостижимыми: у пространства имён есть счётчик поколений
+в Redis, он входит в ключи записей и увеличивается при каждой
+инвалидации. Старые записи доживают свой TTL, но не читаются.
+"""
+import asyncio
+import uuid
+from collections import defaultdict
+from collections.abc import Hashable
+from typing import Protocol
+
+from redis.asyncio import RedisError
+
+from app.repository.redis.connections import redis_manager
+from app.utils.logger.logs_adapter import logger
+from app.utils.serialization import dumps, loads
+
+INVALIDATION_CHANNEL = "cache-invalidation"
+GENERATION_KEY_PREFIX = "cache-generation"
+RECONNECT_DELAY = 1.0
+
+
+class LocalCache(Protocol):
+    """Кэш в памяти процесса, поддерживающий инвалидацию"""
+
+    def evict(self, key: Hashable) -> None:
+        ...
+
+    def evict_prefix(self, prefix: str) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class LocalCacheRegistry:
+    """
+    Кэши процесса, сгруппированные по пространствам имён.
+
+    Пространство имён обычно совпадает с таблицей,
+    на данных которой построен кэш.
+    """
+
+    def __init__(self):
+        self._caches: defaultdict[str, list[LocalCache]] = defaultdict(list)
+        self._generations: dict[str, int] = {}
+
+    def register(self, namespace: str, cache: LocalCache) -> LocalCache:
+        """Подписывает кэш на инвалидацию пространства имён"""
+        self._caches[namespace].append(cache)
+        return cache
+
+    def evict(
+        self,
+        namespace: str,
+        key: Hashable | None = None,
+        prefix: str | None = None,
+    ) -> None:
+        """
+        Удаляет запись по ключу, записи по префиксу ключа
+        или, если не задано ни то ни другое, все записи пространства имён
+        """
+        for cache in self._caches.get(namespace, ()):
+            if key is not None:
+                cache.evict(key)
+            elif prefix is not None:
+                cache.evict_prefix(prefix)
+            else:
+                cache.clear()
+
+    def generation(self, namespace: str) -> int | None:
+        """Известное процессу поколение пространства имён"""
+        return self._generations.get(namespace)
+
+    def set_generation(self, namespace: str, generation: int) -> None:
+        """Запоминает поколение; события могут прийти не по порядку"""
+        self._generations[namespace] = max(
+            generation, self._generations.get(namespace, generation)
+        )
+
+    def forget_generation(self, namespace: str) -> None:
+        """Забывает поколение: оно будет заново прочитано из Redis"""
+        self._generations.pop(namespace, None)
+
+    def clear_all(self) -> None:
+        """
+        Очищает все зарегистрированные кэши и забывает поколения:
+        они будут заново прочитаны из Redis
+        """
+        for namespace in self._caches:
+            self.evict(namespace)
+        self._generations.clear()
+
+
+local_caches = LocalCacheRegistry()
+
+
+class InvalidationBus:
+    """
+    Рассылка событий инвалидации между репликами.
+
+    Событие сразу применяется к кэшам своего процесса,
+    остальные реплики применяют его при получении из канала.
+    """
+
+    def __init__(
+        self,
+        registry: LocalCacheRegistry,
+        channel: str = INVALIDATION_CHANNEL,
+    ):
+        self._registry = registry
+        self._channel = channel
+        self._origin = uuid.uuid4().hex
+        self._listener: asyncio.Task | None = None
+
+    async def generation(self, namespace: str) -> int | None:
+        """
+        Текущее поколение пространства имён для ключей уровня Redis.
+
+        Берётся из памяти, а при первом обращении читается из Redis.
+        None - Redis недоступен, уровнем Redis пользоваться нельзя.
+        """
+        if (generation := self._registry.generation(namespace)) is not None:
+            return generation
+        if not redis_manager.started:
+            return None
+        try:
+            raw = await redis_manager.client.get(_generation_key(namespace))
+        except RedisError as exc:
+            logger.warning("Cache generation read failed: %s", exc)
+            return None
+        self._registry.set_generation(namespace, int(raw or 0))
+        return self._registry.generation(namespace)
+
+    async def publish(
+        self,
+        namespace: str,
+        key: str | None = None,
+        prefix: str | None = None,
+    ) -> None:
+        """
+        Инвалидирует кэши пространства имён во всех репликах.
+
+        Поколение увеличивается при любой инвалидации, поэтому уровень
+        Redis сбрасывается для всего пространства имён.
+        """
+        self._registry.evict(namespace, key, prefix)
+        if not redis_manager.started:
+            return
+
+        try:
+            generation = await redis_manager.client.incr(
+                _generation_key(namespace)
+            )
+        except RedisError as exc:
+            logger.warning("Cache generation update failed: %s", exc)
+            generation = None
+        else:
+            self._registry.set_generation(namespace, int(generation))
+        message = dumps(
+            {
+                "origin": self._origin,
+                "namespace": namespace,
+                "key": key,
+                "prefix": prefix,
+                "generation": generation,
+            }
+        )
+        try:
+            await redis_manager.client.publish(self._channel, message)
+        except RedisError as exc:
+            logger.warning("Cache invalidation publish failed: %s", exc)
+
+    async def start(self) -> None:
+        """Начинает слушать события других реплик"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Прекращает слушать события"""
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    def _apply(self, raw: bytes | str) -> None:
+        try:
+            event = loads(raw)
+            if event.get("origin") == self._origin:
+                return
+            namespace = event["namespace"]
+            generation = event.get("generation")
+            self._registry.evict(
+                namespace, event.get("key"), event.get("prefix")
+            )
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logger.warning("Malformed cache invalidation event: %s", raw)
+            return
+        if generation is None:
+            # поколение не обновлено: перечитаем его из Redis
+            self._registry.forget_generation(namespace)
+        elif isinstance(generation, int):
+            self._registry.set_generation(namespace, generation)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = redis_manager.client.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self._apply(message["data"])
+            except (RedisError, OSError) as exc:
+                # пока подписки нет, события теряются: сбросим всё
+                logger.warning("Cache invalidation listener failed: %s", exc)
+                await asyncio.sleep(RECONNECT_DELAY)
+                self._registry.clear_all()
+            finally:
+                await pubsub.aclose()
+
+
+def _generation_key(namespace: str) -> str:
+    return f"{GENERATION_KEY_PREFIX}:{namespace}"
+
+
+invalidation_bus = InvalidationBus(local_caches)
@@ -0,0 +1,165 @@
+"""
+Распределённая блокировка лидера на Redis.
+
+Лидер держит аренду (lease) с ограниченным временем жизни
+и продлевает её в фоне. Если лидер умер, аренда истекает,
+и её забирает один из резервных процессов.
+Каждый новый захват получает монотонно растущий fencing-токен:
+по нему хранилища могут отклонять запоздавшие записи старого лидера.
+"""
+import asyncio
+import time
+import uuid
+
+from redis.asyncio import Redis, RedisError
+
+from app.repository.redis.connections import redis_manager
+from app.utils.logger.logs_adapter import logger
+
+LOCK_KEY_PREFIX = "leader"
+
+# Захват аренды и выдача следующего fencing-токена одной операцией
+ACQUIRE_SCRIPT = """
+if redis.call("SET", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    return redis.call("INCR", KEYS[2])
+end
+return false
+"""
+# Продление аренды только её владельцем
+RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+# Освобождение аренды только её владельцем
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLock:
+    """
+    Аренда лидерства с фоновым продлением.
+
+    Лидерство считается потерянным, если продлить аренду
+    не удалось до истечения её срока.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float = 15.0,
+        redis: Redis | None = None,
+    ):
+        self.name = name
+        self._key = f"{LOCK_KEY_PREFIX}:{name}"
+        self._ttl = ttl
+        self._redis = redis
+        self._token = uuid.uuid4().hex
+        self._fencing_token: int | None = None
+        self._valid_until = 0.0
+        self._renew_task: asyncio.Task | None = None
+
+    @property
+    def redis(self) -> Redis:
+        """Клиент Redis; по умолчанию - из общего пула"""
+        return self._redis or redis_manager.client
+
+    @property
+    def key(self) -> str:
+        """Ключ аренды в Redis"""
+        return self._key
+
+    @property
+    def retry_interval(self) -> float:
+        """Как часто резервному процессу пытаться захватить аренду"""
+        return self._ttl / 3
+
+    @property
+    def is_leader(self) -> bool:
+        """Процесс держит неистёкшую аренду"""
+        return (
+            self._fencing_token is not None
+            and time.monotonic() < self._valid_until
+        )
+
+    @property
+    def fencing_token(self) -> int | None:
+        """Номер текущего захвата аренды, если процесс - лидер"""
+        return self._fencing_token if self.is_leader else None
+
+    async def ensure(self) -> bool:
+        """Подтверждает лидерство, при необходимости пытаясь его захватить"""
+        if self.is_leader:
+            return True
+
+        started_at = time.monotonic()
+        try:
+            fencing_token = await self.redis.eval(
+                ACQUIRE_SCRIPT,
+                2,
+                self._key,
+                f"{self._key}:fencing",
+                self._token,
+                int(self._ttl * 1000),
+            )
+        except RedisError as exc:
+            logger.warning("Leader lock %s acquire failed: %s", self.name, exc)
+            return False
+        if not fencing_token:
+            return False
+
+        self._fencing_token = int(fencing_token)
+        self._valid_until = started_at + self._ttl
+        logger.info(
+            "Leader lock %s acquired, fencing token %s",
+            self.name,
+            self._fencing_token,
+        )
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = asyncio.create_task(self._renew_loop())
+        return True
+
+    async def release(self) -> None:
+        """Останавливает продление и освобождает аренду"""
+        if self._renew_task is not None:
+            self._renew_task.cancel()
+            try:
+                await self._renew_task
+            except asyncio.CancelledError:
+                pass
+            self._renew_task = None
+
+        if self._fencing_token is None:
+            return
+        self._fencing_token = None
+        try:
+            await self.redis.eval(RELEASE_SCRIPT, 1, self._key, self._token)
+        except RedisError as exc:
+            logger.warning("Leader lock %s release failed: %s", self.name, exc)
+
+    async def _renew(self) -> bool:
+        started_at = time.monotonic()
+        try:
+            renewed = await self.redis.eval(
+                RENEW_SCRIPT, 1, self._key, self._token, int(self._ttl * 1000)
+            )
+        except RedisError as exc:
+            logger.warning("Leader lock %s renew failed: %s", self.name, exc)
+            return self.is_leader
+        if not renewed:
+            return False
+        self._valid_until = started_at + self._ttl
+        return True
+
+    async def _renew_loop(self) -> None:
+        while self._fencing_token is not None:
+            await asyncio.sleep(self._ttl / 3)
+            if not await self._renew():
+                logger.warning("Leader lock %s lost", self.name)
+                self._fencing_token = None
+                return
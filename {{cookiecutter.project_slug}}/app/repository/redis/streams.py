@@ -0,0 +1,320 @@
+"""
+Очередь задач на Redis Streams.
+
+Потребители объединены в группу: каждое сообщение получает
+один из воркеров, поэтому обработка масштабируется запуском
+новых контейнеров. Сообщения, зависшие без подтверждения
+у упавшего воркера, забираются другими, а после max_deliveries
+попыток уходят в поток недоставленных (dead-letter).
+"""
+import asyncio
+import os
+import socket
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, TypeVar
+
+from redis.asyncio import Redis, RedisError, ResponseError
+
+from app.config.settings import settings
+from app.utils.logger.context import CONTEXT
+from app.utils.logger.logs_adapter import logger
+from app.utils.serialization import dumps_str, loads
+
+_T = TypeVar("_T")
+
+MessageHandler = Callable[[str, dict[str, str]], Awaitable[None]]
+
+DEAD_LETTER_SUFFIX = ":dead"
+# Ошибки соединения с Redis, после которых потребитель повторяет попытку
+REDIS_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+MAX_RETRY_DELAY = 5.0
+# Поле сообщения с CONTEXT отправителя
+CONTEXT_FIELD = "_context"
+
+
+def default_consumer_name() -> str:
+    """Имя потребителя, уникальное для процесса"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _default(value: _T | None, default: _T) -> _T:
+    return default if value is None else value
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+async def publish(
+    redis: Redis,
+    stream: str,
+    fields: Mapping[str, Any],
+    maxlen: int | None = None,
+) -> str:
+    """
+    Добавляет сообщение в поток.
+
+    maxlen приблизительно ограничивает длину потока,
+    чтобы медленные потребители не съели память Redis
+    (по умолчанию - settings.stream_maxlen).
+    Текущий CONTEXT передаётся вместе с сообщением,
+    и потребитель обрабатывает его в том же контексте.
+    """
+    if maxlen is None:
+        maxlen = settings.stream_maxlen
+    message = {key: str(value) for key, value in fields.items()}
+    if context := CONTEXT.snapshot():
+        message[CONTEXT_FIELD] = dumps_str(context.to_dict())
+    message_id = await redis.xadd(
+        stream,
+        message,
+        maxlen=maxlen,
+        approximate=True,
+    )
+    return _decode(message_id)
+
+
+class StreamConsumer:  # pylint: disable=too-many-instance-attributes
+    """
+    Потребитель группы Redis Streams.
+
+    Одновременно обрабатывается не больше concurrency сообщений:
+    новые читаются только при наличии свободных слотов,
+    так что медленная обработка сдерживает чтение (backpressure).
+    Подтверждения (XACK) отправляются пачками.
+    Незаданные параметры берутся из настроек stream_*.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        redis: Redis,
+        stream: str,
+        group: str,
+        handler: MessageHandler,
+        consumer: str | None = None,
+        concurrency: int | None = None,
+        batch_size: int | None = None,
+        block_ms: int | None = None,
+        claim_idle_ms: int | None = None,
+        max_deliveries: int | None = None,
+        ack_batch_size: int | None = None,
+        ack_interval: float | None = None,
+    ):
+        self._redis = redis
+        self._stream = stream
+        self._group = group
+        self._handler = handler
+        self._consumer = consumer or default_consumer_name()
+        self._concurrency = _default(concurrency, settings.stream_concurrency)
+        self._slots = asyncio.Semaphore(self._concurrency)
+        self._batch_size = _default(batch_size, settings.stream_batch_size)
+        self._block_ms = _default(block_ms, settings.stream_block_ms)
+        self._claim_idle_ms = _default(
+            claim_idle_ms, settings.stream_claim_idle_ms
+        )
+        self._max_deliveries = _default(
+            max_deliveries, settings.stream_max_deliveries
+        )
+        self._ack_batch_size = _default(
+            ack_batch_size, settings.stream_ack_batch_size
+        )
+        self._ack_interval = _default(
+            ack_interval, settings.stream_ack_interval
+        )
+        self._to_ack: list[str] = []
+        self._last_ack = time.monotonic()
+        self._tasks: set[asyncio.Task] = set()
+        # сообщения, которые обрабатываются или ждут подтверждения
+        self._in_flight: set[str] = set()
+        self._group_ready = False
+        self._next_claim = 0.0
+        self._stopping = asyncio.Event()
+
+    @property
+    def dead_letter_stream(self) -> str:
+        """Поток для сообщений, исчерпавших попытки обработки"""
+        return f"{self._stream}{DEAD_LETTER_SUFFIX}"
+
+    async def ensure_group(self) -> None:
+        """Создаёт группу потребителей (и поток), если их ещё нет"""
+        try:
+            await self._redis.xgroup_create(
+                self._stream, self._group, id="0", mkstream=True
+            )
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def stop(self) -> None:
+        """Просит потребителя остановиться после текущего чтения"""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        """
+        Читает и обрабатывает сообщения до вызова stop.
+
+        Перед остановкой дожидается обработки прочитанных сообщений
+        и подтверждает их. При ошибках Redis повторяет попытки
+        с нарастающей задержкой.
+        """
+        failures = 0
+        try:
+            while not self._stopping.is_set():
+                try:
+                    await self._consume()
+                except REDIS_ERRORS as exc:
+                    failures += 1
+                    delay = min(2**failures * 0.1, MAX_RETRY_DELAY)
+                    logger.warning(
+                        "Stream %s is unavailable, retry in %.1f s: %s",
+                        self._stream,
+                        delay,
+                        exc,
+                    )
+                    await asyncio.sleep(delay)
+                else:
+                    failures = 0
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            try:
+                await self._flush_acks(force=True)
+            except REDIS_ERRORS as exc:
+                # сообщения останутся в pending и будут обработаны повторно
+                logger.error(
+                    "Stream %s messages are not acknowledged: %s",
+                    self._stream,
+                    exc,
+                )
+
+    async def _consume(self) -> None:
+        """Один цикл: забрать зависшие, прочитать новые, подтвердить"""
+        if not self._group_ready:
+            await self.ensure_group()
+            self._group_ready = True
+        if time.monotonic() >= self._next_claim:
+            await self._claim_stale()
+            self._next_claim = time.monotonic() + self._claim_idle_ms / 1000
+
+        free_slots = await self._wait_for_slots()
+        response = await self._redis.xreadgroup(
+            self._group,
+            self._consumer,
+            {self._stream: ">"},
+            count=min(free_slots, self._batch_size),
+            block=self._block_ms,
+        )
+        for _, messages in response or ():
+            for message_id, fields in messages:
+                await self._dispatch(message_id, fields)
+        await self._flush_acks()
+
+    async def _wait_for_slots(self) -> int:
+        """Ждёт хотя бы одного свободного слота обработки"""
+        await self._slots.acquire()
+        self._slots.release()
+        return max(self._concurrency - len(self._tasks), 1)
+
+    async def _dispatch(self, message_id: bytes | str, fields: dict) -> None:
+        await self._slots.acquire()
+        message_id = _decode(message_id)
+        self._in_flight.add(message_id)
+        decoded = {_decode(key): _decode(val) for key, val in fields.items()}
+        task = asyncio.create_task(self._process(message_id, decoded))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, message_id: str, fields: dict[str, str]):
+        context = fields.pop(CONTEXT_FIELD, None)
+        try:
+            with CONTEXT.restore(loads(context) if context else {}):
+                await self._handler(message_id, fields)
+        except Exception as exc:  # pylint: disable=broad-except
+            # сообщение останется в pending и будет обработано повторно
+            logger.error(
+                "Stream message %s processing failed: %s", message_id, exc
+            )
+        else:
+            self._to_ack.append(message_id)
+        finally:
+            if message_id not in self._to_ack:
+                # необработанное сообщение снова можно забрать из pending
+                self._in_flight.discard(message_id)
+            self._slots.release()
+
+    async def _flush_acks(self, force: bool = False) -> None:
+        if not self._to_ack:
+            return
+        if (
+            not force
+            and len(self._to_ack) < self._ack_batch_size
+            and time.monotonic() - self._last_ack < self._ack_interval
+        ):
+            return
+
+        message_ids, self._to_ack = self._to_ack, []
+        try:
+            await self._redis.xack(self._stream, self._group, *message_ids)
+        except REDIS_ERRORS:
+            # подтверждения уйдут со следующей пачкой
+            self._to_ack = message_ids + self._to_ack
+            raise
+        self._in_flight.difference_update(message_ids)
+        self._last_ack = time.monotonic()
+
+    async def _claim_stale(self) -> None:
+        """
+        Забирает сообщения, которые слишком долго остаются
+        без подтверждения; исчерпавшие попытки - в dead-letter.
+
+        Сообщения, которые этот потребитель ещё обрабатывает
+        или не успел подтвердить, не забираются.
+        """
+        pending = [
+            entry
+            for entry in await self._redis.xpending_range(
+                self._stream,
+                self._group,
+                min="-",
+                max="+",
+                count=self._batch_size,
+            )
+            if entry["time_since_delivered"] >= self._claim_idle_ms
+            and _decode(entry["message_id"]) not in self._in_flight
+        ]
+        if not pending:
+            return
+
+        claimed = await self._redis.xclaim(
+            self._stream,
+            self._group,
+            self._consumer,
+            self._claim_idle_ms,
+            [entry["message_id"] for entry in pending],
+        )
+        deliveries = {
+            _decode(entry["message_id"]): entry["times_delivered"]
+            for entry in pending
+        }
+        for message_id, fields in claimed:
+            if fields is None:
+                continue
+            if deliveries.get(_decode(message_id), 0) >= self._max_deliveries:
+                await self._dead_letter(_decode(message_id), fields)
+            else:
+                await self._dispatch(message_id, fields)
+
+    async def _dead_letter(self, message_id: str, fields: dict) -> None:
+        logger.error(
+            "Stream message %s moved to %s",
+            message_id,
+            self.dead_letter_stream,
+        )
+        await self._redis.xadd(
+            self.dead_letter_stream,
+            {**fields, "original_id": message_id},
+            maxlen=settings.stream_maxlen,
+            approximate=True,
+        )
+        await self._redis.xack(self._stream, self._group, message_id)
@@ -0,0 +1,40 @@
+"""Сервис приёма результатов воркеров из Redis Streams"""
+import asyncio
+import signal
+
+from app.config.settings import CommonSettings
+from app.repository.redis.connections import redis_manager
+from app.repository.redis.streams import StreamConsumer
+from app.utils.logger.logs_adapter import logger
+
+
+async def handle_result(message_id: str, fields: dict[str, str]) -> None:
+    """
+    Обрабатывает один результат воркера.
+
+    Исключение оставляет сообщение неподтверждённым: оно будет
+    обработано повторно, а после исчерпания попыток уйдёт в dead-letter.
+    """
+    logger.debug("Result %s received: %s", message_id, fields)
+
+
+async def receive_results(ctx_settings: CommonSettings) -> None:
+    """
+    Читает поток результатов до получения SIGINT/SIGTERM,
+    после чего дообрабатывает прочитанные сообщения и завершается
+    """
+    await redis_manager.startup()
+    consumer = StreamConsumer(
+        redis_manager.client,
+        ctx_settings.results_stream,
+        ctx_settings.results_group,
+        handle_result,
+    )
+    loop = asyncio.get_running_loop()
+    for signal_ in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_, consumer.stop)
+
+    try:
+        await consumer.run()
+    finally:
+        await redis_manager.shutdown()
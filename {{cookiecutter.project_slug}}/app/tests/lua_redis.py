@@ -0,0 +1,112 @@
+"""
+Redis в памяти, выполняющий Lua скрипты приложения.
+
+Скрипты выполняются настоящим интерпретатором Lua (lupa),
+а redis.call поддерживает только команды, которые в них используются.
+Часы Redis сдвигаются методом advance, чтобы проверять
+истечение ключей без ожидания.
+"""
+import time
+
+import pytest
+
+lupa = pytest.importorskip("lupa")
+
+
+class LuaRedis:
+    """Redis, хранящий строки и хэши в словаре"""
+
+    def __init__(self):
+        self.data: dict[str, str | dict[str, str]] = {}
+        self._expires_at: dict[str, float] = {}
+        self._offset = 0.0
+        self._lua = lupa.LuaRuntime()
+        self._lua.globals().redis = self._lua.table_from({"call": self.call})
+
+    def time(self) -> float:
+        """Время по часам Redis"""
+        return time.time() + self._offset
+
+    def advance(self, seconds: float) -> None:
+        """Сдвигает часы Redis вперёд"""
+        self._offset += seconds
+
+    def ttl(self, key: str) -> float | None:
+        """Сколько секунд осталось жить ключу; None - без срока"""
+        if key not in self._expires_at:
+            return None
+        return self._expires_at[key] - self.time()
+
+    def _get(self, key: str):
+        if key in self._expires_at and self._expires_at[key] <= self.time():
+            self.data.pop(key, None)
+            self._expires_at.pop(key)
+        return self.data.get(key)
+
+    def _set(self, key, value, *options):
+        options = [str(option).upper() for option in options]
+        if "NX" in options and self._get(key) is not None:
+            return None
+        self.data[key] = str(value)
+        self._expires_at.pop(key, None)
+        if "PX" in options:
+            milliseconds = int(options[options.index("PX") + 1])
+            self._expires_at[key] = self.time() + milliseconds / 1000
+        return self._lua.table_from({"ok": "OK"})
+
+    # pylint: disable-next=too-many-return-statements
+    def call(self, command, *args):
+        """redis.call внутри скриптов"""
+        command = command.upper()
+        if command == "TIME":
+            seconds, fraction = divmod(self.time(), 1)
+            return self._lua.table_from(
+                [str(int(seconds)), str(int(fraction * 1_000_000))]
+            )
+        if command == "SET":
+            return self._set(*args)
+        if command == "GET":
+            return self._get(args[0])
+        if command == "DEL":
+            existed = self._get(args[0]) is not None
+            self.data.pop(args[0], None)
+            self._expires_at.pop(args[0], None)
+            return int(existed)
+        if command == "INCR":
+            value = int(self._get(args[0]) or 0) + 1
+            self.data[args[0]] = str(value)
+            return value
+        if command == "PEXPIRE":
+            if self._get(args[0]) is None:
+                return 0
+            self._expires_at[args[0]] = self.time() + int(args[1]) / 1000
+            return 1
+        if command == "HMGET":
+            bucket = self._get(args[0]) or {}
+            return self._lua.table_from(
+                [bucket.get(field, False) for field in args[1:]]
+            )
+        if command == "HSET":
+            bucket = self.data.setdefault(args[0], {})
+            for field, value in zip(args[1::2], args[2::2]):
+                bucket[field] = str(value)
+            return len(args[1:]) // 2
+        raise NotImplementedError(command)
+
+    async def eval(self, script, numkeys, *args):
+        lua_globals = self._lua.globals()
+        lua_globals.KEYS = self._lua.table_from(map(str, args[:numkeys]))
+        lua_globals.ARGV = self._lua.table_from(map(str, args[numkeys:]))
+        return self._to_python(self._lua.execute(script))
+
+    def _to_python(self, value):
+        """Преобразует ответ скрипта так же, как Redis"""
+        if value is None or value is False:
+            return None
+        if value is True:
+            return 1
+        if isinstance(value, (int, float)):
+            return int(value)
+        if isinstance(value, str):
+            return value
+        return [self._to_python(item) for item in value.values()]
@@ -0,0 +1,102 @@
+"""Тестирование хеджирования GET запросов http-сессии"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from aiohttp import ClientConnectionError
+
+from app.repository.http_session.base import ApiSession
+from app.repository.http_session.throttler import Throttler
+
+PROXIES = ["http://first:3128", "http://second:3128"]
+
+
+class FakeResponse:
+    """Ответ, в теле которого - прокси, через который он получен"""
+
+    status = 200
+
+    def __init__(self, url, proxy):
+        self.url = url
+        self.headers = {}
+        self._proxy = proxy
+
+    async def text(self):
+        return self._proxy
+
+
+class FakeClientSession:
+    """Сессия aiohttp, отвечающая через каждый прокси со своей задержкой"""
+
+    def __init__(self, delays=None, broken=()):
+        self.delays = delays or {}
+        self.broken = broken
+        self.proxies = []
+
+    @asynccontextmanager
+    async def request(self, method, url, proxy=None, **kwargs):
+        self.proxies.append(proxy)
+        if proxy in self.broken:
+            raise ClientConnectionError(proxy)
+        await asyncio.sleep(self.delays.get(proxy, 0))
+        yield FakeResponse(url, proxy)
+
+    async def close(self):
+        pass
+
+
+def create_session(client_session, proxies=PROXIES, hedge_delay=0.05):
+    session = ApiSession(
+        None,
+        "test",
+        100,
+        1,
+        proxy_pool=proxies,
+        proxy_max_failures=100,
+        hedge_requests=True,
+        hedge_default_delay=hedge_delay,
+        hedge_min_delay=0.0,
+    )
+    session._session = client_session  # pylint: disable=protected-access
+    return session
+
+
+async def test_slow_request_is_hedged():
+    """Медленный запрос дублируется через другой прокси"""
+    client_session = FakeClientSession({PROXIES[0]: 1.0})
+    async with create_session(client_session) as session:
+        response = await session.get("https://test.ru")
+
+    assert response.text() == PROXIES[1]
+    assert client_session.proxies == PROXIES
+
+
+async def test_hedge_without_proxy_pool():
+    """Без пула прокси медленный запрос дублируется через то же соединение"""
+    client_session = FakeClientSession({None: 0.1})
+    async with create_session(client_session, None) as session:
+        response = await session.get("https://test.ru")
+
+    assert response.status == 200
+    assert client_session.proxies == [None, None]
+
+
+async def test_hedge_delay_starts_after_throttler():
+    """Ожидание в Throttler не считается медленным ответом"""
+    client_session = FakeClientSession({PROXIES[0]: 0.01})
+    async with create_session(client_session) as session:
+        throttler = session.proxy_pool.states[0].throttler = Throttler(1, 0.2)
+        await throttler.__aenter__()
+        response = await session.get("https://test.ru")
+
+    assert response.text() == PROXIES[0]
+    assert client_session.proxies == PROXIES[:1]
+
+
+async def test_retry_uses_another_proxy():
+    """Повторная попытка выбирает прокси заново"""
+    client_session = FakeClientSession(broken={PROXIES[0]})
+    async with create_session(client_session, hedge_delay=10) as session:
+        response = await session.get("https://test.ru")
+
+    assert response.text() == PROXIES[1]
+    assert client_session.proxies == PROXIES
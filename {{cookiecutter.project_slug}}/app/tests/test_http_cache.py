@@ -0,0 +1,108 @@
+"""Тестирование кэша ответов http-сессии"""
+# pylint: disable=redefined-outer-name
+import pytest
+from yarl import URL
+
+from app.repository.http_session.base import ApiResponse
+from app.repository.http_session.cache import (
+    ResponseCache,
+    parse_cache_control,
+)
+
+URL_ = "http://test.ru/resource"
+
+
+def make_response(status=200, body="body", **headers):
+    """Создаёт ответ с переданными заголовками"""
+    return ApiResponse(status, URL(URL_), body, headers)
+
+
+@pytest.fixture
+def cache():
+    """Кэш без хранения на диске"""
+    return ResponseCache(max_entries=2)
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    (
+        (None, {}),
+        ("no-store", {"no-store": None}),
+        ("public, max-age=60", {"public": None, "max-age": "60"}),
+        ('Max-Age="10",,', {"max-age": "10"}),
+    ),
+)
+def test_parse_cache_control(header, expected):
+    """Проверка разбора заголовка Cache-Control"""
+    assert parse_cache_control(header) == expected
+
+
+def test_fresh_entry_is_served(cache):
+    """Ответ с max-age сохраняется и считается свежим"""
+    key = cache.make_key(URL_, [("b", "2"), ("a", "1")])
+    cache.store(key, make_response(**{"Cache-Control": "max-age=60"}))
+
+    entry = cache.get(cache.make_key(URL_, [("a", "1"), ("b", "2")]))
+    assert entry is not None and entry.is_fresh()
+
+
+@pytest.mark.parametrize(
+    "headers",
+    (
+        {},
+        {"Cache-Control": "no-store, max-age=60"},
+    ),
+)
+def test_not_cacheable(cache, headers):
+    """Ответы без max-age и валидаторов или с no-store не сохраняются"""
+    key = cache.make_key(URL_)
+    assert cache.store(key, make_response(**headers)) is None
+    assert cache.get(key) is None
+
+
+def test_revalidation(cache):
+    """Запись с ETag устаревает сразу и продлевается после 304"""
+    key = cache.make_key(URL_)
+    entry = cache.store(key, make_response(ETag='"v1"'))
+
+    assert not entry.is_fresh()
+    assert entry.validators() == {"If-None-Match": '"v1"'}
+
+    cache.revalidate(key, entry, {"Cache-Control": "max-age=60"})
+    assert cache.get(key).is_fresh()
+    assert cache.get(key).response.body == "body"
+
+
+def test_vary_headers_in_key(cache):
+    """Заголовки из vary_headers участвуют в ключе"""
+    assert cache.make_key(URL_, headers={"Accept": "a"}) != cache.make_key(
+        URL_, headers={"Accept": "b"}
+    )
+    assert cache.make_key(URL_, headers={"X-Other": "a"}) == cache.make_key(
+        URL_
+    )
+
+
+def test_lru_eviction(cache):
+    """Вытесняется давно не использованная запись"""
+    keys = [cache.make_key(f"{URL_}/{index}") for index in range(3)]
+    cache.store(keys[0], make_response(ETag="0"))
+    cache.store(keys[1], make_response(ETag="1"))
+    cache.get(keys[0])
+    cache.store(keys[2], make_response(ETag="2"))
+
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+
+
+def test_disk_storage(tmp_path):
+    """Запись на диске доступна новому экземпляру кэша"""
+    key = ResponseCache(cache_dir=tmp_path).make_key(URL_)
+    ResponseCache(cache_dir=tmp_path).store(
+        key, make_response(**{"Cache-Control": "max-age=60"})
+    )
+
+    entry = ResponseCache(cache_dir=tmp_path).get(key)
+    assert entry is not None and entry.is_fresh()
+    assert entry.response.headers["cache-control"] == "max-age=60"
@@ -0,0 +1,124 @@
+"""Тестирование идемпотентности POST запросов"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import idempotency
+from app.api.idempotency import IdempotencyMiddleware
+
+
+class FakeRedis:
+    """Redis, хранящий строки в словаре"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture(name="calls")
+def fixture_calls(monkeypatch):
+    """Подменяет Redis и возвращает тела обработанных запросов"""
+    monkeypatch.setattr(
+        idempotency,
+        "redis_manager",
+        SimpleNamespace(started=True, client=FakeRedis()),
+    )
+    return []
+
+
+def make_app(calls, statuses=()):
+    """Приложение отвечает статусами statuses, затем 201"""
+    statuses = iter(statuses)
+
+    async def app(scope, receive, send):
+        body = (await receive())["body"]
+        calls.append(body)
+        await asyncio.sleep(0.05)
+        status = next(statuses, 201)
+        await send(
+            {"type": "http.response.start", "status": status, "headers": []}
+        )
+        await send({"type": "http.response.body", "body": b"created"})
+
+    return IdempotencyMiddleware(app)
+
+
+async def post(app, body, key=b"key-1"):
+    """Выполняет запрос и возвращает статус, заголовки и тело ответа"""
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/items",
+        "headers": [(b"idempotency-key", key)],
+        "client": ("127.0.0.1", 1234),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    headers = dict(messages[0]["headers"])
+    return messages[0]["status"], headers, messages[1]["body"]
+
+
+async def test_duplicates_are_processed_once(calls):
+    """Одновременный и поздний повторы получают ответ оригинала"""
+    app = make_app(calls)
+
+    responses = await asyncio.gather(post(app, b"{}"), post(app, b"{}"))
+    replayed = await post(app, b"{}")
+
+    assert calls == [b"{}"]
+    assert [status for status, _, _ in responses] == [201, 201]
+    assert replayed[0] == 201 and replayed[2] == b"created"
+    assert replayed[1][b"idempotent-replayed"] == b"true"
+
+
+async def test_key_reuse_with_other_payload(calls):
+    """Повтор ключа с другим телом запроса отклоняется"""
+    app = make_app(calls)
+
+    await post(app, b'{"id": 1}')
+    status, _, body = await post(app, b'{"id": 2}')
+
+    assert status == 422
+    assert "payload" in json.loads(body)["detail"]
+    assert calls == [b'{"id": 1}']
+
+
+async def test_transient_error_is_not_saved(calls):
+    """Ответ 429 не сохраняется, повтор выполняет запрос заново"""
+    app = make_app(calls, statuses=[429])
+
+    assert (await post(app, b"{}"))[0] == 429
+    status, headers, _ = await post(app, b"{}")
+
+    assert status == 201 and b"idempotent-replayed" not in headers
+    assert calls == [b"{}", b"{}"]
+
+
+async def test_duplicate_retries_after_failed_original(calls):
+    """Одновременный повтор выполняется заново, если оригинал упал"""
+    app = make_app(calls, statuses=[503])
+
+    responses = await asyncio.gather(post(app, b"{}"), post(app, b"{}"))
+
+    assert sorted(status for status, _, _ in responses) == [201, 503]
+    assert calls == [b"{}", b"{}"]
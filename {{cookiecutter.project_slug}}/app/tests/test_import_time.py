@@ -0,0 +1,69 @@
+"""
+Бюджеты времени импорта приложения.
+
+Импортируются модули, которые импортируются и в самом шаблоне:
+app.main подключает роутеры сгенерированного проекта.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+# Бюджеты в микросекундах, как их печатает python -X importtime
+IMPORT_BUDGET_US = 2_000_000
+APP_MODULES_SELF_BUDGET_US = 150_000
+
+IMPORT_SCRIPT = """
+import time
+started_at = time.perf_counter()
+from app.config.settings import settings
+from app.repository.database.database import async_engine, async_session
+from app.utils.lazy import is_initialised
+print(int((time.perf_counter() - started_at) * 1_000_000))
+print(is_initialised(settings), is_initialised(async_engine),
+      is_initialised(async_session))
+"""
+
+
+def import_app() -> tuple[str, dict[str, tuple[int, int]]]:
+    """
+    Импортирует настройки и БД в чистом интерпретаторе.
+
+    Возвращает stdout и время импорта модулей:
+    {модуль: (собственное, с зависимостями)}
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split(
+            "|"
+        )
+        timings[module.strip()] = (int(self_us), int(cumulative_us))
+    return result.stdout, timings
+
+
+def test_import_is_lazy_and_within_budget():
+    """
+    Импорт не читает настройки и не создаёт движок БД,
+    а время импорта укладывается в бюджет
+    """
+    stdout, timings = import_app()
+    import_us, *initialised = stdout.split()
+
+    assert initialised == ["False", "False", "False"]
+    assert int(import_us) <= IMPORT_BUDGET_US
+    app_self_us = sum(
+        self_us
+        for module, (self_us, _) in timings.items()
+        if module == "app" or module.startswith("app.")
+    )
+    assert app_self_us <= APP_MODULES_SELF_BUDGET_US
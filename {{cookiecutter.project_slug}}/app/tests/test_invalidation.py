@@ -0,0 +1,125 @@
+"""Тестирование шины инвалидации кэшей в памяти"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.repository.redis import invalidation
+from app.repository.redis.invalidation import (
+    InvalidationBus,
+    LocalCacheRegistry,
+)
+from app.utils.cache import TTLCache
+
+
+class FakeRedis:
+    """Redis, считающий поколения и опубликованные события"""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture(name="redis")
+def fixture_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(
+        invalidation,
+        "redis_manager",
+        SimpleNamespace(started=True, client=redis),
+    )
+    return redis
+
+
+def make_registry():
+    registry = LocalCacheRegistry()
+    users, items = TTLCache(), TTLCache()
+    registry.register("users", users)
+    registry.register("items", items)
+    for cache in (users, items):
+        cache.set("user:1", 1)
+        cache.set("user:2", 2)
+        cache.set("other", 3)
+    return registry, users, items
+
+
+def test_registry_evicts_by_key_prefix_and_namespace():
+    """Инвалидация затрагивает только кэши своего пространства имён"""
+    registry, users, items = make_registry()
+
+    registry.evict("users", key="other")
+    assert users.get("other") is None
+    assert len(users) == 2
+
+    registry.evict("users", prefix="user:")
+    assert len(users) == 0
+    assert len(items) == 3
+
+    registry.evict("items")
+    registry.evict("unknown")
+    assert len(items) == 0
+
+
+def test_registry_generations():
+    """Поколение не уменьшается, clear_all забывает поколения"""
+    registry, users, _ = make_registry()
+    registry.set_generation("users", 5)
+    registry.set_generation("users", 3)
+
+    assert registry.generation("users") == 5
+    registry.clear_all()
+    assert registry.generation("users") is None
+    assert len(users) == 0
+
+
+async def test_publish_bumps_generation(redis):
+    """Публикация очищает свои кэши и увеличивает поколение в Redis"""
+    registry, users, _ = make_registry()
+    bus = InvalidationBus(registry)
+
+    assert await bus.generation("users") == 0
+    await bus.publish("users")
+
+    assert len(users) == 0
+    assert redis.data == {"cache-generation:users": 1}
+    assert await bus.generation("users") == 1
+    assert len(redis.published) == 1
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [b"not json", b"[]", b"{}", b'{"namespace": ["users"]}', b"null"],
+)
+def test_malformed_events_are_ignored(payload):
+    """Некорректные события не ломают слушателя"""
+    registry, users, _ = make_registry()
+
+    InvalidationBus(registry)._apply(  # pylint: disable=protected-access
+        payload
+    )
+
+    assert len(users) == 3
+
+
+def test_events_of_other_replicas_are_applied():
+    """События других реплик очищают кэши и обновляют поколение"""
+    registry, users, items = make_registry()
+    bus = InvalidationBus(registry)
+
+    bus._apply(  # pylint: disable=protected-access
+        b'{"origin": "other", "namespace": "users", "key": "other",'
+        b' "generation": 7}'
+    )
+
+    assert users.get("other") is None
+    assert len(items) == 3
+    assert registry.generation("users") == 7
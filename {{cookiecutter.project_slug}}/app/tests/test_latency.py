@@ -0,0 +1,42 @@
+"""Тестирование учёта задержек ответов по хостам"""
+import pytest
+
+from app.repository.http_session.latency import (
+    MIN_LATENCY_SAMPLES,
+    LatencyTracker,
+)
+
+
+def test_default_delay_without_samples():
+    """Пока замеров мало, используется задержка по умолчанию"""
+    tracker = LatencyTracker(default_delay=2.0)
+    tracker.record("test.ru", 0.1)
+
+    assert tracker.percentile("test.ru") is None
+    assert tracker.hedge_delay("test.ru") == 2.0
+
+
+def test_percentile_delay():
+    """Задержка хеджирования равна перцентилю замеров хоста"""
+    tracker = LatencyTracker(percentile=0.95, min_delay=0.0)
+    for index in range(1, 101):
+        tracker.record("test.ru", index / 100)
+
+    assert tracker.hedge_delay("test.ru") == pytest.approx(0.95)
+    assert tracker.hedge_delay("other.ru") == tracker.hedge_delay(None)
+
+
+def test_min_delay():
+    """Задержка хеджирования не меньше min_delay"""
+    tracker = LatencyTracker(min_delay=0.5)
+    for _ in range(MIN_LATENCY_SAMPLES):
+        tracker.record("test.ru", 0.01)
+
+    assert tracker.hedge_delay("test.ru") == 0.5
+
+
+@pytest.mark.parametrize("percentile", (0.0, 1.0, 95))
+def test_wrong_percentile(percentile):
+    """Перцентиль задаётся долей"""
+    with pytest.raises(ValueError):
+        LatencyTracker(percentile=percentile)
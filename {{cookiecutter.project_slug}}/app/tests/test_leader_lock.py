@@ -0,0 +1,55 @@
+"""Тестирование блокировки лидера на Redis"""
+import asyncio
+
+from app.repository.redis.lock import LeaderLock
+from app.tests.lua_redis import LuaRedis
+
+
+async def test_acquire_and_renew():
+    """Лидер продлевает аренду дольше её срока и освобождает её"""
+    redis = LuaRedis()
+    lock = LeaderLock("job", ttl=0.3, redis=redis)
+
+    assert await lock.ensure()
+    assert lock.fencing_token == 1
+    assert 0.2 < redis.ttl(lock.key) <= 0.3
+    await asyncio.sleep(0.45)
+
+    assert lock.is_leader
+    assert redis.ttl(lock.key) > 0.1
+    await lock.release()
+    assert not lock.is_leader
+    assert lock.key not in redis.data
+
+
+async def test_lease_is_lost():
+    """Лидерство теряется, если аренду забрали"""
+    redis = LuaRedis()
+    lock = LeaderLock("job", ttl=0.3, redis=redis)
+    assert await lock.ensure()
+
+    redis.data[lock.key] = "other"
+    await asyncio.sleep(0.15)
+
+    assert not lock.is_leader
+    assert lock.fencing_token is None
+    await lock.release()
+    assert redis.data[lock.key] == "other"
+
+
+async def test_fencing_token_grows_on_takeover():
+    """Новый лидер получает fencing-токен больше, чем у прежнего"""
+    redis = LuaRedis()
+    leader = LeaderLock("job", ttl=30, redis=redis)
+    standby = LeaderLock("job", ttl=30, redis=redis)
+
+    assert await leader.ensure()
+    assert not await standby.ensure()
+    # лидер завис и не продлевает аренду
+    redis.advance(31)
+    assert await standby.ensure()
+
+    assert standby.fencing_token > leader.fencing_token
+    await leader.release()
+    await standby.release()
+    assert standby.key not in redis.data
@@ -0,0 +1,91 @@
+"""Тестирование пула прокси http-сессии"""
+import asyncio
+import time
+
+import pytest
+
+from app.repository.http_session.proxy_pool import ProxyPool, ProxyRotation
+
+PROXIES = ["http://first:3128", "http://second:3128", "http://third:3128"]
+
+
+def test_round_robin():
+    """Прокси выбираются по кругу"""
+    pool = ProxyPool(PROXIES)
+    assert [pool.acquire().proxy for _ in range(4)] == PROXIES + PROXIES[:1]
+
+
+async def test_least_loaded():
+    """Выбирается прокси с наименьшим числом активных запросов"""
+    pool = ProxyPool(PROXIES, rotation=ProxyRotation.LEAST_LOADED)
+    busy = pool.states[0]
+
+    async with busy:
+        assert pool.acquire().proxy != busy.proxy
+    assert busy.in_flight == 0
+
+
+def test_exclude():
+    """Исключённый прокси не выбирается, если есть другие"""
+    pool = ProxyPool(PROXIES[:2], rotation="least_loaded")
+    first = pool.states[0]
+    assert pool.acquire(exclude=first) is pool.states[1]
+    assert ProxyPool(PROXIES[:1]).acquire(exclude=first).proxy == PROXIES[0]
+
+
+def test_quarantine():
+    """Прокси с ошибками подряд уходит на карантин и выпадает из ротации"""
+    pool = ProxyPool(PROXIES[:2], max_failures=2, quarantine_seconds=60)
+    broken = pool.states[0]
+
+    pool.report(broken, 503)
+    assert broken.is_available(0)
+    pool.report(broken, 503)
+
+    assert broken.health < 1.0
+    assert all(pool.acquire() is pool.states[1] for _ in range(3))
+
+
+def test_success_resets_failures():
+    """Успешный ответ сбрасывает счётчик ошибок подряд"""
+    pool = ProxyPool(PROXIES[:2], max_failures=2)
+    state = pool.states[0]
+
+    pool.report_failure(state)
+    pool.report(state, 200)
+    pool.report_failure(state)
+
+    assert state.failures == 1
+    assert state.quarantines == 0
+
+
+def test_all_quarantined():
+    """Если на карантине все прокси, берётся тот, что освободится раньше"""
+    pool = ProxyPool(PROXIES[:2], max_failures=1, quarantine_seconds=60)
+    first, second = pool.states
+    pool.report_failure(second)
+    pool.report_failure(first)
+
+    assert pool.acquire() is second
+
+
+def test_empty_pool():
+    """Пул не может быть пустым"""
+    with pytest.raises(ValueError):
+        ProxyPool([])
+
+
+async def test_reconfigure():
+    """Новые ограничения применяются к Throttler всех прокси"""
+    pool = ProxyPool(PROXIES[:2], rate_limit=1, period=60)
+    state = pool.acquire()
+    async with state:
+        pass
+
+    pool.reconfigure(2, 60, ProxyRotation.LEAST_LOADED, 1, 5.0)
+    # освободившийся слот доступен сразу, без ожидания period
+    await asyncio.wait_for(state.__aenter__(), timeout=1)
+    await state.__aexit__(None, None, None)
+    pool.report_failure(state)
+
+    assert not state.is_available(time.monotonic())
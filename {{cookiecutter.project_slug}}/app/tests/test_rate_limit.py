@@ -0,0 +1,92 @@
+"""Тестирование ограничения частоты запросов к апи"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.api import rate_limit
+from app.api.rate_limit import RATE_LIMIT_KEY_PREFIX, request_buckets
+from app.tests.lua_redis import LuaRedis
+
+ROUTE = "/items/{item_id}"
+
+
+def make_request(authorization=None, host="10.0.0.1"):
+    headers = []
+    if authorization is not None:
+        headers.append((b"authorization", authorization.encode()))
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/items/1",
+            "headers": headers,
+            "client": (host, 1234),
+            "route": SimpleNamespace(path=ROUTE),
+        }
+    )
+
+
+@pytest.fixture(name="redis")
+def fixture_redis(monkeypatch):
+    """Подменяет Redis и задаёт небольшие лимиты"""
+    redis = LuaRedis()
+    monkeypatch.setattr(
+        rate_limit,
+        "redis_manager",
+        SimpleNamespace(started=True, client=redis),
+    )
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_period", 60.0)
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_per_user", 1)
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_per_ip", 2)
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_per_route", 10)
+    return redis
+
+
+def test_anonymous_buckets(redis):
+    """Без авторизации запрос считается по IP адресу"""
+    assert request_buckets(make_request()) == [
+        ("ip:10.0.0.1", 2),
+        (f"route:10.0.0.1:GET {ROUTE}", 10),
+    ]
+
+
+def test_route_bucket_per_client(redis):
+    """У каждого пользователя своя корзина маршрута"""
+    first = dict(request_buckets(make_request("Bearer first")))
+    second = dict(request_buckets(make_request("Bearer second")))
+
+    assert "ip:10.0.0.1" in first and "ip:10.0.0.1" in second
+    assert len(first) == len(second) == 3
+    assert not first.keys() - {"ip:10.0.0.1"} & second.keys()
+    assert request_buckets(make_request("Bearer first")) == list(
+        first.items()
+    )
+
+
+async def test_limit_is_exhausted_and_refilled(redis):
+    """Исчерпанный лимит отвечает 429 до пополнения корзины"""
+    request = make_request()
+    await rate_limit.rate_limit(request)
+    await rate_limit.rate_limit(request)
+
+    with pytest.raises(HTTPException) as error:
+        await rate_limit.rate_limit(request)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "30"
+
+    redis.advance(30)
+    await rate_limit.rate_limit(request)
+
+
+async def test_rejected_request_is_not_charged(redis):
+    """Отклонённый запрос не списывается из остальных корзин"""
+    await rate_limit.rate_limit(make_request("Bearer first"))
+    with pytest.raises(HTTPException):
+        await rate_limit.rate_limit(make_request("Bearer first"))
+
+    await rate_limit.rate_limit(make_request("Bearer second"))
+    ip_bucket = redis.data[f"{RATE_LIMIT_KEY_PREFIX}:ip:10.0.0.1"]
+    assert float(ip_bucket["tokens"]) == pytest.approx(0, abs=0.01)
+    assert redis.ttl(f"{RATE_LIMIT_KEY_PREFIX}:ip:10.0.0.1") <= 60
@@ -0,0 +1,83 @@
+"""Тестирование пакетной отправки команд Redis"""
+import asyncio
+
+import pytest
+
+from app.repository.redis.batching import RedisBatcher
+
+
+class FakePipeline:
+    """Pipeline, выполняющий команды над словарём"""
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def execute_command(self, *command):
+        self._commands.append(command)
+
+    async def execute(self, raise_on_error=True):
+        self._redis.round_trips += 1
+        results = []
+        for name, key, *args in self._commands:
+            if name == "GET":
+                results.append(self._redis.data.get(key))
+            elif name == "SET":
+                self._redis.data[key] = args[0]
+                results.append(True)
+            else:
+                results.append(ValueError(name))
+        return results
+
+
+class FakeRedis:
+    """Redis, считающий число сетевых кругов"""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+async def test_commands_are_batched():
+    """Одновременные команды уходят одним pipeline"""
+    redis = FakeRedis()
+    async with RedisBatcher(redis, max_batch_size=100) as batcher:
+        await asyncio.gather(
+            *(batcher.set(f"key:{index}", index) for index in range(10))
+        )
+        values = await asyncio.gather(
+            *(batcher.get(f"key:{index}") for index in range(10))
+        )
+
+    assert values == list(range(10))
+    assert redis.round_trips == 2
+
+
+async def test_flush_by_size():
+    """Пачка отправляется сразу по достижении max_batch_size"""
+    redis = FakeRedis()
+    batcher = RedisBatcher(redis, max_batch_size=2, flush_interval=60)
+
+    await asyncio.wait_for(
+        asyncio.gather(batcher.set("a", 1), batcher.set("b", 2)), timeout=1
+    )
+    assert redis.round_trips == 1
+
+
+async def test_command_error_is_isolated():
+    """Ошибка команды поднимается только у её вызывающего"""
+    batcher = RedisBatcher(FakeRedis(), flush_interval=0)
+
+    results = await asyncio.gather(
+        batcher.execute("UNKNOWN", "key"),
+        batcher.set("key", 1),
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], ValueError)
+    assert results[1] is True
+
+    with pytest.raises(ValueError):
+        await batcher.execute("UNKNOWN", "key")
@@ -0,0 +1,96 @@
+"""Тестирование пула соединений с Redis"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.repository.redis import connections
+from app.repository.redis.connections import RedisManager
+
+
+class FakeRedis:
+    """Клиент и пул Redis; первые failures пингов завершаются ошибкой"""
+
+    def __init__(self):
+        self.failures = 0
+        self.pings = 0
+        self.closed = False
+        self.disconnects = []
+
+    async def ping(self):
+        self.pings += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Redis is unavailable")
+        return True
+
+    async def aclose(self):
+        self.closed = True
+
+    async def disconnect(self, inuse_connections=True):
+        self.disconnects.append(inuse_connections)
+
+
+@pytest.fixture(name="redis")
+def fixture_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(
+        connections,
+        "ConnectionPool",
+        SimpleNamespace(from_url=lambda url, **kwargs: redis),
+    )
+    monkeypatch.setattr(
+        connections, "TracedRedis", lambda connection_pool: redis
+    )
+    return redis
+
+
+def make_manager(startup_attempts=3, health_check_interval=0):
+    return RedisManager(
+        {
+            "url": "redis://localhost:6379/0",
+            "startup_attempts": startup_attempts,
+            "health_check_interval": health_check_interval,
+        }
+    )
+
+
+async def test_startup_retries(redis):
+    """Подключение повторяется, пока Redis не ответит"""
+    manager = make_manager()
+    redis.failures = 1
+
+    await manager.startup()
+    assert manager.started and manager.client is redis
+    assert redis.pings == 2
+
+    await manager.shutdown()
+    assert not manager.started
+    assert redis.closed and redis.disconnects == [True]
+
+
+async def test_startup_gives_up(redis):
+    """После startup_attempts неудач ошибка поднимается, пул закрывается"""
+    manager = make_manager(startup_attempts=2)
+    redis.failures = 2
+
+    with pytest.raises(ConnectionError):
+        await manager.startup()
+
+    assert redis.pings == 2
+    assert not manager.started
+    with pytest.raises(RuntimeError):
+        manager.client  # pylint: disable=pointless-statement
+
+
+async def test_health_loop_reconnects(redis):
+    """Неудачная проверка здоровья сбрасывает свободные соединения"""
+    manager = make_manager(health_check_interval=0.01)
+    await manager.startup()
+
+    redis.failures = 1
+    await asyncio.sleep(0.05)
+    await manager.shutdown()
+
+    assert redis.disconnects[0] is False
+    assert redis.pings > 2
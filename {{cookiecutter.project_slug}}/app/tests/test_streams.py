@@ -0,0 +1,197 @@
+"""Тестирование очереди задач на Redis Streams"""
+import asyncio
+import time
+
+from redis.asyncio import ResponseError
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.repository.redis import streams
+from app.repository.redis.streams import StreamConsumer, publish
+from app.utils.logger.context import CONTEXT
+
+STREAM = "tasks"
+GROUP = "workers"
+
+
+class FakeRedis:
+    """Redis с одним потоком и группой потребителей в памяти"""
+
+    def __init__(self):
+        self.streams = {}
+        self.groups = {}
+        self._last_id = 0
+        # команды, которые завершатся ошибкой соединения по одному разу
+        self.failing = set()
+
+    def _fail(self, command):
+        if command in self.failing:
+            self.failing.discard(command)
+            raise RedisConnectionError("Connection reset by peer")
+
+    async def xgroup_create(self, stream, group, id="0", mkstream=False):
+        # pylint: disable=redefined-builtin
+        if (stream, group) in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.streams.setdefault(stream, [])
+        self.groups[stream, group] = {"read": 0, "pending": {}}
+
+    async def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self._last_id += 1
+        message_id = f"{self._last_id}-0"
+        self.streams.setdefault(stream, []).append((message_id, dict(fields)))
+        return message_id.encode()
+
+    async def xreadgroup(self, group, consumer, streams, count, block):
+        self._fail("xreadgroup")
+        ((stream, _),) = streams.items()
+        state = self.groups[stream, group]
+        messages = self.streams[stream][state["read"] :][:count]
+        if not messages:
+            await asyncio.sleep(block / 1000)
+            return []
+        state["read"] += len(messages)
+        for message_id, _ in messages:
+            state["pending"][message_id] = {
+                "consumer": consumer,
+                "times_delivered": 1,
+                "delivered_at": time.monotonic(),
+            }
+        return [(stream, messages)]
+
+    async def xack(self, stream, group, *message_ids):
+        self._fail("xack")
+        pending = self.groups[stream, group]["pending"]
+        acked = [pending.pop(message_id, None) for message_id in message_ids]
+        return len(list(filter(None, acked)))
+
+    async def xpending_range(
+        self, name, groupname, min, max, count, consumername=None
+    ):
+        # pylint: disable=redefined-builtin,too-many-arguments
+        now = time.monotonic()
+        pending = self.groups[name, groupname]["pending"]
+        return [
+            {
+                "message_id": message_id.encode(),
+                "consumer": entry["consumer"].encode(),
+                "time_since_delivered": int(
+                    (now - entry["delivered_at"]) * 1000
+                ),
+                "times_delivered": entry["times_delivered"],
+            }
+            for message_id, entry in pending.items()
+        ][:count]
+
+    async def xclaim(self, stream, group, consumer, min_idle_time, ids):
+        pending = self.groups[stream, group]["pending"]
+        messages = dict(self.streams[stream])
+        claimed = []
+        for message_id in map(bytes.decode, ids):
+            entry = pending[message_id]
+            entry["consumer"] = consumer
+            entry["times_delivered"] += 1
+            entry["delivered_at"] = time.monotonic()
+            claimed.append((message_id, messages[message_id]))
+        return claimed
+
+
+def make_consumer(redis, handler, **kwargs):
+    options = {
+        "concurrency": 2,
+        "batch_size": 10,
+        "block_ms": 5,
+        "claim_idle_ms": 0,
+        "max_deliveries": 3,
+        "ack_batch_size": 1,
+        "ack_interval": 0,
+    }
+    return StreamConsumer(
+        redis, STREAM, GROUP, handler, "consumer", **options | kwargs
+    )
+
+
+async def consume(consumer, until):
+    """Запускает потребителя и останавливает, когда выполнится until()"""
+    task = asyncio.create_task(consumer.run())
+    while not until():
+        await asyncio.sleep(0.005)
+    consumer.stop()
+    await asyncio.wait_for(task, 1)
+
+
+async def test_messages_are_processed_in_publisher_context():
+    """Сообщение обрабатывается в CONTEXT отправителя и подтверждается"""
+    redis = FakeRedis()
+    handled = []
+
+    async def handler(message_id, fields):
+        handled.append((message_id, fields, CONTEXT.get("request_id")))
+
+    with CONTEXT.tmp_context(request_id="42"):
+        message_id = await publish(redis, STREAM, {"task": 1}, maxlen=100)
+    await consume(make_consumer(redis, handler), lambda: handled)
+
+    assert handled == [(message_id, {"task": "1"}, "42")]
+    assert not redis.groups[STREAM, GROUP]["pending"]
+
+
+async def test_processing_messages_are_not_claimed():
+    """Потребитель не забирает у себя сообщения, которые обрабатывает"""
+    redis = FakeRedis()
+    release = asyncio.Event()
+    handled = []
+
+    async def handler(message_id, fields):
+        handled.append(message_id)
+        await release.wait()
+
+    await publish(redis, STREAM, {"task": 1}, maxlen=100)
+    consumer = make_consumer(redis, handler)
+    task = asyncio.create_task(consume(consumer, release.is_set))
+    await asyncio.sleep(0.05)
+    release.set()
+    await task
+
+    assert len(handled) == 1
+    assert not redis.groups[STREAM, GROUP]["pending"]
+
+
+async def test_failed_message_goes_to_dead_letter():
+    """Сообщение, исчерпавшее попытки, уходит в dead-letter"""
+    redis = FakeRedis()
+    attempts = []
+
+    async def handler(message_id, fields):
+        attempts.append(message_id)
+        raise RuntimeError("boom")
+
+    message_id = await publish(redis, STREAM, {"task": 1}, maxlen=100)
+    consumer = make_consumer(redis, handler)
+    dead_letter_stream = consumer.dead_letter_stream
+    await consume(consumer, lambda: dead_letter_stream in redis.streams)
+
+    assert attempts == [message_id] * 3
+    assert redis.streams[dead_letter_stream] == [
+        ("2-0", {"task": "1", "original_id": message_id})
+    ]
+    assert not redis.groups[STREAM, GROUP]["pending"]
+
+
+async def test_consumer_survives_connection_errors(monkeypatch):
+    """Ошибки соединения не останавливают потребителя"""
+    monkeypatch.setattr(streams, "MAX_RETRY_DELAY", 0.01)
+    redis = FakeRedis()
+    handled = []
+
+    async def handler(message_id, fields):
+        handled.append(message_id)
+
+    message_id = await publish(redis, STREAM, {"task": 1}, maxlen=100)
+    redis.failing = {"xreadgroup", "xack"}
+    await consume(
+        make_consumer(redis, handler),
+        lambda: handled and not redis.groups[STREAM, GROUP]["pending"],
+    )
+
+    assert handled == [message_id]
+    assert not redis.failing
@@ -0,0 +1,110 @@
+"""Тестирование отложенной пакетной записи в БД"""
+import asyncio
+
+import pytest
+
+from app.repository.database import write_buffer as write_buffer_module
+from app.repository.database.write_buffer import WriteBuffer
+
+
+class Event:
+    """Модель, вместо таблицы которой INSERT получает сам класс"""
+
+    __tablename__ = "events"
+
+
+class FakeSession:
+    """Сессия, сохраняющая выполненные INSERT в базе FakeDatabase"""
+
+    def __init__(self, database):
+        self._database = database
+        self._statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def execute(self, model, rows):
+        if self._database.fail:
+            raise ConnectionError("database is unavailable")
+        self._statements.append((model.__tablename__, list(rows)))
+
+    async def commit(self):
+        self._database.commits.append(self._statements)
+
+
+class FakeDatabase:
+    """Фабрика сессий, считающая транзакции"""
+
+    def __init__(self):
+        self.commits = []
+        self.fail = False
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    published = []
+
+    async def publish(namespace):
+        published.append(namespace)
+
+    monkeypatch.setattr(write_buffer_module, "insert", lambda model: model)
+    monkeypatch.setattr(
+        write_buffer_module.invalidation_bus, "publish", publish
+    )
+    database = FakeDatabase()
+    database.published = published
+    return database
+
+
+async def test_rows_are_written_in_one_insert(database):
+    """Строки, записанные в течение flush_interval, уходят одним INSERT"""
+    buffer = WriteBuffer(database, max_batch_size=100, flush_interval=0.01)
+
+    for index in range(10):
+        await buffer.write(Event, {"index": index})
+    await buffer.write(Event, {"index": 10}, wait=True)
+
+    assert database.commits == [
+        [("events", [{"index": index} for index in range(11)])]
+    ]
+    assert database.published == ["events"]
+
+
+async def test_flush_by_size_and_on_close(database):
+    """Пачка записывается по достижении max_batch_size и при закрытии"""
+    buffer = WriteBuffer(database, max_batch_size=3, flush_interval=60)
+
+    for index in range(3):
+        await buffer.write(Event, {"index": index})
+    await asyncio.sleep(0)
+    await buffer.write(Event, {"index": 3})
+    assert len(database.commits) == 1
+    assert len(buffer) == 1
+
+    await buffer.close()
+    assert len(database.commits) == 2
+    assert len(buffer) == 0
+
+
+async def test_errors_reach_waiting_callers(database):
+    """Ошибка записи поднимается у тех, кто её дожидается"""
+    buffer = WriteBuffer(database, max_batch_size=100, flush_interval=60)
+    database.fail = True
+
+    waiting = asyncio.ensure_future(buffer.write(Event, {"index": 0}, True))
+    await asyncio.sleep(0)
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    with pytest.raises(ConnectionError):
+        await waiting
+    database.fail = False
+    await buffer.write(Event, {"index": 1})
+    await buffer.flush()
+
+    assert database.commits == [[("events", [{"index": 1}])]]
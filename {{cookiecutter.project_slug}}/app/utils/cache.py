@@ -0,0 +1,370 @@
+"""
+Двухуровневое кэширование результатов асинхронных функций.
+
+Перед Redis стоит TTL LRU кэш в памяти процесса.
+От лавины пересчётов при истечении горячего ключа защищают:
+- single-flight внутри процесса: один пересчёт на ключ;
+- блокировка в Redis: один пересчёт на ключ во всём кластере,
+  остальные отдают устаревшее значение или ждут нового;
+- вероятностное досрочное обновление (XFetch): ключ пересчитывается
+  незадолго до истечения, тем раньше, чем дольше пересчёт.
+"""
+import asyncio
+import functools
+import hashlib
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Protocol
+
+from redis.asyncio import Redis, RedisError
+
+from app.repository.redis.connections import redis_manager
+from app.repository.redis.invalidation import invalidation_bus, local_caches
+from app.utils import serialization
+from app.utils.logger.logs_adapter import logger
+from app.utils.single_flight import SingleFlight
+
+CACHE_KEY_PREFIX = "cache"
+# Снятие блокировки только её владельцем
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+LOCK_POLL_INTERVAL = 0.05
+
+
+class Serializer(Protocol):
+    """Сериализатор значений для хранения в Redis"""
+
+    def dumps(self, obj: Any) -> bytes:
+        ...
+
+    def loads(self, data: bytes) -> Any:
+        ...
+
+
+KeyBuilder = Callable[[Callable, tuple, dict], str]
+
+
+def default_key_builder(func: Callable, args: tuple, kwargs: dict) -> str:
+    """Ключ по полному имени функции и repr её аргументов"""
+    arguments = repr((args, sorted(kwargs.items()))).encode()
+    return (
+        f"{func.__module__}.{func.__qualname__}:"
+        f"{hashlib.sha1(arguments, usedforsecurity=False).hexdigest()}"
+    )
+
+
+class TTLCache:
+    """
+    LRU кэш в памяти процесса с ограничением времени жизни записей
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает неистёкшее значение или default"""
+        if (item := self._data.get(key)) is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """Сохраняет значение на ttl секунд (по умолчанию - self.ttl)"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def evict(self, key: Hashable) -> None:
+        """Удаляет запись"""
+        self._data.pop(key, None)
+
+    def evict_prefix(self, prefix: str) -> None:
+        """Удаляет записи со строковыми ключами, начинающимися с prefix"""
+        for key in [
+            key
+            for key in self._data
+            if isinstance(key, str) and key.startswith(prefix)
+        ]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        """Удаляет все записи"""
+        self._data.clear()
+
+
+class _Entry:
+    """Значение вместе с длительностью его расчёта и сроком годности"""
+
+    __slots__ = ("value", "delta", "expires_at")
+
+    def __init__(self, value: Any, delta: float, expires_at: float):
+        self.value = value
+        self.delta = delta
+        self.expires_at = expires_at
+
+    def should_refresh(self, beta: float) -> bool:
+        """
+        XFetch: истёкшее значение пересчитывается всегда, неистёкшее -
+        с вероятностью, растущей по мере приближения срока годности
+        """
+        jitter = -self.delta * beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= self.expires_at
+
+
+class _CachedFunction:  # pylint: disable=too-many-instance-attributes
+    """Обёртка функции, кэширующая её результаты"""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        func: Callable[..., Awaitable[Any]],
+        ttl: float,
+        local_ttl: float | None,
+        maxsize: int,
+        key_builder: KeyBuilder,
+        serializer: Serializer,
+        beta: float,
+        lock_timeout: float,
+        use_redis: bool,
+        namespace: str | None,
+    ):
+        self._func = func
+        self._ttl = ttl
+        self._key_builder = key_builder
+        self._serializer = serializer
+        self._beta = beta
+        self._lock_timeout = lock_timeout
+        self._use_redis = use_redis
+        self._namespace = namespace
+        self.local = TTLCache(maxsize, ttl if local_ttl is None else local_ttl)
+        if namespace is not None:
+            local_caches.register(namespace, self.local)
+        self._single_flight = SingleFlight()
+        functools.update_wrapper(self, func)
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        key = self._key_builder(self._func, args, kwargs)
+        entry: _Entry | None = self.local.get(key)
+        if entry is not None and not entry.should_refresh(self._beta):
+            return entry.value
+
+        return await self._single_flight.do(
+            key, functools.partial(self._load, key, entry, args, kwargs)
+        )
+
+    async def invalidate(self, *args: Any, **kwargs: Any) -> None:
+        """Удаляет закэшированный результат для переданных аргументов"""
+        key = self._key_builder(self._func, args, kwargs)
+        self.local.evict(key)
+        if (redis := self._redis()) is not None and (
+            redis_key := await self._redis_key(key)
+        ) is not None:
+            try:
+                await redis.delete(redis_key)
+            except RedisError as exc:
+                logger.warning("Cache invalidation failed: %s", exc)
+
+    async def _load(
+        self, key: str, stale: _Entry | None, args: tuple, kwargs: dict
+    ) -> Any:
+        redis = self._redis()
+        # ключ фиксируется до пересчёта: значение, посчитанное
+        # до инвалидации, не попадёт в новое поколение
+        redis_key = await self._redis_key(key) if redis is not None else None
+        if redis is None or redis_key is None:
+            return (await self._compute(key, args, kwargs)).value
+
+        entry = await self._redis_get(redis, redis_key) or stale
+        if entry is not None and not entry.should_refresh(self._beta):
+            self._remember(key, entry)
+            return entry.value
+
+        token = await self._acquire_lock(redis, redis_key)
+        if token is None:
+            # пересчётом уже занят другой процесс
+            if entry is not None:
+                return entry.value
+            if (
+                entry := await self._wait_for_value(redis, redis_key)
+            ) is not None:
+                self._remember(key, entry)
+                return entry.value
+
+        try:
+            return (
+                await self._compute(key, args, kwargs, redis, redis_key)
+            ).value
+        finally:
+            if token is not None:
+                await self._release_lock(redis, redis_key, token)
+
+    async def _compute(  # pylint: disable=too-many-arguments
+        self,
+        key: str,
+        args: tuple,
+        kwargs: dict,
+        redis: Redis | None = None,
+        redis_key: str | None = None,
+    ) -> _Entry:
+        started_at = time.monotonic()
+        value = await self._func(*args, **kwargs)
+        delta = time.monotonic() - started_at
+        expires_at = time.time() + self._ttl
+        raw = None
+        if self._use_redis:
+            # значение проходит через сериализатор и в памяти процесса:
+            # посчитанное здесь и прочитанное из Redis одного типа
+            raw = self._serializer.dumps((value, delta, expires_at))
+            value = self._serializer.loads(raw)[0]
+        entry = _Entry(value, delta, expires_at)
+
+        self._remember(key, entry)
+        if raw is not None and redis is not None and redis_key is not None:
+            try:
+                await redis.set(redis_key, raw, px=math.ceil(self._ttl * 1000))
+            except RedisError as exc:
+                logger.warning("Cache write failed: %s", exc)
+        return entry
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        ttl = min(self.local.ttl, entry.expires_at - time.time())
+        if ttl > 0:
+            self.local.set(key, entry, ttl)
+
+    def _redis(self) -> Redis | None:
+        if not self._use_redis or not redis_manager.started:
+            return None
+        return redis_manager.client
+
+    async def _redis_key(self, key: str) -> str | None:
+        """
+        Ключ записи в Redis. Для функций с namespace в него входит
+        поколение пространства имён; None - поколение неизвестно
+        """
+        if self._namespace is None:
+            return f"{CACHE_KEY_PREFIX}:{key}"
+        generation = await invalidation_bus.generation(self._namespace)
+        if generation is None:
+            return None
+        return f"{CACHE_KEY_PREFIX}:{self._namespace}:{generation}:{key}"
+
+    async def _redis_get(self, redis: Redis, redis_key: str) -> _Entry | None:
+        try:
+            raw = await redis.get(redis_key)
+        except RedisError as exc:
+            logger.warning("Cache read failed: %s", exc)
+            return None
+        if raw is None:
+            return None
+        try:
+            return _Entry(*self._serializer.loads(raw))
+        except Exception as exc:  # pylint: disable=broad-except
+            # повреждённая или несовместимая запись - промах
+            logger.warning("Cache entry %s is unreadable: %r", redis_key, exc)
+            return None
+
+    async def _acquire_lock(self, redis: Redis, redis_key: str) -> str | None:
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis.set(
+                f"{redis_key}:lock",
+                token,
+                nx=True,
+                px=math.ceil(self._lock_timeout * 1000),
+            )
+        except RedisError as exc:
+            logger.warning("Cache lock failed: %s", exc)
+            return token
+        return token if acquired else None
+
+    async def _release_lock(self, redis: Redis, redis_key: str, token: str):
+        try:
+            await redis.eval(
+                RELEASE_LOCK_SCRIPT, 1, f"{redis_key}:lock", token
+            )
+        except RedisError as exc:
+            logger.warning("Cache lock release failed: %s", exc)
+
+    async def _wait_for_value(
+        self, redis: Redis, redis_key: str
+    ) -> _Entry | None:
+        deadline = time.monotonic() + self._lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            if (entry := await self._redis_get(redis, redis_key)) is not None:
+                return entry
+        return None
+
+
+def cached(  # pylint: disable=too-many-arguments
+    ttl: float,
+    local_ttl: float | None = None,
+    maxsize: int = 1024,
+    key_builder: KeyBuilder = default_key_builder,
+    serializer: Serializer = serialization,  # type: ignore[assignment]
+    beta: float = 1.0,
+    lock_timeout: float = 10.0,
+    use_redis: bool = True,
+    namespace: str | None = None,
+) -> Callable[[Callable[..., Awaitable[Any]]], _CachedFunction]:
+    """
+    Кэширует результаты асинхронной функции на ttl секунд.
+
+    local_ttl ограничивает жизнь записей в памяти процесса
+    (по умолчанию равен ttl). Если Redis не запущен или use_redis=False,
+    работает только кэш в памяти. beta > 1 делает досрочное обновление
+    более ранним, beta = 0 отключает его.
+
+    Значения хранятся в Redis в JSON, поэтому возвращаются
+    JSON-совместимыми (pydantic модели - словарями, datetime - строками),
+    в том числе процессу, который их посчитал.
+    Другие объекты требуют своего serializer; pickle допустим, только
+    если запись в Redis есть исключительно у приложения: разбор
+    подложенной записи выполнит произвольный код.
+
+    При заданном namespace кэш очищается по событиям шины
+    инвалидации (например, после записи в таблицу namespace через
+    CRUDBase): в памяти записи удаляются, а в Redis - становятся
+    недостижимыми после смены поколения пространства имён.
+
+    Пример использования:
+    @cached(ttl=300, local_ttl=10)
+    async def get_resource(resource_id: int) -> Resource:
+        ...
+
+    await get_resource.invalidate(resource_id)
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> _CachedFunction:
+        return _CachedFunction(
+            func,
+            ttl,
+            local_ttl,
+            maxsize,
+            key_builder,
+            serializer,
+            beta,
+            lock_timeout,
+            use_redis,
+            namespace,
+        )
+
+    return decorator
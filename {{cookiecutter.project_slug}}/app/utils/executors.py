@@ -0,0 +1,270 @@
+"""
+Выполнение блокирующей работы вне цикла событий.
+
+Пул потоков (thread) подходит для блокирующего ввода-вывода,
+пул процессов (process) - для вычислений (разбор, хэширование,
+сравнение больших таблиц): они выполняются на всех ядрах,
+не упираясь в GIL и не отнимая процессор у цикла событий.
+inline выполняет функцию прямо в цикле событий - для тестов и отладки.
+
+Для пула процессов функция и аргументы должны сериализоваться pickle:
+функции - объявлены на уровне модуля, аргументы - простые данные.
+CONTEXT передаётся в пул вместе с вызовом.
+
+Пример использования:
+rows = await executor.run(parse_spreadsheet, content)
+"""
+import asyncio
+import functools
+import importlib
+import inspect
+import logging.config
+import math
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from enum import Enum
+from pathlib import Path
+from typing import Any, TypeVar
+
+from app.config.settings import settings
+from app.utils.lazy import LazyProxy
+from app.utils.logger.context import CONTEXT
+from app.utils.logger.logs_adapter import logger
+
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+_T = TypeVar("_T")
+
+
+class ExecutorKind(Enum):
+    """Где выполняется функция"""
+
+    THREAD = "thread"
+    PROCESS = "process"
+    INLINE = "inline"
+
+
+def available_cpus() -> int:
+    """
+    Число процессоров, доступных процессу.
+
+    Учитывает привязку к процессорам и квоту CPU контейнера (cgroup v2).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # sched_getaffinity нет на macOS и Windows
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path(CGROUP_CPU_MAX).read_text().split()
+    except (OSError, ValueError):
+        return cpus
+    if quota == "max":
+        return cpus
+    return max(1, min(cpus, math.ceil(int(quota) / int(period))))
+
+
+def default_process_workers(server_workers: int = 0) -> int:
+    """
+    Размер пула процессов одного воркера uvicorn.
+
+    Процессоры делятся между воркерами (server_workers, 0 - по числу
+    процессоров), чтобы вместе они не создавали процессов больше,
+    чем есть ядер.
+    """
+    cpus = available_cpus()
+    return max(1, cpus // (server_workers or cpus))
+
+
+def _import_callable(path: str) -> Callable[[], Any]:
+    """Функция по пути вида "package.module:function" """
+    module_name, _, name = path.partition(":")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def _initialize_process(initializer: str | None) -> None:
+    """Настраивает логирование процесса пула и выполняет прогрев"""
+    logging.config.dictConfig(settings.logging)
+    if initializer:
+        _import_callable(initializer)()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _resolve_function(module: str, qualname: str, depth: int) -> Callable:
+    """Функция по имени, снятая с depth обёрток functools.wraps"""
+    func: Any = importlib.import_module(module)
+    for name in qualname.split("."):
+        func = getattr(func, name)
+    for _ in range(depth):
+        func = func.__wrapped__
+    return func
+
+
+class _FunctionReference:
+    """
+    Ссылка на функцию модуля, передаваемая в процессы по имени.
+
+    pickle передаёт функции по имени и отказывается, если атрибут
+    модуля - другой объект: так бывает с функциями под декораторами,
+    заменяющими их обёрткой (например, repeat). Ссылка запоминает,
+    сколько обёрток functools.wraps снять с атрибута модуля,
+    чтобы получить исходную функцию.
+    """
+
+    def __init__(self, func: Callable):
+        self._func = func
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._func(*args, **kwargs)
+
+    def __reduce__(self):
+        module, qualname = self._func.__module__, self._func.__qualname__
+        try:
+            attribute: Any = _resolve_function(module, qualname, 0)
+        except (ImportError, AttributeError):
+            attribute = None
+        depth = 0
+        while attribute is not None and attribute is not self._func:
+            attribute = getattr(attribute, "__wrapped__", None)
+            depth += 1
+        if attribute is None:
+            # функция недостижима по имени: pickle объяснит, почему
+            return _identity, (self._func,)
+        return _resolve_function, (module, qualname, depth)
+
+
+class ExecutorPool:
+    """
+    Пул для выполнения синхронных функций из асинхронного кода.
+
+    Пул создаётся при первом вызове или в start(). Процессы пула
+    запускаются методом spawn: fork процесса с фоновыми потоками
+    (логирование, трассировка) небезопасен. initializer -
+    путь "package.module:function" к функции прогрева, которая
+    выполняется в каждом процессе или потоке пула при его запуске
+    (например, загружает справочники или компилирует регулярные
+    выражения).
+    """
+
+    def __init__(
+        self,
+        kind: ExecutorKind | str = ExecutorKind.THREAD,
+        max_workers: int | None = None,
+        initializer: str | None = None,
+    ):
+        self.kind = ExecutorKind(kind)
+        self.max_workers = max_workers or None
+        self._initializer = initializer or None
+        self._executor: Executor | None = None
+
+    def _create_executor(self) -> Executor | None:
+        if self.kind is ExecutorKind.PROCESS:
+            return ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_process,
+                initargs=(self._initializer,),
+            )
+        if self.kind is ExecutorKind.THREAD:
+            return ThreadPoolExecutor(
+                self.max_workers,
+                thread_name_prefix="executor",
+                initializer=(
+                    _import_callable(self._initializer)
+                    if self._initializer
+                    else None
+                ),
+            )
+        return None
+
+    @property
+    def executor(self) -> Executor | None:
+        """Пул; None для inline"""
+        if self._executor is None:
+            self._executor = self._create_executor()
+        return self._executor
+
+    async def start(self) -> None:
+        """
+        Создаёт пул и прогревает его, чтобы первые вызовы
+        не ждали запуска процессов и выполнения initializer
+        """
+        if (executor := self.executor) is None:
+            return
+        loop = asyncio.get_running_loop()
+        workers = int(
+            self.max_workers or getattr(executor, "_max_workers", None) or 1
+        )
+        pids = await asyncio.gather(
+            *(loop.run_in_executor(executor, _ping) for _ in range(workers))
+        )
+        logger.info(
+            "%s executor started with %s workers", self.kind.value, workers
+        )
+        logger.debug("Executor workers: %s", sorted(set(pids)))
+
+    async def run(
+        self, func: Callable[..., _T], *args: Any, **kwargs: Any
+    ) -> _T:
+        """Выполняет func(*args, **kwargs) в пуле с текущим CONTEXT"""
+        if self.kind is ExecutorKind.PROCESS and inspect.isfunction(func):
+            func = _FunctionReference(func)
+        call = CONTEXT.wrap(functools.partial(func, *args, **kwargs))
+        if (executor := self.executor) is None:
+            return call()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, call
+            )
+        except BrokenExecutor:
+            # процесс пула умер (например, OOM): следующий вызов
+            # получит новый пул
+            logger.error("%s executor is broken, restarting", self.kind.value)
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def shutdown(self, wait: bool = True) -> None:
+        """Отменяет ожидающие вызовы и останавливает пул"""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(
+                executor.shutdown, wait=wait, cancel_futures=True
+            ),
+        )
+
+
+def create_executor(executor_settings: dict[str, Any]) -> ExecutorPool:
+    """Пул по settings.executor_settings"""
+    executor_settings = dict(executor_settings)
+    if (
+        executor_settings.get("kind") == ExecutorKind.PROCESS.value
+        and not executor_settings.get("max_workers")
+    ):
+        executor_settings["max_workers"] = default_process_workers(
+            settings.server_workers
+        )
+    return ExecutorPool(**executor_settings)
+
+
+executor: ExecutorPool = LazyProxy(  # type: ignore
+    lambda: create_executor(settings.executor_settings)
+)
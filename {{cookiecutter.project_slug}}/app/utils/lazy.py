@@ -0,0 +1,70 @@
+"""
+Ленивая инициализация глобальных объектов.
+
+Настройки, движок БД и подобные объекты дорого создавать при импорте:
+за это платит каждый запуск CLI, тестовый модуль и форк воркера.
+LazyProxy создаёт объект при первом обращении к нему.
+"""
+import threading
+from collections.abc import Callable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyProxy(Generic[T]):
+    """
+    Прокси, создающий объект фабрикой при первом обращении
+    к его атрибутам или вызове.
+
+    Пример использования:
+    settings: CommonSettings = LazyProxy(load_settings)
+    """
+
+    __slots__ = ("_factory", "_instance", "_lock")
+
+    def __init__(self, factory: Callable[[], T]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> T:
+        if (instance := self._instance) is None:
+            with self._lock:
+                if (instance := self._instance) is None:
+                    instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._resolve()(*args, **kwargs)  # type: ignore[operator]
+
+    def __repr__(self) -> str:
+        if self._instance is None:
+            return f"<{type(self).__name__} of {self._factory!r}>"
+        return repr(self._instance)
+
+
+def is_initialised(proxy: Any) -> bool:
+    """Показывает, создан ли уже объект прокси"""
+    if isinstance(proxy, LazyProxy):
+        return object.__getattribute__(proxy, "_instance") is not None
+    return True
+
+
+def reset(proxy: LazyProxy) -> None:
+    """Сбрасывает объект прокси: следующее обращение создаст новый"""
+    object.__setattr__(proxy, "_instance", None)
+
+
+def replace(proxy: LazyProxy[T], instance: T) -> T | None:
+    """Подменяет объект прокси и возвращает прежний (None, если не создан)"""
+    previous = object.__getattribute__(proxy, "_instance")
+    object.__setattr__(proxy, "_instance", instance)
+    return previous
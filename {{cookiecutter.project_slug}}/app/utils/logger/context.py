@@ -1,21 +1,105 @@
 """Модуль в котором написана реализация контекста, например, для использования в логировании"""
-from collections import ChainMap
+import functools
+from collections.abc import Callable, Iterator, Mapping
 from contextlib import contextmanager
 from contextvars import ContextVar
-from typing import Any
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+
+class ContextSnapshot(Mapping[str, str]):
+    """
+    Неизменяемый плоский снимок контекста.
+
+    Глобальные и локальные значения уже слиты в один словарь,
+    поэтому поиск занимает O(1) при любой вложенности tmp_context.
+    Изменения создают новый снимок (copy-on-write).
+    Значения хранятся как есть и приводятся к строке
+    при первом чтении.
+    """
+
+    __slots__ = ("_globals", "_locals", "_values", "_strings")
+
+    def __init__(
+        self,
+        globals_: Mapping[str, Any] | None = None,
+        locals_: Mapping[str, Any] | None = None,
+    ):
+        self._globals = dict(globals_ or {})
+        self._locals = dict(locals_ or {})
+        self._values = self._globals | self._locals
+        self._strings: dict[str, str] = {}
+
+    def __getitem__(self, key: str) -> str:
+        if (string := self._strings.get(key)) is None:
+            string = self._strings[key] = str(self._values[key])
+        return string
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._values!r})"
+
+    def __reduce__(self):
+        return type(self), (self.to_dict(), {})
+
+    def raw(self, key: str, default: Any = None) -> Any:
+        """Значение без приведения к строке"""
+        return self._values.get(key, default)
+
+    def to_dict(self) -> dict[str, str]:
+        """Строковые значения контекста, пригодные для передачи"""
+        return {key: self[key] for key in self._values}
+
+    def with_globals(self, values: Mapping[str, Any]) -> "ContextSnapshot":
+        """Копия с изменёнными глобальными значениями"""
+        return ContextSnapshot(self._globals | dict(values), self._locals)
+
+    def with_locals(self, values: Mapping[str, Any]) -> "ContextSnapshot":
+        """Копия с добавленными локальными значениями"""
+        return ContextSnapshot(self._globals, self._locals | dict(values))
+
+    def with_locals_of(self, other: "ContextSnapshot") -> "ContextSnapshot":
+        """Копия с глобальными значениями self и локальными - other"""
+        return ContextSnapshot(self._globals, other._locals)
+
+
+_EMPTY = ContextSnapshot()
+
+
+class _ContextualCall:
+    """
+    Вызов функции в контексте снимка.
+
+    Сериализуется pickle вместе со строковыми значениями снимка,
+    поэтому подходит и для пулов процессов.
+    """
+
+    def __init__(self, func: Callable[..., Any], snapshot: ContextSnapshot):
+        self._func = func
+        self._snapshot = snapshot
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        with CONTEXT.restore(self._snapshot):
+            return self._func(*args, **kwargs)
+
+    def __reduce__(self):
+        return type(self), (self._func, self._snapshot)
 
 
 class _ContextManager:
-    _context: ContextVar[ChainMap] = ContextVar("_context")
+    _context: ContextVar[ContextSnapshot] = ContextVar("_context")
 
     @property
-    def context(self) -> ChainMap:
+    def context(self) -> ContextSnapshot:
         """Общий контекст"""
-        if (context := self._context.get(None)) is not None:
-            return context
-        context = ChainMap()
-        self._context.set(context)
-        return context
+        return self._context.get(_EMPTY)
 
     def get(self, key: str, default: Any = None) -> str:
         """Получаем значение из общего контекста(включая локальные)"""
@@ -23,8 +107,7 @@ class _ContextManager:
 
     def update(self, **kwargs):
         """Обновить глобальный контекст"""
-        kwargs = {key: str(value) for key, value in kwargs.items()}
-        self.context.maps[-1].update(kwargs)
+        self._context.set(self.context.with_globals(kwargs))
 
     @contextmanager
     def tmp_context(self, **extra):
@@ -33,14 +116,38 @@ class _ContextManager:
         Все изменения сделанные в него будут отменены после закрытия контекст менеджера
         """
         parent_context = self.context
-        now_context = parent_context.new_child(
-            {key: str(value) for key, value in extra.items()}
-        )
+        now_context = parent_context.with_locals(extra)
         self._context.set(now_context)
         try:
             yield now_context
         finally:
-            self._context.set(parent_context)
+            # глобальные изменения внутри локального контекста сохраняются
+            self._context.set(self.context.with_locals_of(parent_context))
+
+    def snapshot(self) -> ContextSnapshot:
+        """Текущий контекст для передачи в другой поток, процесс или очередь"""
+        return self.context
+
+    @contextmanager
+    def restore(self, snapshot: ContextSnapshot | Mapping[str, Any]):
+        """Выполняет блок в контексте снимка (или словаря значений)"""
+        if not isinstance(snapshot, ContextSnapshot):
+            snapshot = ContextSnapshot(snapshot)
+        token = self._context.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            self._context.reset(token)
+
+    def wrap(self, func: Callable[..., _T]) -> Callable[..., _T]:
+        """
+        Привязывает к функции текущий контекст.
+
+        Пример использования:
+        await run_in_threadpool(CONTEXT.wrap(func))
+        executor.submit(CONTEXT.wrap(func), *args)
+        """
+        return _ContextualCall(func, self.snapshot())
 
     def __getitem__(self, key: str) -> str:
         """Получаем значение из общего контекста(включая локальные)"""
@@ -48,7 +155,7 @@ class _ContextManager:
 
     def __setitem__(self, key: str, value: Any) -> None:
         """Изменяем глобальный контекст"""
-        self.context.maps[-1][key] = str(value)
+        self.update(**{key: value})
 
 
 CONTEXT = _ContextManager()
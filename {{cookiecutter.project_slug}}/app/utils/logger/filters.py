@@ -0,0 +1,125 @@
+"""
+Прореживание логов горячих участков кода.
+
+Во время сбоя повторные попытки и периодические задачи могут писать
+тысячи одинаковых строк в секунду. SamplingFilter пропускает
+заданную долю записей логгера или шаблона сообщения и ограничивает
+число одинаковых сообщений за период. Число подавленных сообщений
+дописывается к первому такому же сообщению следующего периода.
+"""
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+MAX_TRACKED_MESSAGES = 10_000
+
+MessageKey = tuple[str, int, str]
+
+
+class _Window:
+    """Счётчики одинаковых сообщений за текущий период"""
+
+    __slots__ = ("started_at", "count", "suppressed")
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.count = 0
+        self.suppressed = 0
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Фильтр, прореживающий записи.
+
+    rates - доля пропускаемых записей по шаблону сообщения
+    или имени логгера (действует и для дочерних логгеров),
+    rate - доля для остальных записей.
+    rate_limit - сколько одинаковых сообщений (логгер, уровень, шаблон)
+    пропускается за period секунд, 0 - без ограничения.
+
+    Пример конфигурации для logging.config.dictConfig:
+    "sampling": {
+        "()": "app.utils.logger.filters.SamplingFilter",
+        "rates": {"sqlalchemy.engine": 0.01, "Request failed: %s": 0.1},
+        "rate_limit": 100,
+        "period": 60,
+    }
+    """
+
+    def __init__(
+        self,
+        rates: Mapping[str, float] | None = None,
+        rate: float = 1.0,
+        rate_limit: int = 0,
+        period: float = 60.0,
+    ):
+        super().__init__()
+        self._rates = dict(rates or {})
+        self._rate = rate
+        self._rate_limit = rate_limit
+        self._period = period
+        self._logger_rates: dict[str, float] = {}
+        self._windows: OrderedDict[MessageKey, _Window] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        template = record.msg if isinstance(record.msg, str) else None
+        rate = self._rates.get(template) if template else None
+        if rate is None:
+            rate = self._logger_rate(record.name)
+        if rate < 1.0 and random.random() >= rate:
+            return False
+        if not self._rate_limit:
+            return True
+
+        key = (record.name, record.levelno, template or record.getMessage())
+        with self._lock:
+            suppressed = self._count(key, time.monotonic())
+        if suppressed is None:
+            return False
+        if suppressed:
+            record.msg = (
+                f"{record.getMessage()} (suppressed {suppressed} "
+                f"similar messages in the last {self._period:g} s)"
+            )
+            record.args = None
+            record.suppressed = suppressed
+        return True
+
+    def _logger_rate(self, name: str) -> float:
+        """Доля для логгера: своя или ближайшего родителя из rates"""
+        if (rate := self._logger_rates.get(name)) is not None:
+            return rate
+        rate = self._rate
+        parts = name.split(".")
+        for index in range(len(parts), 0, -1):
+            if (parent := ".".join(parts[:index])) in self._rates:
+                rate = self._rates[parent]
+                break
+        self._logger_rates[name] = rate
+        return rate
+
+    def _count(self, key: MessageKey, now: float) -> int | None:
+        """
+        Учитывает сообщение в окне.
+
+        Возвращает None, если сообщение нужно подавить, иначе -
+        сколько таких сообщений подавлено в предыдущем окне.
+        """
+        window = self._windows.get(key)
+        suppressed = 0
+        if window is None or now - window.started_at >= self._period:
+            suppressed = window.suppressed if window is not None else 0
+            window = self._windows[key] = _Window(now)
+            if len(self._windows) > MAX_TRACKED_MESSAGES:
+                self._windows.popitem(last=False)
+        self._windows.move_to_end(key)
+
+        if window.count >= self._rate_limit:
+            window.suppressed += 1
+            return None
+        window.count += 1
+        return suppressed
@@ -0,0 +1,81 @@
+"""
+Структурированные логи в JSON.
+
+Каждая запись - одна строка JSON с временем, уровнем, сообщением,
+местом вызова, полями CONTEXT, переданными extra полями и исключением.
+Сборщику логов не нужно разбирать их регулярными выражениями.
+"""
+import datetime
+import logging
+from typing import Any
+
+from app.utils.logger.context import CONTEXT
+from app.utils.serialization import default, dumps
+
+# Атрибуты, которые есть у любой записи; остальные пришли через extra
+RECORD_ATTRIBUTES = frozenset(
+    logging.makeLogRecord({}).__dict__.keys()
+    | {"message", "asctime", "context", "taskName"}
+)
+
+
+def _default(obj: Any) -> Any:
+    try:
+        return default(obj)
+    except TypeError:
+        return str(obj)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Сохраняет в записи снимок CONTEXT.
+
+    Фильтр выполняется в потоке, создавшем запись, поэтому контекст
+    попадает в запись и тогда, когда её форматирует фоновый поток.
+    Записи ContextLoggerAdapter уже содержат контекст.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "context"):
+            record.context = CONTEXT.snapshot()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись в строку JSON.
+
+    Значения контекста и extra полей сериализуются как есть,
+    без повторного приведения к строке.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = dict(getattr(record, "context", None) or {})
+        payload.update(
+            (key, value)
+            for key, value in record.__dict__.items()
+            if key not in RECORD_ATTRIBUTES
+        )
+        payload.update(
+            {
+                "timestamp": datetime.datetime.fromtimestamp(
+                    record.created, datetime.timezone.utc
+                ),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                "module": record.module,
+                "function": record.funcName,
+                "line": record.lineno,
+                "process": record.process,
+                "uptime_ms": round(record.relativeCreated, 3),
+            }
+        )
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return dumps(payload, default_=_default).decode()
@@ -0,0 +1,159 @@
+"""
+Неблокирующая запись логов.
+
+Обработчик кладёт записи в ограниченную очередь, а пишет их
+в целевой обработчик (например, StreamHandler в stdout) фоновый поток.
+Если вывод не успевает и очередь заполнена, записи отбрасываются
+по выбранной политике и подсчитываются, но цикл событий не ждёт.
+
+Пример конфигурации обработчика для logging.config.dictConfig:
+"console": {
+    "()": "app.utils.logger.handlers.QueuedHandler",
+    "target": {
+        "class": "logging.StreamHandler",
+        "stream": "ext://sys.stdout",
+    },
+    "queue_size": 10000,
+    "overflow": "drop_new",
+    "formatter": "console",
+}
+"""
+import copy
+import importlib
+import logging
+import queue
+import threading
+import weakref
+from enum import Enum
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+DEFAULT_QUEUE_SIZE = 10_000
+
+_handlers: "weakref.WeakSet[QueuedHandler]" = weakref.WeakSet()
+
+
+class Overflow(Enum):
+    """Что делать с записью, если очередь заполнена"""
+
+    # отбросить новую запись
+    DROP_NEW = "drop_new"
+    # вытеснить самую старую запись в очереди
+    DROP_OLDEST = "drop_oldest"
+
+
+def _build_handler(config: dict[str, Any]) -> logging.Handler:
+    """Создаёт обработчик по конфигурации вида {"class": ..., **kwargs}"""
+    kwargs = {key: config[key] for key in config if key != "class"}
+    module_name, _, class_name = config["class"].rpartition(".")
+    handler_class = getattr(importlib.import_module(module_name), class_name)
+    return handler_class(**kwargs)
+
+
+class _Listener(QueueListener):
+    """Поток, передающий записи из очереди целевому обработчику"""
+
+    def __init__(self, queue_: queue.Queue, handler: "QueuedHandler"):
+        super().__init__(queue_, handler.target, respect_handler_level=True)
+        # для put: self.queue объявлен в QueueListener протоколом
+        self._queue = queue_
+        self._owner = handler
+        self._reported_dropped = 0
+
+    def enqueue_sentinel(self):
+        # при остановке дожидаемся места в очереди, чтобы ничего не потерять
+        self._queue.put(self._sentinel)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        if (dropped := self._owner.dropped) > self._reported_dropped:
+            self._report_dropped(dropped - self._reported_dropped)
+            self._reported_dropped = dropped
+        super().handle(record)
+
+    def _report_dropped(self, count: int) -> None:
+        super().handle(
+            logging.makeLogRecord(
+                {
+                    "name": __name__,
+                    "levelno": logging.WARNING,
+                    "levelname": logging.getLevelName(logging.WARNING),
+                    "msg": "%s log records dropped: queue is full",
+                    "args": (count,),
+                }
+            )
+        )
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Обработчик, передающий записи целевому через ограниченную очередь.
+
+    Форматтер, назначенный этому обработчику, применяется в фоновом
+    потоке целевым обработчиком. Уровень проверяется сразу,
+    поэтому отключённые записи в очередь не попадают.
+    """
+
+    def __init__(
+        self,
+        target: dict[str, Any] | logging.Handler,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow: Overflow | str = Overflow.DROP_NEW,
+    ):
+        # self.queue в QueueHandler объявлен протоколом без get_nowait
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        super().__init__(self._queue)
+        self.target = (
+            target
+            if isinstance(target, logging.Handler)
+            else _build_handler(target)
+        )
+        self.overflow = Overflow(overflow)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._listener = _Listener(self._queue, self)
+        self._listener.start()
+        self._stopped = False
+        _handlers.add(self)
+
+    def setFormatter(self, fmt: logging.Formatter | None) -> None:
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Подставляет аргументы в сообщение сразу: изменяемые аргументы
+        могут поменяться, пока запись ждёт в очереди.
+        Форматирование остаётся фоновому потоку.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self._queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow is Overflow.DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass
+        with self._dropped_lock:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Дописывает записи из очереди и закрывает целевой обработчик"""
+        if not self._stopped:
+            self._stopped = True
+            self._listener.stop()
+        self.target.close()
+        super().close()
+
+
+def dropped_records() -> int:
+    """Сколько записей отброшено всеми обработчиками процесса"""
+    return sum(handler.dropped for handler in _handlers)
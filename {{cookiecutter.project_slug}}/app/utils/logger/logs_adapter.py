@@ -0,0 +1,28 @@
+"""Логгер приложения, дополняющий записи текущим контекстом"""
+import logging
+from collections.abc import MutableMapping
+from typing import Any
+
+from app.utils.logger.context import CONTEXT
+
+LOGGER_NAME = "register-manager"
+
+
+class ContextLoggerAdapter(logging.LoggerAdapter):
+    """
+    Добавляет в запись лога снимок CONTEXT на момент вызова.
+    Снимок неизменяем, поэтому не копируется.
+
+    Адаптер вызывает process только для включённых уровней,
+    поэтому для отключённых уровней контекст не копируется.
+    """
+
+    def process(
+        self, msg: Any, kwargs: MutableMapping[str, Any]
+    ) -> tuple[Any, MutableMapping[str, Any]]:
+        extra = kwargs.get("extra") or {}
+        kwargs["extra"] = {"context": CONTEXT.snapshot()} | extra
+        return msg, kwargs
+
+
+logger = ContextLoggerAdapter(logging.getLogger(LOGGER_NAME), {})
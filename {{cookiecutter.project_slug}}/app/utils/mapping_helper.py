@@ -2,12 +2,13 @@
 Содержит вспомогательные функции/классы для работы с маппингами
 """
 # pylint: disable = too-few-public-methods, invalid-name
-import json
 from collections.abc import Mapping, Sequence
 from typing import Any
 
 from pydantic.utils import GetterDict
 
+from app.utils.serialization import dumps_str
+
 
 class GetterSetterDict(GetterDict):
     """
@@ -61,4 +62,4 @@ def first(list_: Sequence | None) -> Any | None:
 
 def prettify(data: Mapping | Sequence, indent: int = 2) -> str:
     """Отображает вложенные данные с отступами и отсортированные"""
-    return json.dumps(data, sort_keys=True, indent=indent, ensure_ascii=False)
+    return dumps_str(data, sort_keys=True, indent=indent)
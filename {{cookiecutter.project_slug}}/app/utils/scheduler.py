@@ -0,0 +1,421 @@
+"""
+Планировщик периодических задач.
+
+Время запусков считается от расписания, а не от конца предыдущего
+запуска, поэтому оно не сдвигается на время работы задачи.
+Расписание задаётся интервалом (IntervalTrigger) или выражением
+cron (CronTrigger). Случайная задержка jitter разносит запуски
+реплик во времени, а max_instances ограничивает число одновременно
+выполняемых экземпляров задачи: лишний запуск пропускается.
+При остановке приложения циклы задач отменяются, а выполняющиеся
+экземпляры дожидаются завершения.
+
+Пример использования:
+scheduler.add_job(cleanup, CronTrigger("*/15 * * * *", jitter=30))
+scheduler.start()
+...
+await scheduler.shutdown()
+"""
+import asyncio
+import dataclasses
+import datetime
+import math
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+from redis.asyncio import RedisError
+
+from app.repository.redis.lock import LeaderLock
+from app.utils import executors
+from app.utils.logger.context import CONTEXT
+from app.utils.logger.logs_adapter import logger
+from app.utils.tracing import tracer
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+}
+# Дальше этого срока выражение cron считается не срабатывающим никогда
+CRON_SEARCH_YEARS = 5
+
+
+class IntervalTrigger:
+    """
+    Запуск каждые seconds секунд.
+
+    Первый запуск - сразу. Пропущенные запуски (например, пока
+    процесс не был лидером) схлопываются в один, сетка расписания
+    при этом сохраняется.
+    """
+
+    def __init__(self, seconds: float, jitter: float = 0.0):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive.")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def next_fire(self, last: float | None, now: float) -> float:
+        """Время следующего запуска по времени предыдущего"""
+        if last is None:
+            return now
+        if (fire_at := last + self.seconds) >= now:
+            return fire_at
+        return last + math.floor((now - last) / self.seconds) * self.seconds
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.seconds!r})"
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> frozenset[int]:
+    """Значения поля cron: *, 5, 1-5, */15, 1-30/2 и их списки"""
+    values: set[int] = set()
+    for part in field.split(","):
+        range_, has_step, step_ = part.partition("/")
+        step = int(step_) if has_step else 1
+        if range_ == "*":
+            start, end = low, high
+        elif "-" in range_:
+            start, end = (int(value) for value in range_.split("-", 1))
+        else:
+            start = int(range_)
+            end = high if has_step else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron field: {field!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronTrigger:
+    """
+    Запуск по выражению cron: минута, час, день месяца, месяц,
+    день недели (0 и 7 - воскресенье).
+
+    Как и в cron, если заданы и день месяца, и день недели,
+    достаточно совпадения одного из них. Пропущенные запуски
+    схлопываются в один немедленный.
+    """
+
+    def __init__(
+        self,
+        expression: str,
+        jitter: float = 0.0,
+        timezone: datetime.tzinfo = datetime.timezone.utc,
+    ):
+        self.expression = expression
+        self.jitter = jitter
+        self.timezone = timezone
+        fields = CRON_ALIASES.get(expression, expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression: {expression!r}")
+        self._minutes = _parse_cron_field(fields[0], 0, 59)
+        self._hours = _parse_cron_field(fields[1], 0, 23)
+        self._days = _parse_cron_field(fields[2], 1, 31)
+        self._months = _parse_cron_field(fields[3], 1, 12)
+        self._weekdays = frozenset(
+            day % 7 for day in _parse_cron_field(fields[4], 0, 7)
+        )
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _day_matches(self, moment: datetime.datetime) -> bool:
+        day = moment.day in self._days
+        weekday = (moment.weekday() + 1) % 7 in self._weekdays
+        if self._any_day:
+            return weekday
+        if self._any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, timestamp: float) -> float:
+        """Ближайшее время запуска строго после timestamp"""
+        moment = datetime.datetime.fromtimestamp(
+            timestamp, self.timezone
+        ).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        last_year = moment.year + CRON_SEARCH_YEARS
+        while moment.year <= last_year:
+            if moment.month not in self._months:
+                moment = (
+                    moment.replace(day=1, hour=0, minute=0)
+                    + datetime.timedelta(days=32)
+                ).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(
+                    hour=0, minute=0
+                ) + datetime.timedelta(days=1)
+            elif moment.hour not in self._hours:
+                moment = moment.replace(minute=0) + datetime.timedelta(
+                    hours=1
+                )
+            elif moment.minute not in self._minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def next_fire(self, last: float | None, now: float) -> float:
+        """Время следующего запуска по времени предыдущего"""
+        if last is None:
+            return self.next_after(now)
+        return max(self.next_after(last), now)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.expression!r})"
+
+
+Trigger = IntervalTrigger | CronTrigger
+
+
+@dataclasses.dataclass
+class JobStats:
+    """Метрики запусков задачи, длительности в секундах"""
+
+    runs: int = 0
+    failures: int = 0
+    # запуски, пропущенные из-за max_instances
+    skipped: int = 0
+    last_started_at: float | None = None
+    # опоздание последнего запуска относительно расписания
+    last_lag: float = 0.0
+    last_duration: float = 0.0
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    last_error: str | None = None
+
+    @property
+    def mean_duration(self) -> float:
+        """Средняя длительность запуска"""
+        return self.total_duration / self.runs if self.runs else 0.0
+
+
+class Job:
+    """Задача планировщика"""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        func: Callable[[], Any],
+        trigger: Trigger,
+        max_instances: int = 1,
+        leader_lock: str | None = None,
+        lock_ttl: float = 15.0,
+        executor: executors.ExecutorPool | None = None,
+    ):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.max_instances = max_instances
+        self.leader_lock = leader_lock
+        self.lock_ttl = lock_ttl
+        self.executor = executor
+        self.stats = JobStats()
+        self.running: set[asyncio.Task] = set()
+        self._jitter: tuple[float, float] = (math.nan, 0.0)
+
+    def fire_time(self, due: float) -> float:
+        """Время запуска с jitter, постоянным для каждого due"""
+        if self._jitter[0] != due:
+            self._jitter = (due, random.uniform(0, self.trigger.jitter))
+        return due + self._jitter[1]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r}, {self.trigger!r})"
+
+
+async def _last_run(lock: LeaderLock) -> float | None:
+    """
+    Время последнего запуска по расписанию, сохранённое в Redis
+    любым лидером
+    """
+    try:
+        last_run = await lock.redis.get(f"{lock.key}:last_run")
+    except RedisError as exc:
+        logger.warning("Last run of %s is unknown: %s", lock.name, exc)
+        return None
+    return float(last_run) if last_run is not None else None
+
+
+async def _mark_run(lock: LeaderLock, due: float, ttl: float) -> None:
+    try:
+        await lock.redis.set(
+            f"{lock.key}:last_run", due, ex=max(int(ttl), 1)
+        )
+    except RedisError as exc:
+        logger.warning("Last run of %s is not saved: %s", lock.name, exc)
+
+
+class Scheduler:
+    """
+    Запускает задачи по расписанию в цикле событий процесса.
+
+    Задачи с leader_lock выполняются только в процессе, держащем
+    аренду Redis с этим именем, то есть один раз на все реплики.
+    Резервный процесс забирает аренду примерно через lock_ttl после
+    смерти лидера и продолжает расписание с последнего запуска.
+    Синхронные функции выполняются в executor задачи,
+    по умолчанию - в общем пуле приложения.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+        self._loops: dict[str, asyncio.Task] = {}
+        self._started = False
+
+    @property
+    def jobs(self) -> list[Job]:
+        """Зарегистрированные задачи"""
+        return list(self._jobs.values())
+
+    def add_job(  # pylint: disable=too-many-arguments
+        self,
+        func: Callable[[], Any],
+        trigger: Trigger,
+        name: str | None = None,
+        max_instances: int = 1,
+        leader_lock: str | None = None,
+        lock_ttl: float = 15.0,
+        executor: executors.ExecutorPool | None = None,
+    ) -> Job:
+        """
+        Регистрирует задачу. Если планировщик запущен,
+        задача сразу начинает выполняться.
+
+        Имя задачи по умолчанию - модуль и полное имя функции.
+        """
+        name = name or f"{func.__module__}.{func.__qualname__}"
+        if name in self._jobs:
+            raise ValueError(f"Job {name!r} is already scheduled.")
+        job = self._jobs[name] = Job(
+            name, func, trigger, max_instances, leader_lock, lock_ttl, executor
+        )
+        if self._started:
+            self._start_job(job)
+        return job
+
+    def scheduled(self, trigger: Trigger, **kwargs: Any) -> Callable:
+        """Декоратор, регистрирующий функцию как задачу"""
+
+        def decorator(func: Callable) -> Callable:
+            self.add_job(func, trigger, **kwargs)
+            return func
+
+        return decorator
+
+    def start(self) -> None:
+        """Запускает циклы всех задач; вызывается в цикле событий"""
+        self._started = True
+        for job in self._jobs.values():
+            if job.name not in self._loops:
+                self._start_job(job)
+
+    async def shutdown(self, timeout: float = 10.0) -> None:
+        """
+        Отменяет циклы задач и ждёт выполняющиеся экземпляры
+        не дольше timeout секунд, оставшиеся отменяются
+        """
+        self._started = False
+        loops = list(self._loops.values())
+        self._loops.clear()
+        for loop in loops:
+            loop.cancel()
+        await asyncio.gather(*loops, return_exceptions=True)
+
+        running = {task for job in self._jobs.values() for task in job.running}
+        if not running:
+            return
+        _, pending = await asyncio.wait(running, timeout=timeout)
+        for task in pending:
+            logger.warning("Job %s cancelled on shutdown", task.get_name())
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> dict[str, JobStats]:
+        """Метрики запусков по именам задач"""
+        return {name: job.stats for name, job in self._jobs.items()}
+
+    def _start_job(self, job: Job) -> None:
+        if job.leader_lock is None:
+            loop = self._loop(job)
+        else:
+            lock = LeaderLock(job.leader_lock, job.lock_ttl)
+            loop = self._leader_loop(job, lock)
+        self._loops[job.name] = asyncio.create_task(
+            loop, name=f"scheduler:{job.name}"
+        )
+
+    async def _loop(self, job: Job) -> None:
+        last: float | None = None
+        while True:
+            due = last = job.trigger.next_fire(last, time.time())
+            await asyncio.sleep(max(job.fire_time(due) - time.time(), 0))
+            self._launch(job, due)
+
+    async def _leader_loop(self, job: Job, lock: LeaderLock) -> None:
+        last: float | None = None
+        try:
+            while True:
+                if not await lock.ensure():
+                    await asyncio.sleep(lock.retry_interval)
+                    continue
+                if (shared_last := await _last_run(lock)) is not None:
+                    last = (
+                        shared_last if last is None else max(last, shared_last)
+                    )
+                now = time.time()
+                due = job.trigger.next_fire(last, now)
+                if (delay := job.fire_time(due) - now) > 0:
+                    await asyncio.sleep(min(delay, lock.retry_interval))
+                    continue
+
+                with CONTEXT.tmp_context(fencing_token=lock.fencing_token):
+                    self._launch(job, due)
+                last = due
+                if lock.is_leader:
+                    ttl = (job.trigger.next_fire(due, due) - due) * 2
+                    await _mark_run(lock, due, ttl)
+        finally:
+            await lock.release()
+
+    def _launch(self, job: Job, due: float) -> None:
+        """Запускает экземпляр задачи, если не превышен max_instances"""
+        if len(job.running) >= job.max_instances:
+            job.stats.skipped += 1
+            logger.warning(
+                "Job %s skipped: %s instances are still running",
+                job.name,
+                len(job.running),
+            )
+            return
+        task = asyncio.create_task(self._run(job, due), name=job.name)
+        job.running.add(task)
+        task.add_done_callback(job.running.discard)
+
+    @staticmethod
+    async def _run(job: Job, due: float) -> None:
+        stats = job.stats
+        stats.runs += 1
+        stats.last_started_at = time.time()
+        stats.last_lag = max(stats.last_started_at - due, 0.0)
+        started_at = time.monotonic()
+        try:
+            with tracer.span(f"job.{job.name}"):
+                if asyncio.iscoroutinefunction(job.func):
+                    await job.func()
+                else:
+                    await (job.executor or executors.executor).run(job.func)
+        except Exception as exc:  # pylint: disable=broad-except
+            stats.failures += 1
+            stats.last_error = repr(exc)
+            logger.error("Scheduled job %s failed: %s", job.name, exc)
+        finally:
+            duration = time.monotonic() - started_at
+            stats.last_duration = duration
+            stats.total_duration += duration
+            stats.max_duration = max(stats.max_duration, duration)
+
+
+scheduler = Scheduler()
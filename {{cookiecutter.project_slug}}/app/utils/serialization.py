@@ -0,0 +1,88 @@
+"""
+Сериализация JSON для всего приложения.
+
+Если установлен orjson, используется он: кодирование и разбор
+больших ответов в разы дешевле. Иначе - стандартный json
+с тем же поведением: UTF-8 без экранирования, компактный вывод,
+datetime/date/time в ISO 8601, UUID и Decimal - строками,
+Enum - значением, pydantic модели - словарём.
+"""
+import dataclasses
+import datetime
+import json
+from collections.abc import Callable
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+def default(obj: Any) -> Any:
+    """Приводит к JSON-совместимому виду типы, не известные кодировщику"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (UUID, Decimal)):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _orjson_dumps(
+    obj: Any,
+    sort_keys: bool = False,
+    indent: int | None = None,
+    default_: Callable[[Any], Any] = default,
+) -> bytes:
+    if indent not in (None, 2):
+        return _json_dumps(obj, sort_keys, indent, default_)
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=default_, option=option)
+
+
+def _json_dumps(
+    obj: Any,
+    sort_keys: bool = False,
+    indent: int | None = None,
+    default_: Callable[[Any], Any] = default,
+) -> bytes:
+    return json.dumps(
+        obj,
+        default=default_,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=indent,
+        separators=None if indent else (",", ":"),
+    ).encode()
+
+
+if orjson is not None:
+    dumps = _orjson_dumps
+    loads: Callable[[bytes | bytearray | memoryview | str], Any] = orjson.loads
+else:  # pragma: no cover
+    dumps = _json_dumps
+    loads = json.loads
+
+
+def dumps_str(
+    obj: Any, sort_keys: bool = False, indent: int | None = None
+) -> str:
+    """Сериализует объект в строку JSON"""
+    return dumps(obj, sort_keys, indent).decode()
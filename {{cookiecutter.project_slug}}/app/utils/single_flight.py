@@ -0,0 +1,40 @@
+"""
+Объединение одинаковых одновременных вызовов (single-flight).
+
+Пока вызов с некоторым ключом выполняется, повторные вызовы
+с тем же ключом не запускают работу заново,
+а дожидаются результата первого.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """
+    Реестр выполняющихся вызовов по ключу.
+
+    Отмена одного из ожидающих не отменяет общий вызов,
+    остальные получат его результат.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Выполняет func или присоединяется к уже идущему вызову с key"""
+        if (task := self._calls.get(key)) is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
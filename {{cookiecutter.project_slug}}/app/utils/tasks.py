@@ -1,42 +1,52 @@
 # pylint: disable=missing-module-docstring
-import asyncio
-from asyncio import ensure_future
 from collections.abc import Callable
 from functools import wraps
 
-from starlette.concurrency import run_in_threadpool
+from app.utils.executors import ExecutorPool
+from app.utils.scheduler import IntervalTrigger, scheduler
 
-from app.utils.logger.logs_adapter import logger
 
-
-def repeat(interval_seconds: float) -> Callable:
+def repeat(  # pylint: disable=too-many-arguments
+    interval_seconds: float,
+    leader_lock: str | None = None,
+    lock_ttl: float = 15.0,
+    jitter: float = 0.0,
+    max_instances: int = 1,
+    executor: ExecutorPool | None = None,
+) -> Callable:
     """
     This function returns a decorator that modifies a function so it is
-    periodically re-executed
+    periodically re-executed by the application scheduler.
+
+    Runs start every interval_seconds counted from the schedule, not from
+    the end of the previous run, delayed by a random 0..jitter seconds.
+    A run is skipped while max_instances previous runs are still going.
+    Sync functions run in executor, the application pool by default;
+    pass a process pool for CPU-bound work.
+
+    If leader_lock is given, the function runs only in the process holding
+    the Redis lease with that name, so every run happens once across all
+    replicas. A standby process takes the lease over within about lock_ttl
+    after the leader dies and keeps the schedule from the last run.
     """
 
     def decorator(func: Callable) -> Callable:
         """
-        Converts the decorated function into a repeated, periodically-called
-        version of itself.
+        Converts the decorated function into a coroutine that schedules
+        the periodic execution of the original one.
         """
-        is_coroutine = asyncio.iscoroutinefunction(func)
 
         @wraps(func)
         async def wrapped() -> None:
-            async def loop() -> None:
-                while True:
-                    try:
-                        if is_coroutine:
-                            await func()  # type: ignore
-                        else:
-                            await run_in_threadpool(func)
-                    except Exception as exc:  # pylint: disable=broad-except
-                        logger.error(exc)
-
-                    await asyncio.sleep(interval_seconds)
-
-            ensure_future(loop())
+            scheduler.add_job(
+                func,
+                IntervalTrigger(interval_seconds, jitter),
+                max_instances=max_instances,
+                leader_lock=leader_lock,
+                lock_ttl=lock_ttl,
+                executor=executor,
+            )
+            scheduler.start()
 
         return wrapped
 
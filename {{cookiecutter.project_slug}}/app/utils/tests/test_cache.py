@@ -0,0 +1,173 @@
+"""Тестирование модуля cache"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.repository.redis import invalidation
+from app.utils import cache
+from app.utils.cache import TTLCache, cached
+
+
+class FakeRedis:
+    """Redis, хранящий значения в словаре"""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+
+    async def publish(self, channel, message):
+        self.published.append(message)
+
+
+@pytest.fixture(name="redis")
+def fixture_redis(monkeypatch):
+    """Подменяет Redis общим для кэша и шины инвалидации"""
+    redis = FakeRedis()
+    manager = SimpleNamespace(started=True, client=redis)
+    monkeypatch.setattr(cache, "redis_manager", manager)
+    monkeypatch.setattr(invalidation, "redis_manager", manager)
+    monkeypatch.setattr(invalidation.local_caches, "_generations", {})
+    return redis
+
+
+def test_ttl_cache_lru():
+    """Вытесняется давно не использованная запись"""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_ttl_cache_expiration():
+    """Истёкшая запись не возвращается"""
+    cache = TTLCache()
+    cache.set("a", 1, ttl=0)
+
+    assert cache.get("a", "default") == "default"
+    assert not cache
+
+
+async def test_cached_single_flight():
+    """Одновременные вызовы с одними аргументами считаются один раз"""
+    calls = []
+
+    @cached(ttl=60, use_redis=False)
+    async def func(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    results = await asyncio.gather(*(func(1) for _ in range(10)))
+
+    assert results == [2] * 10
+    assert await func(2) == 4
+    assert calls == [1, 2]
+
+
+async def test_cached_invalidate():
+    """После invalidate значение пересчитывается"""
+    calls = []
+
+    @cached(ttl=60, beta=0, use_redis=False)
+    async def func(value):
+        calls.append(value)
+        return value
+
+    await func(1)
+    await func(1)
+    await func.invalidate(1)
+    await func(1)
+
+    assert calls == [1, 1]
+
+
+async def test_read_after_write_in_namespace(redis):
+    """После инвалидации пространства имён не читается и уровень Redis"""
+    rows = {"item": "old"}
+
+    @cached(ttl=60, beta=0, namespace="items")
+    async def get_item():
+        return rows["item"]
+
+    assert await get_item() == "old"
+    rows["item"] = "new"
+    assert await get_item() == "old"
+    await invalidation.invalidation_bus.publish("items")
+
+    assert await get_item() == "new"
+    assert redis.data["cache-generation:items"] == 1
+
+
+async def test_other_replica_reads_new_generation(redis):
+    """Реплика, получившая событие, не читает записи старого поколения"""
+    rows = {"item": "old"}
+
+    @cached(ttl=60, beta=0, namespace="items")
+    async def get_item():
+        return rows["item"]
+
+    assert await get_item() == "old"
+    # запись сделала другая реплика: поколение в Redis увеличено
+    rows["item"] = "new"
+    await redis.incr("cache-generation:items")
+    invalidation.invalidation_bus._apply(  # pylint: disable=protected-access
+        b'{"origin": "other", "namespace": "items", "generation": 1}'
+    )
+
+    assert await get_item() == "new"
+
+
+async def test_values_are_stored_as_json(redis):
+    """Значения хранятся в JSON, повреждённая запись - промах"""
+    calls = []
+
+    @cached(ttl=60, beta=0, local_ttl=0)
+    async def func(value):
+        calls.append(value)
+        return {"value": value}
+
+    assert await func(1) == {"value": 1}
+    (key,) = redis.data
+    assert redis.data[key].startswith(b'[{"value":1}')
+    redis.data[key] = b"\x80\x04corrupted"
+
+    assert await func(1) == {"value": 1}
+    assert calls == [1, 1]
+
+
+async def test_computed_value_matches_stored(redis):
+    """Посчитавший процесс получает значение того же типа, что и другие"""
+
+    @cached(ttl=60, beta=0)
+    async def func():
+        return {"items": (1, 2)}
+
+    computed = await func()
+    func.local.clear()
+
+    assert computed == await func() == {"items": [1, 2]}
@@ -0,0 +1,63 @@
+"""Тестирование контекста логирования"""
+import asyncio
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.logger.context import CONTEXT, ContextSnapshot
+
+
+def test_tmp_context_is_flat_and_restored():
+    """Локальные значения перекрывают глобальные до выхода из блока"""
+    with CONTEXT.restore({}):
+        CONTEXT.update(user="global", request_id=1)
+        with CONTEXT.tmp_context(user="local"):
+            with CONTEXT.tmp_context(step=2):
+                assert dict(CONTEXT.context) == {
+                    "user": "local",
+                    "request_id": "1",
+                    "step": "2",
+                }
+            # глобальное изменение внутри локального контекста сохраняется
+            CONTEXT["request_id"] = 2
+
+        assert dict(CONTEXT.context) == {"user": "global", "request_id": "2"}
+
+
+def test_snapshot_is_immutable():
+    """Снимок не меняется при последующих изменениях контекста"""
+    with CONTEXT.restore({"value": 1}):
+        snapshot = CONTEXT.snapshot()
+        CONTEXT.update(value=2)
+
+        assert snapshot["value"] == "1"
+        assert snapshot.raw("value") == 1
+        assert CONTEXT["value"] == "2"
+
+
+def test_wrap_propagates_into_threads():
+    """Обёрнутая функция видит контекст в пуле потоков"""
+    with CONTEXT.tmp_context(request_id="abc"):
+        func = CONTEXT.wrap(lambda: CONTEXT.get("request_id"))
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(func).result() == "abc"
+
+
+def test_snapshot_pickles_as_strings():
+    """Снимок передаётся в другой процесс строковыми значениями"""
+    snapshot = ContextSnapshot({"value": object()})
+
+    restored = pickle.loads(pickle.dumps(snapshot))
+
+    assert restored["value"] == snapshot["value"]
+
+
+async def test_tasks_do_not_share_updates():
+    """Изменения контекста в задаче не видны родителю"""
+    with CONTEXT.restore({"value": "parent"}):
+
+        async def child():
+            CONTEXT.update(value="child")
+            return CONTEXT["value"]
+
+        assert await asyncio.create_task(child()) == "child"
+        assert CONTEXT["value"] == "parent"
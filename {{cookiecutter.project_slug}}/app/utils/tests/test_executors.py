@@ -0,0 +1,83 @@
+"""Тестирование пулов для синхронных функций"""
+import asyncio
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.utils import executors, tasks
+from app.utils.executors import (
+    ExecutorPool,
+    available_cpus,
+    default_process_workers,
+)
+from app.utils.logger.context import CONTEXT
+from app.utils.scheduler import Scheduler
+
+process_pool = ExecutorPool("process", max_workers=1)
+
+
+def where(value):
+    """Объявлена на уровне модуля, чтобы передаваться в пул процессов"""
+    return value, CONTEXT.get("request_id"), os.getpid(), threading.get_ident()
+
+
+@tasks.repeat(60, executor=process_pool)
+def write_pid():
+    """Периодическая задача, атрибут модуля которой - обёртка repeat"""
+    Path(CONTEXT["pid_file"]).write_text(str(os.getpid()))
+
+
+@pytest.mark.parametrize("kind", ["inline", "thread", "process"])
+async def test_run_passes_arguments_and_context(kind):
+    """Функция получает аргументы и CONTEXT вызывающего кода"""
+    pool = ExecutorPool(kind, max_workers=2)
+    await pool.start()
+    try:
+        with CONTEXT.tmp_context(request_id="42"):
+            value, request_id, pid, thread = await pool.run(where, "value")
+    finally:
+        await pool.shutdown()
+
+    assert (value, request_id) == ("value", "42")
+    assert (pid != os.getpid()) is (kind == "process")
+    if kind != "process":
+        assert (thread == threading.get_ident()) is (kind == "inline")
+
+
+def test_process_workers_share_cpus(monkeypatch):
+    """Процессы пула делят ядра между воркерами uvicorn"""
+    monkeypatch.setattr("app.utils.executors.available_cpus", lambda: 8)
+
+    assert default_process_workers(0) == 1
+    assert default_process_workers(2) == 4
+    assert default_process_workers(16) == 1
+
+
+def test_cpus_without_affinity(monkeypatch, tmp_path):
+    """Без sched_getaffinity (macOS, Windows) считаются все процессоры"""
+    monkeypatch.delattr(os, "sched_getaffinity", raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 3)
+    monkeypatch.setattr(executors, "CGROUP_CPU_MAX", str(tmp_path / "none"))
+
+    assert available_cpus() == 3
+
+
+async def test_repeat_runs_in_process_pool(monkeypatch, tmp_path):
+    """Задача repeat под декоратором передаётся в пул процессов"""
+    scheduler = Scheduler()
+    monkeypatch.setattr(tasks, "scheduler", scheduler)
+    pid_file = tmp_path / "pid"
+    try:
+        with CONTEXT.tmp_context(pid_file=str(pid_file)):
+            await write_pid()
+        (job,) = scheduler.jobs
+        while not job.stats.runs or job.running:
+            await asyncio.sleep(0.01)
+    finally:
+        await scheduler.shutdown()
+        await process_pool.shutdown()
+
+    assert job.stats.failures == 0, job.stats.last_error
+    assert int(pid_file.read_text()) != os.getpid()
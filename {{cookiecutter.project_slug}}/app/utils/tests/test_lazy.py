@@ -0,0 +1,30 @@
+"""Тестирование модуля lazy"""
+from app.utils.lazy import LazyProxy, is_initialised, reset
+
+
+def test_lazy_proxy_creates_object_once():
+    """Объект создаётся при первом обращении и переиспользуется"""
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {"value": 1}
+
+    proxy = LazyProxy(factory)
+    assert not is_initialised(proxy)
+    assert not calls
+
+    assert proxy.get("value") == 1
+    assert proxy.copy() == {"value": 1}
+    assert is_initialised(proxy)
+    assert calls == [1]
+
+    reset(proxy)
+    assert proxy.get("value") == 1
+    assert calls == [1, 1]
+
+
+def test_lazy_proxy_call():
+    """Вызов прокси вызывает созданный объект"""
+    proxy = LazyProxy(lambda: len)
+    assert proxy([1, 2]) == 2
@@ -0,0 +1,40 @@
+"""Тестирование фильтра, прореживающего логи"""
+import logging
+
+from app.utils.logger.filters import SamplingFilter
+
+
+def make_record(name="app", msg="Request failed: %s", args=("timeout",)):
+    return logging.makeLogRecord(
+        {"name": name, "levelno": logging.WARNING, "msg": msg, "args": args}
+    )
+
+
+def test_rate_limit_and_summary(monkeypatch):
+    """Лишние одинаковые сообщения подавляются, их число сообщается позже"""
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    sampling = SamplingFilter(rate_limit=2, period=60)
+
+    passed = [sampling.filter(make_record()) for _ in range(5)]
+    other = sampling.filter(make_record(msg="Other message"))
+    now[0] = 61.0
+    record = make_record()
+
+    assert passed == [True, True, False, False, False]
+    assert other
+    assert sampling.filter(record)
+    assert record.suppressed == 3
+    assert "suppressed 3 similar messages" in record.getMessage()
+
+
+def test_sampling_by_logger_and_template(monkeypatch):
+    """Доля задаётся для логгера (и его потомков) или шаблона сообщения"""
+    monkeypatch.setattr("random.random", lambda: 0.5)
+    sampling = SamplingFilter(
+        rates={"sqlalchemy": 0.1, "Request failed: %s": 0.9}
+    )
+
+    assert not sampling.filter(make_record("sqlalchemy.engine", "SELECT"))
+    assert sampling.filter(make_record("sqlalchemy.engine"))
+    assert sampling.filter(make_record("app", "SELECT"))
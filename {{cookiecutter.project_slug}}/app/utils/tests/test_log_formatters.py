@@ -0,0 +1,56 @@
+"""Тестирование JSON форматтера логов"""
+import json
+import logging
+import sys
+
+from app.utils.logger.context import CONTEXT
+from app.utils.logger.formatters import ContextFilter, JsonFormatter
+
+
+def make_record(**extra):
+    return logging.makeLogRecord(
+        {
+            "name": "test",
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+            "msg": "message %s",
+            "args": (1,),
+        }
+        | extra
+    )
+
+
+def test_record_with_context_and_extra():
+    """В запись попадают поля контекста, extra поля и сообщение"""
+    record = make_record(user_id=42)
+    with CONTEXT.tmp_context(request_id="abc"):
+        ContextFilter().filter(record)
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert payload["message"] == "message 1"
+    assert payload["request_id"] == "abc"
+    assert payload["user_id"] == 42
+    assert payload["level"] == "INFO"
+    assert "timestamp" in payload and "uptime_ms" in payload
+
+
+def test_exception_is_formatted():
+    """Исключение сериализуется в поле exception"""
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record(exc_info=sys.exc_info())
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert "ValueError: boom" in payload["exception"]
+
+
+def test_standard_fields_win_over_context():
+    """Поля контекста не перезаписывают поля записи"""
+    record = make_record(context={"level": "fake", "message": "fake"})
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert (payload["level"], payload["message"]) == ("INFO", "message 1")
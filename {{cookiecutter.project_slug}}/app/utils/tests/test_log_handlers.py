@@ -0,0 +1,72 @@
+"""Тестирование неблокирующего обработчика логов"""
+import logging
+import threading
+
+from app.utils.logger.handlers import Overflow, QueuedHandler
+
+
+class BlockedHandler(logging.Handler):
+    """Обработчик, который пишет, только когда его отпустят"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.released.wait()
+        self.messages.append(self.format(record))
+
+
+def make_logger(handler):
+    logger = logging.getLogger(f"test-{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger
+
+
+def test_records_are_dropped_when_queue_is_full():
+    """Переполнение очереди не блокирует, записи считаются отброшенными"""
+    target = BlockedHandler()
+    handler = QueuedHandler(target, queue_size=2)
+    logger = make_logger(handler)
+
+    for index in range(10):
+        logger.info("message %s", index)
+    target.released.set()
+    handler.close()
+
+    assert 0 < handler.dropped <= 8
+    assert len(target.messages) == 10 - handler.dropped + 1
+    assert any("log records dropped" in message for message in target.messages)
+
+
+def test_drop_oldest_keeps_latest_records():
+    """При drop_oldest последняя запись сохраняется"""
+    target = BlockedHandler()
+    handler = QueuedHandler(
+        target, queue_size=2, overflow=Overflow.DROP_OLDEST
+    )
+    logger = make_logger(handler)
+
+    for index in range(10):
+        logger.info("message %s", index)
+    target.released.set()
+    handler.close()
+
+    assert target.messages[-1] == "message 9"
+
+
+def test_formatter_is_applied_to_target():
+    """Форматтер обработчика применяет целевой обработчик"""
+    target = BlockedHandler()
+    target.released.set()
+    handler = QueuedHandler(target)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    logger = make_logger(handler)
+
+    logger.warning("value %s", [1])
+    handler.close()
+
+    assert target.messages == ["WARNING value [1]"]
@@ -0,0 +1,140 @@
+"""Тестирование планировщика периодических задач"""
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.scheduler import CronTrigger, IntervalTrigger, Scheduler
+
+
+def timestamp(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def test_interval_keeps_schedule():
+    """Запуски идут по сетке, пропущенные схлопываются в один"""
+    trigger = IntervalTrigger(10)
+
+    assert trigger.next_fire(None, 100.0) == 100.0
+    assert trigger.next_fire(100.0, 103.0) == 110.0
+    assert trigger.next_fire(100.0, 135.0) == 130.0
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        ("*/15 * * * *", (2024, 1, 1, 10, 7), (2024, 1, 1, 10, 15)),
+        ("0 3 * * *", (2024, 1, 1, 3, 0), (2024, 1, 2, 3, 0)),
+        ("@monthly", (2024, 1, 15), (2024, 2, 1)),
+        # 2024-01-06 - суббота, следующее воскресенье - 7-е
+        ("30 9 * * 7", (2024, 1, 6), (2024, 1, 7, 9, 30)),
+        # день месяца или день недели (понедельник, 8-е)
+        ("0 0 10 * 1", (2024, 1, 6), (2024, 1, 8)),
+        ("0 0 29 2 *", (2024, 3, 1), (2028, 2, 29)),
+    ],
+)
+def test_cron_next_after(expression, after, expected):
+    """Ближайшее время запуска по выражению cron"""
+    trigger = CronTrigger(expression)
+
+    assert trigger.next_after(timestamp(*after)) == timestamp(*expected)
+
+
+@pytest.mark.parametrize(
+    "expression", ["* * * *", "60 * * * *", "*/0 * * * *", "0 0 30 2 *"]
+)
+def test_cron_invalid(expression):
+    """Некорректные и не срабатывающие выражения отклоняются"""
+    with pytest.raises(ValueError):
+        CronTrigger(expression).next_after(timestamp(2024, 1, 1))
+
+
+async def test_overlapping_runs_are_skipped():
+    """Запуск пропускается, пока выполняется предыдущий"""
+    scheduler = Scheduler()
+    release = asyncio.Event()
+
+    async def slow_job():
+        await release.wait()
+
+    job = scheduler.add_job(slow_job, IntervalTrigger(0.01))
+    scheduler.start()
+    await asyncio.sleep(0.1)
+    release.set()
+    await scheduler.shutdown()
+
+    assert job.stats.runs == 1
+    assert job.stats.skipped > 0
+    assert not job.running
+
+
+async def test_failures_are_counted_and_shutdown_cancels():
+    """Ошибки учитываются в метриках, зависшие задачи отменяются"""
+    scheduler = Scheduler()
+    cancelled = asyncio.Event()
+
+    async def failing_job():
+        raise RuntimeError("boom")
+
+    async def hanging_job():
+        try:
+            await asyncio.Event().wait()
+        finally:
+            cancelled.set()
+
+    failing = scheduler.add_job(failing_job, IntervalTrigger(60))
+    scheduler.add_job(hanging_job, IntervalTrigger(60))
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    await scheduler.shutdown(timeout=0.01)
+    stats = scheduler.stats()
+
+    assert failing.name == f"{__name__}.{failing_job.__qualname__}"
+    assert stats[failing.name].failures == 1
+    assert stats[failing.name].last_error == "RuntimeError('boom')"
+    assert cancelled.is_set()
+
+
+async def test_run_is_not_marked_without_lease(monkeypatch):
+    """Запуск не сохраняется в Redis, если аренда уже потеряна"""
+    saved = {}
+
+    async def get(key):
+        return saved.get(key)
+
+    async def set_(key, value, ex):
+        saved[key] = value
+
+    class LostLeaseLock:
+        """Аренда, истёкшая сразу после подтверждения лидерства"""
+
+        retry_interval = 0.01
+        fencing_token = None
+        is_leader = False
+
+        def __init__(self, name, ttl):
+            self.name = name
+            self.key = f"leader:{name}"
+            self.redis = SimpleNamespace(get=get, set=set_)
+
+        async def ensure(self):
+            return True
+
+        async def release(self):
+            pass
+
+    monkeypatch.setattr("app.utils.scheduler.LeaderLock", LostLeaseLock)
+    scheduler = Scheduler()
+    runs = []
+
+    async def job():
+        runs.append(True)
+
+    scheduler.add_job(job, IntervalTrigger(60), leader_lock="job")
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    await scheduler.shutdown()
+
+    assert runs == [True]
+    assert not saved
@@ -0,0 +1,68 @@
+"""Тестирование модуля serialization"""
+import datetime
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+
+import pytest
+from pydantic import BaseModel
+
+from app.utils import serialization
+from app.utils.serialization import dumps, dumps_str, loads
+
+
+class Color(Enum):
+    """Перечисление для сериализации"""
+
+    RED = "red"
+
+
+class Item(BaseModel):
+    """Модель для сериализации"""
+
+    name: str
+
+
+@pytest.fixture(name="dumps_impl", params=["orjson", "json"])
+def fixture_dumps_impl(request):
+    """Обе реализации: orjson (если установлен) и стандартный json"""
+    if request.param == "orjson":
+        if serialization.orjson is None:
+            pytest.skip("orjson is not installed")
+        return serialization._orjson_dumps  # pylint: disable=protected-access
+    return serialization._json_dumps  # pylint: disable=protected-access
+
+
+def test_native_types(dumps_impl):
+    """datetime, UUID, Decimal, Enum и модели кодируются одинаково"""
+    data = {
+        "at": datetime.datetime(2024, 1, 2, 3, 4, 5),
+        "day": datetime.date(2024, 1, 2),
+        "id": UUID("12345678-1234-5678-1234-567812345678"),
+        "price": Decimal("10.50"),
+        "color": Color.RED,
+        "item": Item(name="имя"),
+    }
+
+    assert loads(dumps_impl(data)) == {
+        "at": "2024-01-02T03:04:05",
+        "day": "2024-01-02",
+        "id": "12345678-1234-5678-1234-567812345678",
+        "price": "10.50",
+        "color": "red",
+        "item": {"name": "имя"},
+    }
+
+
+def test_compact_and_pretty():
+    """Компактный вывод по умолчанию, с отступами и сортировкой - по запросу"""
+    assert dumps({"b": 1, "a": "я"}) == '{"b":1,"a":"я"}'.encode()
+    assert dumps_str({"b": 2, "a": 1}, sort_keys=True, indent=2) == (
+        '{\n  "a": 1,\n  "b": 2\n}'
+    )
+
+
+def test_unknown_type():
+    """Неизвестный тип вызывает TypeError"""
+    with pytest.raises(TypeError):
+        dumps(object())
@@ -0,0 +1,79 @@
+"""Тестирование модуля single_flight"""
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_are_coalesced():
+    """Одновременные вызовы с одним ключом выполняются один раз"""
+    single_flight = SingleFlight()
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", func) for _ in range(10))
+    )
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert not single_flight
+
+
+async def test_different_keys_are_not_coalesced():
+    """Вызовы с разными ключами выполняются независимо"""
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0)
+        return object()
+
+    first, second = await asyncio.gather(
+        single_flight.do("first", func), single_flight.do("second", func)
+    )
+    assert first is not second
+
+
+async def test_error_is_shared_and_forgotten():
+    """Ошибку получают все ожидающие, следующий вызов выполняется заново"""
+    single_flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError
+
+    results = await asyncio.gather(
+        single_flight.do("key", fail),
+        single_flight.do("key", fail),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeed():
+        return 1
+
+    assert await single_flight.do("key", succeed) == 1
+
+
+async def test_waiter_cancellation_keeps_call():
+    """Отмена одного ожидающего не отменяет вызов для остальных"""
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        return 1
+
+    cancelled = asyncio.ensure_future(single_flight.do("key", func))
+    waiter = asyncio.ensure_future(single_flight.do("key", func))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiter == 1
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
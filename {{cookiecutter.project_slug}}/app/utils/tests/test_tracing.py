@@ -0,0 +1,111 @@
+"""Тестирование трассировки"""
+import json
+
+import pytest
+
+from app.utils.logger.context import CONTEXT
+from app.utils.tracing import (
+    BatchSpanProcessor,
+    FileExporter,
+    SpanKind,
+    Tracer,
+    inject,
+    parse_traceparent,
+)
+
+
+@pytest.fixture
+def traced(tmp_path):
+    tracer = Tracer()
+    path = tmp_path / "traces.jsonl"
+    tracer.configure(
+        BatchSpanProcessor(FileExporter(path), "test", export_interval=60),
+        sample_rate=1.0,
+    )
+    yield tracer, path
+    tracer.shutdown()
+
+
+def read_spans(path):
+    return [
+        span
+        for line in path.read_text().splitlines()
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+def test_spans_are_nested_and_exported(traced):
+    """Дочерний span наследует трассу, ids попадают в CONTEXT"""
+    tracer, path = traced
+
+    with tracer.span("GET /items", SpanKind.SERVER) as root:
+        with tracer.span("db.get", SpanKind.CLIENT) as child:
+            child.set_attribute("db.table", "items")
+            assert CONTEXT["span_id"] == child.span_id
+        headers = {}
+        inject(headers)
+    with pytest.raises(ValueError):
+        with tracer.span("failing"):
+            raise ValueError("boom")
+    tracer.shutdown()
+    spans = {span["name"]: span for span in read_spans(path)}
+
+    assert "span_id" not in CONTEXT.context
+    assert headers == {"traceparent": root.traceparent()}
+    assert spans["db.get"]["traceId"] == spans["GET /items"]["traceId"]
+    assert spans["db.get"]["parentSpanId"] == root.span_id
+    assert spans["db.get"]["attributes"] == [
+        {"key": "db.table", "value": {"stringValue": "items"}}
+    ]
+    assert "parentSpanId" not in spans["GET /items"]
+    assert spans["failing"]["status"] == {
+        "code": 2,
+        "message": "ValueError: boom",
+    }
+
+
+def test_unsampled_trace_records_nothing(traced, monkeypatch):
+    """Решение не записывать трассу распространяется на дочерние span'ы"""
+    tracer, path = traced
+    tracer.sample_rate = 0.0
+    incoming = "00-" + "a" * 32 + "-" + "b" * 16 + "-00"
+
+    with tracer.span("root") as root:
+        with tracer.span("child") as child:
+            child.set_attribute("ignored", True)
+    with tracer.span("remote", traceparent=incoming):
+        headers = {}
+        inject(headers)
+    tracer.shutdown()
+
+    assert not root.sampled and not child.sampled
+    assert headers == {"traceparent": incoming}
+    assert not path.exists()
+
+
+def test_span_ends_after_shutdown(traced):
+    """Span, открытый при выключении трассировки, закрывается без ошибок"""
+    tracer, path = traced
+
+    with tracer.span("long") as span:
+        tracer.shutdown()
+        span.set_attribute("after.shutdown", True)
+
+    assert not tracer.enabled
+    assert not path.exists()
+
+
+def test_parse_traceparent():
+    """Некорректные заголовки игнорируются"""
+    trace_id, span_id = "0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331"
+
+    assert parse_traceparent(f"00-{trace_id}-{span_id}-01") == (
+        trace_id,
+        span_id,
+        True,
+    )
+    assert parse_traceparent("00-abc-def-01") is None
+    assert parse_traceparent(f"00-{'z' * 32}-{span_id}-01") is None
+    assert parse_traceparent(None) is None
@@ -0,0 +1,490 @@
+"""
+Трассировка запросов внутри процесса.
+
+Span - именованный отрезок работы (запрос к БД, http-запрос, команда
+Redis) с временем начала и конца и атрибутами. Span'ы одного запроса
+объединены trace_id, который вместе с span_id попадает в CONTEXT,
+а значит и в логи. В исходящие http-запросы trace передаётся
+заголовком traceparent (W3C Trace Context).
+
+Решение о записи принимается один раз для всей трассы
+с вероятностью sample_rate. Для невыбранных трасс span - общий
+пустой объект, и трассировка стоит единицы микросекунд.
+
+Записанные span'ы пачками выгружаются фоновым потоком
+в формате OTLP/JSON: в коллектор OpenTelemetry по http
+или, если коллектора нет, построчно в файл.
+"""
+import functools
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections.abc import Callable, Mapping, MutableMapping
+from contextvars import ContextVar
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Protocol
+
+from app.utils.logger.context import CONTEXT
+from app.utils.logger.logs_adapter import logger
+from app.utils.serialization import dumps
+
+TRACEPARENT_HEADER = "traceparent"
+DEFAULT_QUEUE_SIZE = 2048
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_EXPORT_INTERVAL = 5.0
+
+
+class SpanKind(IntEnum):
+    """Тип span'а, коды как в OTLP"""
+
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+
+
+class Span:
+    """Записываемый span"""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "kind",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+        "_context",
+    )
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        tracer: "Tracer",
+        name: str,
+        kind: SpanKind,
+        trace_id: str,
+        parent_id: str | None,
+        attributes: dict[str, Any],
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: str | None = None
+
+    @property
+    def sampled(self) -> bool:
+        """Span записывается"""
+        return True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Добавляет атрибут span'а"""
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        """Значение заголовка traceparent для дочерних запросов"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self._context = CONTEXT.tmp_context(
+            trace_id=self.trace_id, span_id=self.span_id
+        )
+        self._context.__enter__()  # pylint: disable=unnecessary-dunder-call
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc_val is not None:
+            self.error = f"{exc_type.__name__}: {exc_val}"
+        self._context.__exit__(exc_type, exc_val, exc_tb)
+        _current_span.reset(self._token)
+        # трассировку могли выключить, пока span был открыт
+        if (processor := self.tracer.processor) is not None:
+            processor.on_end(self)
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Span в формате OTLP/JSON"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": int(self.kind),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": (
+                {"code": 2, "message": self.error}
+                if self.error
+                else {"code": 1}
+            ),
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NonRecordingSpan:
+    """
+    Span невыбранной трассы.
+
+    Ничего не записывает, но передаёт дальше решение не записывать
+    и, если трасса пришла извне, её идентификаторы.
+    """
+
+    __slots__ = ("trace_id", "span_id", "_token")
+
+    def __init__(self, trace_id: str = "", span_id: str = ""):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def sampled(self) -> bool:
+        """Span не записывается"""
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Атрибуты не записываются"""
+
+    def traceparent(self) -> str | None:
+        """Заголовок traceparent, если трасса пришла извне"""
+        if not self.trace_id:
+            return None
+        return f"00-{self.trace_id}-{self.span_id}-00"
+
+    def __enter__(self) -> "_NonRecordingSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        _current_span.reset(self._token)
+
+
+class _NoopSpan:
+    """Span внутри невыбранной трассы: не делает ничего"""
+
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Атрибуты не записываются"""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Span | _NonRecordingSpan | None] = ContextVar(
+    "_current_span", default=None
+)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Mapping[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+    ]
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """Разбирает traceparent: (trace_id, parent_id, sampled) или None"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class SpanExporter(Protocol):
+    """Получатель пачек завершённых span'ов"""
+
+    def export(self, payload: bytes) -> None:
+        ...
+
+
+class FileExporter:
+    """
+    Пишет пачки span'ов в файл, по одному OTLP/JSON запросу в строке.
+
+    Заменяет коллектор при локальной разработке; файл можно
+    переотправить в коллектор как есть.
+    """
+
+    def __init__(self, path: str | Path):
+        self._path = Path(path)
+
+    def export(self, payload: bytes) -> None:
+        with self._path.open("ab") as file:
+            file.write(payload + b"\n")
+
+
+class OtlpHttpExporter:
+    """Отправляет пачки span'ов в коллектор по OTLP/HTTP (JSON)"""
+
+    def __init__(self, endpoint: str, timeout: float = 10.0):
+        self._url = f"{endpoint.rstrip('/')}/v1/traces"
+        self._timeout = timeout
+
+    def export(self, payload: bytes) -> None:
+        request = urllib.request.Request(
+            self._url,
+            data=payload,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self._timeout):
+            pass
+
+
+class BatchSpanProcessor:
+    """
+    Копит завершённые span'ы в ограниченной очереди
+    и выгружает их пачками из фонового потока.
+
+    Если очередь заполнена, span'ы отбрасываются и подсчитываются:
+    трассировка не должна тормозить обработку запросов.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        exporter: SpanExporter,
+        service_name: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        export_interval: float = DEFAULT_EXPORT_INTERVAL,
+    ):
+        self._exporter = exporter
+        self._resource = {
+            "attributes": _otlp_attributes(
+                {"service.name": service_name, "process.pid": os.getpid()}
+            )
+        }
+        self._queue: queue.Queue[Span | None] = queue.Queue(queue_size)
+        self._batch_size = batch_size
+        self._export_interval = export_interval
+        self.dropped = 0
+        self._thread = threading.Thread(
+            target=self._run, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        """Ставит завершённый span в очередь на выгрузку"""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Выгружает оставшиеся span'ы и останавливает поток"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        batch: list[Span] = []
+        deadline = time.monotonic() + self._export_interval
+        while True:
+            try:
+                span = self._queue.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                span = None
+                stopping = False
+            else:
+                stopping = span is None
+            if span is not None:
+                batch.append(span)
+                if len(batch) < self._batch_size:
+                    continue
+            self._export(batch)
+            batch = []
+            deadline = time.monotonic() + self._export_interval
+            if stopping:
+                return
+
+    def _export(self, batch: list[Span]) -> None:
+        if not batch:
+            return
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": self._resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [span.to_otlp() for span in batch],
+                        }
+                    ],
+                }
+            ]
+        }
+        try:
+            self._exporter.export(dumps(payload))
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("%s spans are not exported: %s", len(batch), exc)
+
+
+class Tracer:
+    """
+    Создаёт span'ы.
+
+    Пример использования:
+    with tracer.span("db.get", SpanKind.CLIENT, {"db.table": "users"}):
+        ...
+    """
+
+    def __init__(self):
+        self.processor: BatchSpanProcessor | None = None
+        self.sample_rate = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Трассировка настроена"""
+        return self.processor is not None
+
+    def configure(
+        self, processor: BatchSpanProcessor | None, sample_rate: float
+    ) -> None:
+        """
+        Включает (или, при processor=None, выключает) трассировку.
+
+        Предыдущий процессор выгружает оставшиеся span'ы,
+        блокируя вызывающий поток до окончания выгрузки.
+        """
+        previous, self.processor = self.processor, processor
+        self.sample_rate = sample_rate
+        if previous is not None:
+            previous.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        Выгружает оставшиеся span'ы и выключает трассировку.
+
+        Блокирует поток; из цикла событий вызывается через
+        run_in_executor.
+        """
+        self.configure(None, 0.0)
+
+    def span(
+        self,
+        name: str,
+        kind: SpanKind = SpanKind.INTERNAL,
+        attributes: dict[str, Any] | None = None,
+        traceparent: str | None = None,
+    ) -> Span | _NonRecordingSpan | _NoopSpan:
+        """
+        Span, дочерний текущему, или корень новой трассы.
+
+        traceparent продолжает трассу, начатую в другом сервисе.
+        """
+        if self.processor is None:
+            return _NOOP_SPAN
+
+        if traceparent is not None and (
+            parsed := parse_traceparent(traceparent)
+        ):
+            trace_id, parent_id, sampled = parsed
+            if not sampled:
+                return _NonRecordingSpan(trace_id, parent_id)
+        elif (parent := _current_span.get()) is not None:
+            if not parent.sampled:
+                return _NOOP_SPAN
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            if random.random() >= self.sample_rate:
+                return _NonRecordingSpan()
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+
+        return Span(self, name, kind, trace_id, parent_id, attributes or {})
+
+
+def current_span() -> Span | _NonRecordingSpan | None:
+    """Текущий span, если он есть"""
+    return _current_span.get()
+
+
+def inject(headers: MutableMapping[str, Any]) -> None:
+    """Добавляет traceparent текущей трассы в заголовки запроса"""
+    if (span := _current_span.get()) is not None and (
+        traceparent := span.traceparent()
+    ):
+        headers[TRACEPARENT_HEADER] = traceparent
+
+
+def traced(
+    name: str | None = None, kind: SpanKind = SpanKind.INTERNAL
+) -> Callable:
+    """Декоратор асинхронной функции, оборачивающий её вызовы в span"""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(span_name, kind):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+tracer = Tracer()
+
+
+def configure_tracing(config: Mapping[str, Any]) -> None:
+    """
+    Включает трассировку процесса по settings.tracing_settings.
+
+    Пустые настройки выключают её. Вызывается в каждом процессе:
+    поток выгрузки не переживает fork.
+    """
+    if not config:
+        tracer.configure(None, 0.0)
+        return
+    exporter: SpanExporter
+    if config["exporter"] == "otlp":
+        exporter = OtlpHttpExporter(config["otlp_endpoint"])
+    else:
+        exporter = FileExporter(config["file"])
+    processor = BatchSpanProcessor(
+        exporter,
+        config["service_name"],
+        queue_size=config["queue_size"],
+        batch_size=config["batch_size"],
+        export_interval=config["export_interval"],
+    )
+    tracer.configure(processor, config["sample_rate"])
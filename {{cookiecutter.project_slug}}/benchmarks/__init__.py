@@ -0,0 +1 @@
+"""Нагрузочные тесты компонентов сервиса на локальных заглушках"""
@@ -0,0 +1,222 @@
+"""
+Нагрузочный тест http-клиента: Throttler, retry_api_request и ApiSession.
+
+Прогоняет ApiSession через сетку настроек параллелизма и Throttler
+против локального сервера-заглушки и выводит пропускную способность,
+перцентили задержки и число повторных попыток.
+
+Запуск: python -m benchmarks.http_client --help
+"""
+import asyncio
+import json
+import math
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import click
+
+from app.repository.http_session.base import ApiSession
+from app.repository.http_session.const import DEFAULT_USER_AGENT
+from app.repository.http_session.exception import SessionError
+from benchmarks.stand_in_server import StandInConfig, StandInServer
+
+
+@dataclass
+class ScenarioResult:  # pylint: disable=too-many-instance-attributes
+    """Результат прогона одного сценария"""
+
+    concurrency: int
+    rate_limit: int
+    period: float
+    requests: int
+    elapsed: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    retries: int
+    errors: int
+    statuses: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        """Идентификатор сценария для сравнения прогонов"""
+        return f"c{self.concurrency}-r{self.rate_limit}/{self.period:g}s"
+
+
+def percentile(samples: list[float], share: float) -> float:
+    """Перцентиль выборки (по ближайшему рангу)"""
+    if not samples:
+        return math.nan
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(share * len(ordered)) - 1, 0)]
+
+
+async def run_scenario(
+    server: StandInServer,
+    concurrency: int,
+    rate_limit: int,
+    period: float,
+    requests: int,
+) -> ScenarioResult:
+    """Отправляет requests запросов в concurrency потоков через ApiSession"""
+    server.stats.reset()
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(index)
+
+    async def worker(session: ApiSession) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            started_at = time.perf_counter()
+            try:
+                response = await session.get(server.url)
+            except SessionError:
+                statuses["error"] += 1
+                continue
+            latencies.append(time.perf_counter() - started_at)
+            statuses[str(response.status)] += 1
+
+    async with ApiSession(
+        proxy=None,
+        user_agent=DEFAULT_USER_AGENT,
+        throttler_rate_limit=rate_limit,
+        throttler_period=period,
+    ) as session:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    return ScenarioResult(
+        concurrency=concurrency,
+        rate_limit=rate_limit,
+        period=period,
+        requests=requests,
+        elapsed=elapsed,
+        throughput=len(latencies) / elapsed,
+        p50=percentile(latencies, 0.50),
+        p95=percentile(latencies, 0.95),
+        p99=percentile(latencies, 0.99),
+        # каждый вызов доходит до сервера хотя бы раз, остальное - повторы
+        retries=server.stats.hits - requests,
+        errors=statuses.pop("error", 0),
+        statuses=dict(statuses),
+    )
+
+
+def format_result(result: ScenarioResult) -> str:
+    """Строка таблицы результатов"""
+    return (
+        f"{result.name:<20} {result.throughput:>9.1f} "
+        f"{result.p50 * 1000:>8.1f} {result.p95 * 1000:>8.1f} "
+        f"{result.p99 * 1000:>8.1f} {result.retries:>8} {result.errors:>7}"
+    )
+
+
+def find_regressions(
+    results: list[ScenarioResult], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """Сценарии, в которых пропускная способность упала больше допустимого"""
+    regressions = []
+    for result in results:
+        if (previous := baseline.get(result.name)) is None:
+            continue
+        if result.throughput < previous["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {result.throughput:.1f} rps "
+                f"< {previous['throughput']:.1f} rps"
+            )
+    return regressions
+
+
+async def run_benchmark(
+    config: StandInConfig,
+    concurrency_levels: tuple[int, ...],
+    rate_limits: tuple[int, ...],
+    period: float,
+    requests: int,
+) -> list[ScenarioResult]:
+    """Прогоняет все сочетания параллелизма и лимитов Throttler"""
+    results = []
+    async with StandInServer(config) as server:
+        for concurrency in concurrency_levels:
+            for rate_limit in rate_limits:
+                result = await run_scenario(
+                    server, concurrency, rate_limit, period, requests
+                )
+                click.echo(format_result(result))
+                results.append(result)
+    return results
+
+
+@click.command(help="Benchmark ApiSession against a local stand-in server.")
+@click.option("--requests", default=200, show_default=True)
+@click.option("--concurrency", multiple=True, type=int, default=(1, 10, 50))
+@click.option("--rate-limit", multiple=True, type=int, default=(10, 100, 1000))
+@click.option("--period", default=1.0, show_default=True)
+@click.option("--latency", default=0.02, show_default=True)
+@click.option("--latency-jitter", default=0.01, show_default=True)
+@click.option("--error-rate", default=0.0, show_default=True)
+@click.option("--rate-429", default=0.0, show_default=True)
+@click.option("--payload-size", default=1024, show_default=True)
+@click.option("--seed", type=int, default=None)
+@click.option("--output", type=click.Path(path_type=Path), default=None)
+@click.option("--baseline", type=click.Path(path_type=Path), default=None)
+@click.option("--tolerance", default=0.2, show_default=True)
+def main(  # pylint: disable=too-many-arguments, too-many-locals
+    requests: int,
+    concurrency: tuple[int, ...],
+    rate_limit: tuple[int, ...],
+    period: float,
+    latency: float,
+    latency_jitter: float,
+    error_rate: float,
+    rate_429: float,
+    payload_size: int,
+    seed: int | None,
+    output: Path | None,
+    baseline: Path | None,
+    tolerance: float,
+):
+    """
+    Запускает нагрузочный тест; при заданном baseline завершается
+    с ошибкой, если пропускная способность упала больше чем на tolerance
+    """
+    config = StandInConfig(
+        latency=latency,
+        latency_jitter=latency_jitter,
+        error_rate=error_rate,
+        rate_429=rate_429,
+        payload_size=payload_size,
+        seed=seed,
+    )
+    click.echo(
+        f"{'scenario':<20} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'retries':>8} {'errors':>7}"
+    )
+    results = asyncio.run(
+        run_benchmark(config, concurrency, rate_limit, period, requests)
+    )
+
+    if output is not None:
+        output.write_text(
+            json.dumps(
+                {result.name: asdict(result) for result in results}, indent=2
+            ),
+            encoding="utf-8",
+        )
+
+    if baseline is not None:
+        previous = json.loads(baseline.read_text(encoding="utf-8"))
+        if regressions := find_regressions(results, previous, tolerance):
+            raise click.ClickException(
+                "Throughput regressions:\n" + "\n".join(regressions)
+            )
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,97 @@
+"""
+Локальный сервер-заглушка, имитирующий внешний источник.
+
+Позволяет нагружать http-клиент без обращения к партнёрам:
+задержка ответа, доля обрывов соединения, доля ответов 429
+и размер тела ответа настраиваются.
+"""
+import asyncio
+import random
+import socket
+from collections import Counter
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+
+@dataclass
+class StandInConfig:
+    """Поведение сервера-заглушки"""
+
+    latency: float = 0.02
+    latency_jitter: float = 0.01
+    # доля запросов, на которые сервер рвёт соединение без ответа
+    error_rate: float = 0.0
+    # доля запросов, на которые сервер отвечает 429 Too Many Requests
+    rate_429: float = 0.0
+    payload_size: int = 1024
+    seed: int | None = None
+
+
+@dataclass
+class StandInStats:
+    """Статистика запросов, полученных сервером"""
+
+    hits: int = 0
+    statuses: Counter = field(default_factory=Counter)
+
+    def reset(self) -> None:
+        """Обнуляет статистику перед новым сценарием"""
+        self.hits = 0
+        self.statuses.clear()
+
+
+class StandInServer:
+    """
+    Сервер-заглушка на свободном локальном порту.
+
+    Используется как асинхронный контекстный менеджер.
+    """
+
+    def __init__(self, config: StandInConfig):
+        self.config = config
+        self.stats = StandInStats()
+        self._random = random.Random(config.seed)
+        self._payload = "x" * config.payload_size
+        self._runner: web.AppRunner | None = None
+        self._port: int | None = None
+
+    @property
+    def url(self) -> str:
+        """Адрес ресурса сервера"""
+        return f"http://127.0.0.1:{self._port}/resource"
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/resource", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self._port = sock.getsockname()[1]
+        await web.TCPSite(self._runner, "127.0.0.1", self._port).start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.stats.hits += 1
+        config = self.config
+        latency = self._random.gauss(config.latency, config.latency_jitter)
+        await asyncio.sleep(max(latency, 0.0))
+
+        roll = self._random.random()
+        if roll < config.error_rate:
+            self.stats.statuses["disconnect"] += 1
+            if request.transport is not None:
+                request.transport.close()
+            return web.Response()
+        if roll < config.error_rate + config.rate_429:
+            self.stats.statuses[429] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+
+        self.stats.statuses[200] += 1
+        return web.Response(text=self._payload)